@@ -1,19 +1,46 @@
 # server.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi import HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Union, Literal
-from src.moderation.generate_ideas import generate_ideas_with_filters, generate_ideas_from_curriculum
+from src.moderation.generate_ideas import (
+    generate_ideas_with_filters,
+    generate_ideas_from_curriculum,
+    stream_ideas_with_filters,
+    stream_ideas_from_curriculum,
+)
+from src.moderation.idea_log import (
+    append_batch as log_idea_batch,
+    read_ideas as read_idea_log,
+    batch_key as idea_batch_key,
+    dedupe_ideas,
+    find_batch as find_idea_batch,
+)
+from src.moderation.job_queue import JobQueue, JobWorkerPool
 from pathlib import Path
 import json
-from datetime import datetime
-import shutil
-from supabase import create_client, Client
+from supabase import create_client, acreate_client, Client, AsyncClient
 import os
 from dotenv import load_dotenv
 from fastapi import Query
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from src.data.curriculum_profiles import curriculum_profiles
+from src.utils.performance_benchmarks import get_snapshot as get_benchmark_snapshot, compute_player_metrics
+from src.utils.player_rollups import (
+    get_rollup as get_player_rollup,
+    rebuild_rollups as rebuild_player_rollups,
+    record_finalized_sessions,
+    to_summary as rollup_to_summary,
+)
+from src.utils.supabase_batch import afetch_all_rows, afetch_rows_in
+from src.utils.event_catalog import event_catalog
+from src.utils.session_planner import session_planner
+from src.utils.facet_index import get_facet_index
 import traceback
 
 project_root = Path(__file__).resolve().parent
@@ -28,7 +55,37 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
     raise ValueError("❌ Missing Supabase credentials in environment variables")
 
+# Sync client for background threads (snapshot rebuilds, rollup backfills);
+# request handlers use the pooled async client created at startup.
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+async_supabase: Optional[AsyncClient] = None
+
+# LLM generation runs on its own bounded pool so slow OpenAI calls never
+# starve the threadpool FastAPI uses for everything else.
+LLM_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm")
+
+@app.on_event("startup")
+async def create_async_supabase():
+    global async_supabase
+    async_supabase = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+# Durable background jobs for long LLM batches (see /api/jobs below)
+job_queue = JobQueue()
+job_workers: Optional[JobWorkerPool] = None
+
+@app.on_event("startup")
+async def start_job_workers():
+    global job_workers
+    job_workers = JobWorkerPool(job_queue, {
+        "generate_ideas": run_generate_ideas,
+        "save_accepted_ideas": write_accepted_ideas,
+    })
+    job_workers.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if job_workers:
+        job_workers.stop()
 
 # ✅ CORRECT CORS placement — directly after app initialization
 app.add_middleware(
@@ -54,30 +111,88 @@ class CurriculumPayload(BaseModel):
     curriculum_level: str
     count: int
 
+class SessionFinalizedPayload(BaseModel):
+    session_id: str
+
+class SessionPlanPayload(BaseModel):
+    player_name: str
+    count: int = 10
+    filters: dict = {}                     # themes / broad_eras / regions
+    curriculum_key: Optional[str] = None   # e.g. "gb_key_stage_3"; overrides filters
+    exclude: List[str] = []                # slugs already played this session
+
 # This allows both str and dict-based entries in accepted ideas
 AcceptedIdea = Union[str, dict]
 
+def run_generate_ideas(payload: dict):
+    if payload["mode"] == "filters":
+        return generate_ideas_with_filters(payload["filters"], count=payload["count"])
+    elif payload["mode"] == "curriculum":
+        return generate_ideas_from_curriculum(
+            country=payload["curriculum_country"],
+            curriculum_key_fragment=payload["curriculum_level"],  # ✅ Renamed param
+            count=payload["count"]
+        )
+    return []
+
 @app.post("/api/generate-ideas")
-def generate_ideas(request: Union[FiltersPayload, CurriculumPayload]):
+async def generate_ideas(request: Union[FiltersPayload, CurriculumPayload]):
+    loop = asyncio.get_running_loop()
     try:
-        if request.mode == "filters":
-            return generate_ideas_with_filters(request.filters, count=request.count)
-        elif request.mode == "curriculum":
-            return generate_ideas_from_curriculum(
-                country=request.curriculum_country,
-                curriculum_key_fragment=request.curriculum_level,  # ✅ Renamed param
-                count=request.count
-            )
-        return []
+        return await loop.run_in_executor(LLM_EXECUTOR, run_generate_ideas, jsonable_encoder(request))
     except Exception as e:
         import traceback
         traceback.print_exc()
         return [{"error": str(e)}]
     
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/generate-ideas/stream")
+async def generate_ideas_stream(request: Union[FiltersPayload, CurriculumPayload]):
+    """
+    Server-Sent Events variant of /api/generate-ideas: "idea" events as each
+    LLM call returns, "verdict" events as dedup finishes, then "summary".
+    """
+    def events():
+        try:
+            if request.mode == "filters":
+                stream = stream_ideas_with_filters(request.filters, count=request.count)
+            else:
+                stream = stream_ideas_from_curriculum(
+                    country=request.curriculum_country,
+                    curriculum_key_fragment=request.curriculum_level,
+                    count=request.count,
+                )
+            for event, data in stream:
+                yield sse_event(event, data)
+        except Exception as e:
+            print("❌ Error while streaming ideas:")
+            traceback.print_exc()
+            yield sse_event("error", {"error": str(e)})
+
+    # Sync generator: Starlette iterates it in a worker thread, one event at a time
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/api/save-accepted-ideas")
-def save_accepted_ideas(ideas: List[dict]):
+async def save_accepted_ideas(ideas: List[dict]):
+    return await asyncio.to_thread(write_accepted_ideas, ideas)
+
+def write_accepted_ideas(ideas: List[dict]):
+    """
+    Saves the accepted ideas as the pending list and logs them as one batch.
+    Also runs as a retried background job, so it is idempotent: ideas are
+    deduplicated by slug/title, the file is replaced atomically and a batch
+    already in the log is not logged again.
+    """
     from src.agents.deduplication_agent import get_broad_era_label, infer_theme_from_text
 
+    ideas = dedupe_ideas(ideas)
+
     # 🔁 Enrich accepted ideas
     enriched = []
     for idea in ideas:
@@ -93,179 +208,169 @@ def save_accepted_ideas(ideas: List[dict]):
         enriched.append(idea)
     output_path = project_root / "src/moderation/pending_event_ideas.json"
 
-    with open(output_path, "w", encoding="utf-8") as f:
+    tmp_path = output_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(ideas, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
 
-    archive_dir = project_root / "src/moderation/archive"
-    archive_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    archive_path = archive_dir / f"pending_event_ideas_{timestamp}.json"
-    shutil.copy(output_path, archive_path)
+    key = idea_batch_key(ideas)
+    entry = find_idea_batch("accepted", key)
+    if entry:
+        print(f"ℹ️ Batch {entry['batch_id']} was already logged, skipping")
+    else:
+        entry = log_idea_batch("accepted", ideas, batch_key=key)
 
     print(f"✅ Saved to {output_path}")
-    print(f"🗂️ Archived to {archive_path}")
-    return {"status": "✅ Ideas saved and archived"}
-
-@app.get("/api/player-summary")
-def get_player_summary(player_name: str = Query(...)):
+    print(f"🗂️ Logged batch {entry['batch_id']} in idea_log/{entry['segment']}")
+    return {"status": "✅ Ideas saved and archived", "batch_id": entry["batch_id"]}
+
+@app.get("/api/generated-ideas")
+async def get_generated_ideas(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    kind: Optional[Literal["generated", "accepted"]] = None,
+    theme: Optional[str] = None,
+    mode: Optional[str] = None,
+    region: Optional[str] = None,
+    broad_era: Optional[str] = None,
+    search: Optional[str] = None,
+    since: Optional[str] = None,
+):
+    return await asyncio.to_thread(
+        read_idea_log,
+        offset=offset, limit=limit, kind=kind, theme=theme, mode=mode,
+        region=region, broad_era=broad_era, search=search, since=since,
+    )
+
+# --- Event catalog deltas: clients send the catalog version they hold
+
+@app.get("/api/events")
+async def get_events(request: Request, since: Optional[int] = Query(None, ge=0)):
+    delta = await asyncio.to_thread(event_catalog.delta, since)
+    # Keyed on the catalog version alone: a client echoing the ETag of its
+    # last response already holds this version, whatever `since` it sent
+    etag = f'"events-v{delta["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(delta, headers=headers)
+
+@app.get("/api/facet-counts")
+async def get_facet_counts(
+    themes: List[str] = Query([]),       # theme_lookup ids or labels
+    broad_eras: List[str] = Query([]),
+    regions: List[str] = Query([]),
+    curriculum_key: Optional[str] = None,
+):
+    # The counts are bitset arithmetic, but after events.json changes the
+    # index is rebuilt (and the catalog reloaded) inside this call: off the loop
+    index = await asyncio.to_thread(get_facet_index)
+    return index.counts({"themes": themes, "broad_eras": broad_eras, "regions": regions}, curriculum_key)
+
+@app.post("/api/session-plan")
+async def session_plan(payload: SessionPlanPayload):
     try:
-        sessions_resp = supabase.from_("sessions").select("*").eq("player_name", player_name).eq("completed", True).execute()
-        sessions = sessions_resp.data if sessions_resp.data else []
-
-        session_ids = [s["id"] for s in sessions]
-        total_events = sum(s.get("total_events", 0) for s in sessions)
-        total_points = sum(s.get("total_points", 0) for s in sessions)
-        avg_score = round(total_points / total_events) if total_events else 0  # ⬅️ Integer
-        best_score = max((s.get("total_points", 0) for s in sessions), default=0)
-
-        results_resp = supabase.from_("results").select("*").in_("session_id", session_ids).execute()
-        results = results_resp.data if results_resp.data else []
-
-        total_time = sum(r.get("time_to_guess", 0) or 0 for r in results)
-        avg_time = round(total_time / len(results), 1) if results else 0  # ⬅️ 1 decimal
-
-        perfect_guesses = [
-            r for r in results
-            if r["distance"] is not None and r["year_diff"] is not None
-            and r["distance"] <= 10 and abs(r["year_diff"]) <= 5
-        ]
-        perfect_guess_rate = round(len(perfect_guesses) / len(results) * 100, 1) if results else 0
-
-        avg_distance = round(sum((r.get("distance") or 0) for r in results) / len(results), 1) if results else 0
-        avg_year_diff = round(sum(abs(r.get("year_diff") or 0) for r in results) / len(results), 1) if results else 0
+        return await asyncio.to_thread(
+            session_planner.plan, supabase, payload.player_name, payload.count,
+            filters=payload.filters, curriculum_key=payload.curriculum_key, exclude=payload.exclude,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return {"error": str(e)}
 
-        unique_events = set(r["slug"] for r in results if r["slug"])
-        average_attempts = round(len(results) / len(unique_events), 2) if unique_events else 0
+# --- Background jobs: submit returns immediately, poll or subscribe for the result
+
+@app.post("/api/jobs/generate-ideas")
+async def submit_generate_ideas_job(request: Union[FiltersPayload, CurriculumPayload]):
+    job_id = await asyncio.to_thread(job_queue.submit, "generate_ideas", jsonable_encoder(request))
+    job_workers.notify()
+    return {"job_id": job_id, "status": "queued"}
+
+@app.post("/api/jobs/save-accepted-ideas")
+async def submit_save_accepted_ideas_job(ideas: List[dict]):
+    job_id = await asyncio.to_thread(job_queue.submit, "save_accepted_ideas", ideas)
+    job_workers.notify()
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/api/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    return await asyncio.to_thread(job_queue.list, status=status, limit=limit)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """SSE subscription: a "status" event whenever the job changes, ending with its result."""
+    async def events():
+        last_status = None
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                yield sse_event("error", {"error": "Unknown job"})
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield sse_event("status", {k: job[k] for k in ("id", "status", "attempts", "error")})
+            if job["status"] in ("succeeded", "failed"):
+                yield sse_event("result", job)
+                return
+            await asyncio.sleep(1)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        # ✅ Add recent_scores: last 10 scores from most recent completed sessions
-        recent_scores = [
-            round(s["total_points"] / s["total_events"])
-            for s in sessions
-            if s.get("total_points") and s.get("total_events")
-        ][:10]
+@app.get("/api/player-summary")
+async def get_player_summary(player_name: str = Query(...)):
+    try:
+        rollup = get_player_rollup(player_name)
+        if rollup is None:
+            # First visit since rollups were introduced: backfill this player once
+            # (players without sessions get a stored empty rollup, not a retry)
+            rebuilt = await asyncio.to_thread(rebuild_player_rollups, supabase, player_name=player_name)
+            rollup = rebuilt[player_name]
+        return rollup_to_summary(player_name, rollup)
 
-        return {
-            "player_name": player_name,
-            "total_games": len(sessions),
-            "total_events": total_events,
-            "average_score": avg_score,
-            "best_score": best_score,
-            "total_play_time": total_time,
-            "average_time_per_guess": avg_time,
-            "perfect_guess_rate": perfect_guess_rate,
-            "average_distance": avg_distance,
-            "average_year_diff": avg_year_diff,
-            "average_attempts": average_attempts,
-            "recent_scores": recent_scores  # 👈 Added
-        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"error": str(e)}
 
+@app.post("/api/session-finalized")
+async def session_finalized(payload: SessionFinalizedPayload):
+    try:
+        applied = await asyncio.to_thread(record_finalized_sessions, supabase, [payload.session_id])
+        return {"status": "✅ Player stats updated" if applied else "ℹ️ Nothing to apply", "applied": applied}
     except Exception as e:
         import traceback
         traceback.print_exc()
         return {"error": str(e)}
     
 @app.get("/api/player-performance-comparison")
-def get_player_performance_comparison(player_name: str = Query(...)):
+async def get_player_performance_comparison(player_name: str = Query(...)):
     try:
-        # Fetch player sessions
-        player_sessions_resp = supabase.from_("sessions").select("id, total_points, total_events").eq("player_name", player_name).eq("completed", True).execute()
-        player_sessions = player_sessions_resp.data if player_sessions_resp.data else []
-
-        total_points = sum(s["total_points"] for s in player_sessions if s["total_points"] is not None)
-        total_events = sum(s["total_events"] for s in player_sessions if s["total_events"])
-        avg_player_score = round(total_points / total_events) if total_events else 0
-        best_player_score = max((s["total_points"] for s in player_sessions if s["total_points"] is not None), default=0)
-
-        player_session_ids = [s["id"] for s in player_sessions]
-        player_results_resp = supabase.from_("results").select("*").in_("session_id", player_session_ids).execute()
-        player_results = player_results_resp.data if player_results_resp.data else []
-
-        player_distances = [r["distance"] for r in player_results if r["distance"] is not None]
-        player_year_diffs = [abs(r["year_diff"]) for r in player_results if r["year_diff"] is not None]
-        player_times = [r["time_to_guess"] for r in player_results if r["time_to_guess"] is not None]
-        player_perfect_guesses = [
-            r for r in player_results
-            if r["distance"] is not None and r["year_diff"] is not None
-            and r["distance"] <= 10 and abs(r["year_diff"]) <= 5
-        ]
-        slug_attempts = {}
-        for r in player_results:
-            slug = r.get("slug")
-            if slug:
-                slug_attempts.setdefault(slug, []).append(r)
-        player_attempts = [len(v) for v in slug_attempts.values()]
-        player_avg_attempts = round(sum(player_attempts) / len(player_attempts), 2) if player_attempts else 0
-
-        # Fetch all sessions
-        all_sessions_resp = supabase.from_("sessions").select("id, player_name, total_points, total_events").eq("completed", True).execute()
-        all_sessions = all_sessions_resp.data if all_sessions_resp.data else []
-
-        # Map: player_name -> list of average scores
-        player_event_averages = {}
-        for s in all_sessions:
-            name = s["player_name"]
-            if s["total_points"] is not None and s["total_events"]:
-                avg = s["total_points"] / s["total_events"]
-                player_event_averages.setdefault(name, []).append(avg)
-
-        avg_scores_per_player = [
-            (name, sum(scores) / len(scores))
-            for name, scores in player_event_averages.items()
-        ]
-        avg_scores_per_player.sort(key=lambda x: x[1], reverse=True)
-
-        def compute_benchmark(percentile):
-            top_count = max(int(len(avg_scores_per_player) * (percentile / 100.0)), 1)
-            selected_players = [name for name, _ in avg_scores_per_player[:top_count]]
-            selected_sessions = [s for s in all_sessions if s["player_name"] in selected_players]
-
-            if not selected_sessions:
-                return None
-
-            session_ids = [s["id"] for s in selected_sessions]
-            results_resp = supabase.from_("results").select("*").in_("session_id", session_ids).execute()
-            results = results_resp.data if results_resp.data else []
-
-            distances = [r["distance"] for r in results if r["distance"] is not None]
-            year_diffs = [abs(r["year_diff"]) for r in results if r["year_diff"] is not None]
-            time_guesses = [r["time_to_guess"] for r in results if r["time_to_guess"] is not None]
-            perfect_guesses = [
-                r for r in results
-                if r["distance"] is not None and r["year_diff"] is not None
-                and r["distance"] <= 10 and abs(r["year_diff"]) <= 5
-            ]
-            slug_attempts = {}
-            for r in results:
-                slug = r.get("slug")
-                if slug:
-                    slug_attempts.setdefault(slug, []).append(r)
-            attempts_per_slug = [len(v) for v in slug_attempts.values()]
-            average_attempts = round(sum(attempts_per_slug) / len(attempts_per_slug), 2) if attempts_per_slug else 0
-
-            total_points = sum(s["total_points"] for s in selected_sessions if s["total_points"] is not None)
-            total_events = sum(s["total_events"] for s in selected_sessions if s["total_events"])
-            return {
-                "average_score": round(total_points / total_events) if total_events else 0,
-                "best_score": max((s["total_points"] for s in selected_sessions if s["total_points"] is not None), default=0),
-                "perfect_guess_pct": round(len(perfect_guesses) / len(results) * 100, 1) if results else 0,
-                "average_distance": round(sum(distances) / len(distances), 1) if distances else None,
-                "average_year_diff": round(sum(year_diffs) / len(year_diffs), 1) if year_diffs else None,
-                "average_time_per_guess": round(sum(time_guesses) / len(time_guesses), 1) if time_guesses else None,
-                "average_attempts": average_attempts
-            }
+        # Benchmarks and ranks come from a precomputed snapshot (see src/utils/performance_benchmarks.py)
+        snapshot = await asyncio.to_thread(get_benchmark_snapshot, supabase)
+        player_metrics = snapshot["players"].get(player_name)
+        if player_metrics is None:
+            player_metrics = await asyncio.to_thread(compute_player_metrics, supabase, player_name)
 
         return {
             "player_name": player_name,
-            "average_score": avg_player_score,
-            "best_score": best_player_score,
-            "perfect_guess_pct": round(len(player_perfect_guesses) / len(player_results) * 100, 1) if player_results else 0,
-            "average_distance": round(sum(player_distances) / len(player_distances), 1) if player_distances else None,
-            "average_year_diff": round(sum(player_year_diffs) / len(player_year_diffs), 1) if player_year_diffs else None,
-            "average_time_per_guess": round(sum(player_times) / len(player_times), 1) if player_times else None,
-            "average_attempts": player_avg_attempts,
-            "top_10_percent": compute_benchmark(10),
-            "top_25_percent": compute_benchmark(25),
-            "average": compute_benchmark(100),
+            **player_metrics,
+            "player_count": snapshot["player_count"],
+            "cutoffs": snapshot["cutoffs"],
+            "top_10_percent": snapshot["benchmarks"]["top_10_percent"],
+            "top_25_percent": snapshot["benchmarks"]["top_25_percent"],
+            "average": snapshot["benchmarks"]["average"],
+            "benchmarks_generated_at": snapshot["generated_at"],
         }
 
     except Exception as e:
@@ -274,11 +379,12 @@ def get_player_performance_comparison(player_name: str = Query(...)):
         return {"error": str(e)}
     
 @app.get("/api/player-dimension-performance")
-def get_player_dimension_performance(player_name: str = Query(...)):
+async def get_player_dimension_performance(player_name: str = Query(...)):
     try:
         # Step 1: Get all results for the player, including slug
-        results_resp = supabase.from_("results").select("slug, score, distance, year_diff").eq("player_name", player_name).execute()
-        results = results_resp.data or []
+        results = await afetch_all_rows(
+            lambda: async_supabase.from_("results").select("slug, score, distance, year_diff").eq("player_name", player_name).order("id")
+        )
 
         if not results:
             return {
@@ -288,8 +394,7 @@ def get_player_dimension_performance(player_name: str = Query(...)):
 
         # Step 2: Extract all slugs and fetch corresponding event metadata
         slugs = list(set(r["slug"] for r in results if r.get("slug")))
-        events_resp = supabase.from_("events").select("slug, theme, broad_era, region").in_("slug", slugs).execute()
-        events = events_resp.data or []
+        events = await afetch_rows_in(async_supabase, "events", "slug, theme, broad_era, region", "slug", slugs, order="slug")
         event_meta_map = {e["slug"]: e for e in events}
 
         # Step 3: Group results by (theme, broad_era, region)
@@ -336,7 +441,9 @@ def get_player_dimension_performance(player_name: str = Query(...)):
         return {"error": str(e)}
     
 @app.get("/api/curriculum-profiles")
-def get_curriculum_profiles():
+async def get_curriculum_profiles():
+    # Events already tagged with each profile, from the catalog's facet index
+    tagged = (await asyncio.to_thread(get_facet_index)).facets["curriculum_tags"]
     result = {}
     for full_key in curriculum_profiles.keys():
         if "_" not in full_key:
@@ -344,6 +451,7 @@ def get_curriculum_profiles():
         country, level = full_key.split("_", 1)
         country = country.lower()
         level = level.lower()
-        if level not in result.setdefault(country, []):
-            result[country].append(level)
+        levels = result.setdefault(country, [])
+        if level not in (entry["level"] for entry in levels):
+            levels.append({"level": level, "event_count": tagged.get(full_key, 0).bit_count()})
     return result
\ No newline at end of file
@@ -1,5 +1,4 @@
 // src/App.jsx
-import { useEffect, useState } from "react";
 import { Routes, Route } from "react-router-dom";
 import PreGameScreen from "./pages/PreGameScreen";
 import TimeGuessrGame from "./TimeGuessrGame";
@@ -21,23 +20,11 @@ function PlayerStatsWrapper() {
 }
 
 export default function App() {
-  const [events, setEvents] = useState([]);
-
-  useEffect(() => {
-    fetch("/data/events.json")
-      .then((res) => res.json())
-      .then((data) => setEvents(data))
-      .catch((err) => console.error("Failed to load events:", err));
-  }, []);
-
-  if (events.length === 0) {
-    return <div className="p-8 text-center">Loading events…</div>;
-  }
-
+  // The pre-game screen works from /api/facet-counts; only the game page loads the catalog
   return (
     <Routes>
-      <Route path="/" element={<PreGameScreen events={events} />} />
-      <Route path="/play" element={<TimeGuessrGame events={events} />} />
+      <Route path="/" element={<PreGameScreen />} />
+      <Route path="/play" element={<TimeGuessrGame />} />
       <Route path="/scoreboard" element={<Scoreboard />} />
       <Route path="/summary" element={<SessionSummary />} />
       <Route path="/moderation" element={<IdeaModerationPanel />} />
@@ -1,17 +1,46 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import supabase from './supabaseClient';
+import { loadGameEvents } from './utils/gameCatalog';
 import MapboxMap from './components/MapboxMap';
 import cityLookup from './assets/city_lookup.json';
 import { v4 as uuidv4 } from 'uuid';
 import { useNavigate } from 'react-router-dom';
 import GuessResultModal from './components/GuessResultModal';
+import EventImage, { prefetchEventImage } from './components/EventImage';
 import Zoom from 'react-medium-image-zoom';
 import 'react-medium-image-zoom/dist/styles.css';
 import { useSession } from './hooks/useSession';
 
+const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+const PLAN_SIZE = 10; // Events planned per /api/session-plan call in endless mode
+
+function normalizeEventCoords(e) {
+  let coords = [0, 0];
+  try {
+    if (Array.isArray(e.coords)) {
+      coords = e.coords.map(Number);
+    } else if (typeof e.coords === 'string') {
+      if (e.coords.trim().startsWith("[")) {
+        coords = JSON.parse(e.coords);
+      } else {
+        const parts = e.coords.split(',').map(p => parseFloat(p.trim()));
+        coords = parts;
+      }
+    }
+  } catch (err) {
+    console.warn(`⚠️ Could not parse coords for "${e.title}":`, e.coords, err);
+  }
+
+  if (!Array.isArray(coords) || coords.length !== 2 || coords.some(isNaN)) {
+    console.warn(`⚠️ Malformed coords for "${e.title}":`, coords);
+    coords = [0, 0];
+  }
+
+  return { ...e, coords };
+}
+
 export default function TimeGuessrGame() {
-  const [events, setEvents] = useState([]);
-  const [filteredEvents, setFilteredEvents] = useState([]);
+  const [poolSize, setPoolSize] = useState(0); // Events matching the filters, from the session plan
   const [event, setEvent] = useState(null);
   const [guessCoords, setGuessCoords] = useState(null);
   const [guessYear, setGuessYear] = useState('');
@@ -58,6 +87,7 @@ export default function TimeGuessrGame() {
   const targetEventsRaw = sessionStorage.getItem('targetEvents');
   const targetEvents = targetEventsRaw ? Number(targetEventsRaw) : null;
   const [showFinalSummary, setShowFinalSummary] = useState(false);
+  const planRef = useRef([]); // Upcoming events from /api/session-plan
   const [isNewRecord, setIsNewRecord] = useState(false);
 
   useEffect(() => {
@@ -79,84 +109,9 @@ export default function TimeGuessrGame() {
   useEffect(() => {
     setSessionProgress({
       played: history.length,
-      total: targetEvents || filteredEvents.length,
+      total: targetEvents || poolSize,
     });
-  }, [history, targetEvents, filteredEvents]);
-
-  useEffect(() => {
-    async function fetchEvents() {
-      const { data, error } = await supabase
-        .from('events')
-        .select('id, title, slug, year, coords, theme, era, region, notable_location, image_url, caption, wiki_url, broad_era, era_id, country, city, difficulty, curriculum_tags, curriculum_theme_ids');
-
-      if (error) {
-        console.error('❌ Error fetching events:', error.message);
-        return;
-      }
-
-      const normalized = data.map((e) => {
-        let coords = [0, 0];
-        try {
-          if (Array.isArray(e.coords)) {
-            coords = e.coords.map(Number);
-          } else if (typeof e.coords === 'string') {
-            if (e.coords.trim().startsWith("[")) {
-              coords = JSON.parse(e.coords);
-            } else {
-              const parts = e.coords.split(',').map(p => parseFloat(p.trim()));
-              coords = parts;
-            }
-          }
-        } catch (err) {
-          console.warn(`⚠️ Could not parse coords for "${e.title}":`, e.coords, err);
-        }
-
-        if (!Array.isArray(coords) || coords.length !== 2 || coords.some(isNaN)) {
-          console.warn(`⚠️ Malformed coords for "${e.title}":`, coords);
-          coords = [0, 0];
-        }
-
-        return { ...e, coords };
-      });
-
-      setEvents(normalized);
-    }
-    fetchEvents();
-  }, []);
-
-  useEffect(() => {
-    const curriculumCountry = sessionStorage.getItem("curriculumCountry");
-    const curriculumLevel = sessionStorage.getItem("curriculumLevel");
-  
-    let results = events;
-  
-    // ✅ Curriculum filter takes precedence
-    if (curriculumCountry && curriculumLevel) {
-      const curriculumKey = `${curriculumCountry}_${curriculumLevel}`;
-      results = results.filter(
-        e =>
-          Array.isArray(e.curriculum_tags) &&
-          e.curriculum_tags.includes(curriculumKey)
-      );
-      console.log("🎓 Curriculum mode active:", curriculumKey, `→ ${results.length} events`);
-    } else {
-      // Fallback to manual filters
-      if (selectedThemes.length > 0) {
-        results = results.filter(e => selectedThemes.includes(e.theme));
-      }
-  
-      if (selectedBroadEras.length > 0) {
-        results = results.filter(e => selectedBroadEras.includes(e.broad_era));
-      }
-  
-      if (selectedRegions.length > 0) {
-        results = results.filter(e => selectedRegions.includes(e.region));
-      }
-    }
-  
-    console.log("🎛️ Final filtered count:", results.length);
-    setFilteredEvents(results);
-  }, [events, selectedThemes, selectedBroadEras, selectedRegions]);
+  }, [history, targetEvents, poolSize]);
 
   useEffect(() => {
     if (timerActive && !submitted && timeLeft > 0) {
@@ -166,10 +121,10 @@ export default function TimeGuessrGame() {
   }, [timeLeft, timerActive, submitted]);
 
   useEffect(() => {
-    if (!gameStarted && filteredEvents.length > 0) {
+    if (!gameStarted) {
       startGame();
     }
-  }, [filteredEvents]);
+  }, []);
 
   const getDistance = (lat1, lon1, lat2, lon2) => {
     const toRad = deg => deg * Math.PI / 180;
@@ -353,6 +308,85 @@ export default function TimeGuessrGame() {
 
   const totalScore = history.reduce((sum, entry) => sum + (entry.score || 0), 0);
 
+  // Offline fallback: only now is the whole catalog downloaded and filtered
+  const planLocally = async (count, exclude) => {
+    let catalog = [];
+    try {
+      catalog = (await loadGameEvents()).map(normalizeEventCoords);
+    } catch (err) {
+      console.error('❌ Error fetching events:', err.message);
+    }
+
+    const curriculumCountry = sessionStorage.getItem("curriculumCountry");
+    const curriculumLevel = sessionStorage.getItem("curriculumLevel");
+    let results = catalog;
+
+    // ✅ Curriculum filter takes precedence
+    if (curriculumCountry && curriculumLevel) {
+      const curriculumKey = `${curriculumCountry}_${curriculumLevel}`;
+      results = results.filter(
+        e =>
+          Array.isArray(e.curriculum_tags) &&
+          e.curriculum_tags.includes(curriculumKey)
+      );
+    } else {
+      if (selectedThemes.length > 0) {
+        results = results.filter(e => selectedThemes.includes(e.theme));
+      }
+      if (selectedBroadEras.length > 0) {
+        results = results.filter(e => selectedBroadEras.includes(e.broad_era));
+      }
+      if (selectedRegions.length > 0) {
+        results = results.filter(e => selectedRegions.includes(e.region));
+      }
+    }
+
+    const excluded = new Set(exclude);
+    const fresh = results.filter(e => !excluded.has(e.slug));
+    const pool = fresh.length > 0 ? fresh : results;
+    const shuffled = [...pool].sort(() => Math.random() - 0.5).slice(0, count);
+    return {
+      events: shuffled,
+      images: [],
+      matching: results.length,
+      available: fresh.length,
+      repeats: shuffled.length < count || fresh.length === 0,
+    };
+  };
+
+  // Asks the server for the next events (filters, recent-slug dedup and
+  // sampling happen there) and prefetches their images. Falls back to a
+  // local shuffle of the filtered catalog if the server is unreachable.
+  const fetchSessionPlan = async (name, count, exclude = []) => {
+    const curriculumCountry = sessionStorage.getItem("curriculumCountry");
+    const curriculumLevel = sessionStorage.getItem("curriculumLevel");
+    let plan;
+
+    try {
+      const res = await fetch(`${API_BASE}/api/session-plan`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          player_name: name,
+          count,
+          filters: { themes: selectedThemes, broad_eras: selectedBroadEras, regions: selectedRegions },
+          curriculum_key: curriculumCountry && curriculumLevel ? `${curriculumCountry}_${curriculumLevel}` : null,
+          exclude,
+        }),
+      });
+      plan = await res.json();
+      if (plan.error) throw new Error(plan.error);
+      plan.events = plan.events.map(normalizeEventCoords);
+    } catch (err) {
+      console.warn("⚠️ Session plan unavailable, sampling from the catalog:", err);
+      plan = await planLocally(count, exclude);
+    }
+
+    // Same variant the clue image will render, so the next round shows instantly
+    plan.events.forEach((e) => prefetchEventImage(e));
+    return plan;
+  };
+
   const startGame = async () => {
     if (!playerName || playerName.trim() === "") {
       alert("⚠️ Please enter a player name before starting the game.");
@@ -380,29 +414,18 @@ export default function TimeGuessrGame() {
       selectedThemes,
       selectedRegions,
       selectedBroadEras,
-      filteredCount: filteredEvents.length,
       mode,
     });
 
-    let results = filteredEvents;
-
-    // Fetch last 50 played event slugs for this player
-    const { data: recentResults, error } = await supabase
-      .from("results")
-      .select("slug")
-      .eq("player_name", effectivePlayerName)
-      .order("created_at", { ascending: false })
-      .limit(50);
+    // The whole session is planned up front: later rounds need no queries
+    const plan = await fetchSessionPlan(effectivePlayerName, targetEvents || PLAN_SIZE);
 
-    const recentSlugs = new Set((recentResults || []).map(r => r.slug));
-    const available = results.filter(e => !recentSlugs.has(e.slug));
-
-    if (results.length === 0) {
+    if (plan.events.length === 0) {
       alert("❌ No events match your selected filters. Please adjust and try again.");
       return;
     }
 
-    if (available.length === 0) {
+    if (plan.repeats) {
       alert("🎯 You've seen most of the matching events recently. Some may repeat.");
     }
 
@@ -410,13 +433,14 @@ export default function TimeGuessrGame() {
   sessionStorage.setItem("mode", mode);
 }
 
-    const finalPool = available.length > 0 ? available : results;
-    const next = finalPool[Math.floor(Math.random() * finalPool.length)];
+    const [next, ...upcoming] = plan.events;
+    planRef.current = upcoming;
 
     setEvent(next);
+    setPoolSize(plan.available || plan.matching);
     setSessionProgress({
       played: 0,
-      total: targetEvents || finalPool.length
+      total: targetEvents || plan.available || plan.matching
     });
 
     setGuessCoords(null);
@@ -431,32 +455,24 @@ export default function TimeGuessrGame() {
   };
 
   const pickNextFilteredEvent = async () => {
-    let results = filteredEvents;
-
-    // Fetch last 50 played slugs
-    const { data: recentResults, error } = await supabase
-      .from("results")
-      .select("slug")
-      .eq("player_name", playerName)
-      .order("created_at", { ascending: false })
-      .limit(50);
-
-    const recentSlugs = new Set((recentResults || []).map(r => r.slug));
-    const remaining = results.filter(e => !recentSlugs.has(e.slug));
-
-    const finalPool = remaining.length > 0 ? remaining : results;
-
-    if (remaining.length === 0) {
-      const hasFilter = selectedThemes || selectedBroadEras || selectedRegions;
-      alert(
-        hasFilter
-          ? "🎯 You've completed most recent events with these filters. Some may repeat."
-          : "🎯 You've seen most recent events. Some may repeat until new ones are added!"
-      );
+    let next = planRef.current.shift();
+
+    if (!next) {
+      // The plan ran out (endless mode, or fewer matching events than rounds): ask for more
+      const remaining = targetEvents ? targetEvents - history.length : PLAN_SIZE;
+      const plan = await fetchSessionPlan(playerName, Math.max(remaining, 1), history.map(h => h.slug));
+      if (plan.repeats) {
+        const hasFilter = selectedThemes || selectedBroadEras || selectedRegions;
+        alert(
+          hasFilter
+            ? "🎯 You've completed most recent events with these filters. Some may repeat."
+            : "🎯 You've seen most recent events. Some may repeat until new ones are added!"
+        );
+      }
+      [next, ...planRef.current] = plan.events;
+      if (!next) return;
     }
 
-    const next = finalPool[Math.floor(Math.random() * finalPool.length)];
-
     setEvent(next);
     setGuessCoords(null);
     setGuessYear('');
@@ -658,9 +674,8 @@ const modeLabel =
                 </div>
                 <div className="w-full aspect-square max-h-[80vh] overflow-hidden rounded shadow mt-[2px]">
                   <Zoom>
-                    <img
-                      src={event.image_url}
-                      alt="event"
+                    <EventImage
+                      event={event}
                       className="w-full h-full object-cover cursor-zoom-in"
                     />
                   </Zoom>
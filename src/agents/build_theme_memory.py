@@ -2,6 +2,15 @@
 
 from pathlib import Path
 import json
+import sys
+
+# ⬇️ Add the project root to Python's import path
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from src.agents.theme_memory_store import theme_memory_store
+
+# Full rebuild. insert_processed_events.py keeps the memory up to date
+# incrementally, so this is only needed to resync with the catalog.
 
 # Step 1: Locate events.json
 events_path = Path("public/data/events.json")
@@ -18,31 +27,9 @@ except Exception as e:
     print(f"❌ Failed to load events: {e}")
     exit(1)
 
-# Step 3: Group by theme and era
-grouped_memory = {}
-
-for event in all_events:
-    theme = event.get("theme", "unknown").strip().lower()
-    broad_era = event.get("broad_era", "unknown").strip().lower()
-    key = f"{theme} | {broad_era}"
-
-    if key not in grouped_memory:
-        grouped_memory[key] = []
-
-    grouped_memory[key].append({
-        "title": event["title"],
-        "year": event.get("year"),
-        "description": event.get("caption") or event.get("description", ""),
-        "slug": event.get("slug"),
-    })
-
-# Step 4: Save grouped memory
-memory_path = Path("src/agents/memory/theme_memory.json")
-memory_path.parent.mkdir(parents=True, exist_ok=True)
-
+# Step 3 + 4: Group by theme and era, then save grouped memory
 try:
-    with open(memory_path, "w", encoding="utf-8") as f:
-        json.dump(grouped_memory, f, indent=2, ensure_ascii=False)
-    print(f"✅ Memory written to {memory_path} with {len(grouped_memory)} groups.")
+    grouped_memory = theme_memory_store.replace_all(all_events)
+    print(f"✅ Memory written to {theme_memory_store.path} with {len(grouped_memory)} groups.")
 except Exception as e:
-    print(f"❌ Failed to save memory file: {e}")
\ No newline at end of file
+    print(f"❌ Failed to save memory file: {e}")
@@ -1,9 +1,9 @@
 import os
+import sys
 import json
 import re
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 from bs4 import BeautifulSoup
 import fitz  # PyMuPDF
 
@@ -17,7 +17,8 @@ archive_dir.mkdir(exist_ok=True)
 
 # === Load API ===
 load_dotenv()
-client = OpenAI(api_key=os.getenv("VITE_OPENAI_API_KEY"))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from src.utils.llm_client import chat_completion
 
 # === Select file to process ===
 files = sorted(incoming_dir.glob("*.pdf")) + sorted(incoming_dir.glob("*.html")) + sorted(incoming_dir.glob("*.txt"))
@@ -56,6 +57,9 @@ def extract_json_block(text: str) -> str:
         brace_end = text.rfind("}")
         return text[brace_start:brace_end + 1].strip() if brace_start != -1 else text
 
+def parse_json_block(text: str):
+    return json.loads(extract_json_block(text.strip()))
+
 # === Step 1: Infer document context ===
 context_prompt = f"""
 You are a curriculum analyst.
@@ -77,13 +81,13 @@ Return JSON with:
 - source: official reference if mentioned (e.g. "BO n°31 du 30 juillet 2020", or title of document)
 """
 
-resp = client.chat.completions.create(
+context_raw = extract_json_block(chat_completion(
     model="gpt-4o",
     messages=[{"role": "user", "content": context_prompt}],
     temperature=0.2,
-)
-
-context_raw = extract_json_block(resp.choices[0].message.content.strip())
+    cache=True,
+    validate=parse_json_block,
+).strip())
 
 try:
     context = json.loads(context_raw)
@@ -145,13 +149,13 @@ Return this JSON format:
 - Return valid JSON only. No commentary.
 """
 
-    theme_resp = client.chat.completions.create(
+    block = extract_json_block(chat_completion(
         model="gpt-4o",
         messages=[{"role": "user", "content": theme_prompt}],
         temperature=0.3,
-    )
-
-    block = extract_json_block(theme_resp.choices[0].message.content.strip())
+        cache=True,
+        validate=parse_json_block,
+    ).strip())
 
     try:
         parsed = json.loads(block)
@@ -1,16 +1,24 @@
 # src/agents/deduplication_agent.py
 
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
-import os
-from dotenv import load_dotenv
-from openai import OpenAI
+from src.agents.similarity_index import SimilarityIndex
+from src.agents.theme_memory_store import theme_memory_store
+from src.utils.llm_client import chat_completion
 
 # Setup
-load_dotenv()
-client = OpenAI(api_key=os.getenv("VITE_OPENAI_API_KEY"))
 MODEL = "gpt-4o"
 
+# Local prefilter: clear cases are settled without the LLM
+DUPLICATE_SIMILARITY = 0.8   # Title cosine at/above this (and same year ±1) → duplicate
+NEW_SIMILARITY = 0.25        # Best title cosine below this → new
+TOP_K_NEIGHBOURS = 5         # Neighbours shown to the LLM for ambiguous ideas
+
+# Batch mode: ambiguous ideas sharing a theme+era key go to the LLM together
+MAX_BUCKET_SIZE = 15
+BUCKET_WORKERS = 4
+
 THEME_LABELS = [
     "wars & battles", "foundational political moments", "diplomacy & international relations",
     "law & justice", "social movements & protests", "scientific & technological breakthroughs",
@@ -44,15 +52,48 @@ def infer_theme_from_text(text: str) -> str:
     matches = [theme for theme in THEME_LABELS if theme in text]
     return matches[0] if matches else "art & culture"
 
-# Load memory
-memory_path = Path("src/agents/memory/theme_memory.json")
-theme_memory = {}
-if memory_path.exists():
-    with open(memory_path, "r", encoding="utf-8") as f:
-        theme_memory = json.load(f)
+# Memory is loaded lazily and reloaded when theme_memory.json changes
+_similarity_indexes = {}
 
-def run_deduplication(idea: dict, verbose: bool = True) -> dict:
-    """Run duplicate detection for a single event idea."""
+def get_similarity_index(key: str) -> SimilarityIndex:
+    """Per theme+era index, built on first use and rebuilt after the memory changes."""
+    version = theme_memory_store.current_version()
+    cached = _similarity_indexes.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, SimilarityIndex(theme_memory_store.get(key)))
+        _similarity_indexes[key] = cached
+    return cached[1]
+
+def classify_locally(idea: dict, neighbours: list):
+    """
+    Settles clear-cut ideas from title similarity alone.
+    Returns a verdict dict, or None when the LLM should decide.
+    """
+    if not neighbours:
+        return {"status": "new", "match_title": None, "reason": "No existing events in this theme and era."}
+
+    score, best = neighbours[0]
+    if score < NEW_SIMILARITY:
+        return {
+            "status": "new",
+            "match_title": None,
+            "reason": f"Local check: closest existing title '{best['title']}' is only {score:.2f} similar.",
+        }
+
+    try:
+        same_year = abs(int(idea.get("year")) - int(best.get("year"))) <= 1
+    except (TypeError, ValueError):
+        same_year = True  # A missing year can't contradict the title match
+    if score >= DUPLICATE_SIMILARITY and same_year:
+        return {
+            "status": "duplicate",
+            "match_title": best["title"],
+            "reason": f"Local check: title is {score:.2f} similar to '{best['title']}' ({best.get('year', '?')}).",
+        }
+    return None
+
+def prepare_idea(idea: dict):
+    """Returns a copy of the idea with theme and broad era filled in, plus its memory key."""
     idea = idea.copy()  # Avoid mutating original
 
     # Ensure theme and era
@@ -64,18 +105,37 @@ def run_deduplication(idea: dict, verbose: bool = True) -> dict:
 
     theme = idea.get("theme", "unknown").lower()
     broad_era = idea.get("broad_era", "unknown")
-    key = f"{theme} | {broad_era}".lower()
-    memory_slice = theme_memory.get(key, [])
+    return idea, f"{theme} | {broad_era}".lower()
+
+def parse_model_json(content: str):
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[len("```json"):].strip()
+    if content.endswith("```"):
+        content = content[:-3].strip()
+    return json.loads(content)
+
+def run_deduplication(idea: dict, verbose: bool = True) -> dict:
+    """Run duplicate detection for a single event idea."""
+    idea, key = prepare_idea(idea)
+    memory_slice = theme_memory_store.get(key)
 
     if verbose:
         print(f"🔎 Checking: {idea['title']} → {key}")
     if not memory_slice:
         print(f"⚠️ No memory found for theme+era: {key}")
 
-    # Format memory slice
+    neighbours = get_similarity_index(key).query(idea["title"], k=TOP_K_NEIGHBOURS)
+    local_verdict = classify_locally(idea, neighbours)
+    if local_verdict:
+        if verbose:
+            print(f"⚡ Settled locally: {local_verdict['status']}")
+        return local_verdict
+
+    # Format only the nearest neighbours for the ambiguous case
     summaries = [
         f"- {e['title']} ({e.get('year', '?')}): {e.get('description', '')}"
-        for e in memory_slice
+        for _, e in neighbours
     ]
 
     # Prompt
@@ -89,7 +149,7 @@ Theme: {idea.get("theme")}
 Broad Era: {idea.get("broad_era")}
 Description: {idea.get("description")}
 
-Here are existing events in the same theme and era:
+Here are the most similar existing events in the same theme and era:
 {chr(10).join(summaries)}
 
 Please assess:
@@ -103,22 +163,17 @@ Return a JSON object with:
 - "reason": short explanation
 """.strip()
 
-    # OpenAI call
-    response = client.chat.completions.create(
+    # OpenAI call (cached once it parses)
+    content = chat_completion(
         model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
-    )
-
-    content = response.choices[0].message.content.strip()
+        cache=True,
+        validate=parse_model_json,
+    ).strip()
 
     try:
-        if content.startswith("```json"):
-            content = content[len("```json"):].strip()
-        if content.endswith("```"):
-            content = content[:-3].strip()
-        result = json.loads(content)
-        return result
+        return parse_model_json(content)
     except Exception as e:
         print("❌ Failed to parse model response:", e)
         print("Raw output:\n", content)
@@ -134,22 +189,131 @@ if __name__ == "__main__":
     result = run_deduplication(test_idea)
     print(json.dumps(result, indent=2, ensure_ascii=False))
 
-def run_batch_deduplication(ideas: list, save_to_file: bool = False) -> list:
-    results = []
-    for idea in ideas:
-        result = run_deduplication(idea, verbose=False)
-        enriched = {
-            "title": idea.get("title"),
-            "status": result.get("status"),
-            "match_title": result.get("match_title"),
-            "reason": result.get("reason")
-        }
-        results.append(enriched)
+def deduplicate_bucket(key: str, bucket: list) -> dict:
+    """
+    One LLM request for several ambiguous ideas sharing a theme+era key.
+    `bucket` holds (position, idea, neighbours); returns {position: verdict}.
+    """
+    existing = {}
+    for _, _, neighbours in bucket:
+        for _, e in neighbours:
+            existing.setdefault(e["title"], e)
+    summaries = [
+        f"- {e['title']} ({e.get('year', '?')}): {e.get('description', '')}"
+        for e in existing.values()
+    ]
+    proposals = [
+        f"{i}. Title: {idea['title']} | Year: {idea.get('year')} | Description: {idea.get('description')}"
+        for i, (_, idea, _) in enumerate(bucket)
+    ]
+
+    prompt = f"""
+You are an assistant tasked with detecting duplicates in a historical events database.
+
+Theme and era: {key}
+
+Here are the most similar existing events in this theme and era:
+{chr(10).join(summaries)}
+
+Here are the new proposed events, numbered:
+{chr(10).join(proposals)}
+
+For each proposed event, assess:
+- Is it a duplicate of any listed existing event (same meaning)?
+- Is it a variant (different title, but highly overlapping)?
+- Or is it entirely new?
+
+Return a JSON array with one object per proposed event:
+- "index": the proposed event's number
+- "status": one of ["duplicate", "variant", "new"]
+- "match_title": existing title it overlaps with, or null
+- "reason": short explanation
+""".strip()
+
+    content = chat_completion(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+        cache=True,
+        validate=lambda c: [int(v["index"]) for v in parse_model_json(c)],
+    ).strip()
+
+    try:
+        verdicts = {int(v["index"]): v for v in parse_model_json(content)}
+    except Exception as e:
+        print(f"❌ Failed to parse bucket response for {key}: {e}")
+        verdicts = {}
+
+    results = {}
+    for i, (position, idea, _) in enumerate(bucket):
+        if i in verdicts:
+            results[position] = verdicts[i]
+        else:
+            # Missing or unparseable verdict: fall back to a single-idea check
+            results[position] = run_deduplication(idea, verbose=False)
+    return results
+
+def _as_result(idea: dict, verdict: dict) -> dict:
+    return {
+        "title": idea.get("title"),
+        "status": verdict.get("status"),
+        "match_title": verdict.get("match_title"),
+        "reason": verdict.get("reason")
+    }
+
+def iter_deduplication(ideas: list, max_workers: int = BUCKET_WORKERS):
+    """
+    Yields (position, result) for every idea as soon as its verdict is known:
+    local verdicts first, then each LLM bucket as it completes. A bucket
+    that fails yields "error" results for its ideas; the others still run.
+    """
+    buckets = {}
+
+    # Settle clear cases locally; group the rest by memory key
+    settled = 0
+    for position, raw_idea in enumerate(ideas):
+        idea, key = prepare_idea(raw_idea)
+        neighbours = get_similarity_index(key).query(idea["title"], k=TOP_K_NEIGHBOURS)
+        local_verdict = classify_locally(idea, neighbours)
+        if local_verdict:
+            settled += 1
+            yield position, _as_result(raw_idea, local_verdict)
+        else:
+            buckets.setdefault(key, []).append((position, idea, neighbours))
+
+    requests = [
+        (key, bucket[i:i + MAX_BUCKET_SIZE])
+        for key, bucket in buckets.items()
+        for i in range(0, len(bucket), MAX_BUCKET_SIZE)
+    ]
+    print(f"🤖 Deduplicating {len(ideas)} ideas: {settled} settled locally, "
+          f"{len(ideas) - settled} sent to the LLM in {len(requests)} requests")
+    if not requests:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(deduplicate_bucket, *request): request for request in requests}
+        for future in as_completed(futures):
+            _, bucket = futures[future]
+            try:
+                bucket_verdicts = future.result()
+            except Exception as e:
+                print(f"❌ Deduplication bucket failed: {e}")
+                bucket_verdicts = {position: {"status": "error", "reason": str(e)} for position, _, _ in bucket}
+            for position, _, _ in bucket:
+                yield position, _as_result(ideas[position], bucket_verdicts[position])
+
+def run_batch_deduplication(ideas: list, save_to_file: bool = False, max_workers: int = BUCKET_WORKERS) -> list:
+    verdicts = dict(iter_deduplication(ideas, max_workers))
+    results = [verdicts[position] for position in range(len(ideas))]
 
     if save_to_file:
-        output_path = Path("src/moderation/idea_deduplication_results.json")
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        print(f"📄 Deduplication results saved to: {output_path}")
+        save_deduplication_results(results)
+
+    return results
 
-    return results
\ No newline at end of file
+def save_deduplication_results(results: list):
+    output_path = Path("src/moderation/idea_deduplication_results.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"📄 Deduplication results saved to: {output_path}")
\ No newline at end of file
@@ -0,0 +1,79 @@
+# src/agents/similarity_index.py
+
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+NGRAM_MIN = 3
+NGRAM_MAX = 5
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation so n-grams compare like with like."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+def char_ngrams(text: str) -> Counter:
+    """Word-bounded character n-grams (like scikit-learn's `char_wb` analyzer)."""
+    grams = Counter()
+    for word in normalize_text(text).split():
+        padded = f" {word} "
+        for n in range(NGRAM_MIN, NGRAM_MAX + 1):
+            for i in range(len(padded) - n + 1):
+                grams[padded[i:i + n]] += 1
+    return grams
+
+class SimilarityIndex:
+    """
+    TF-IDF over character n-grams of event titles, held as a dense,
+    L2-normalised NumPy matrix. Cosine similarity of a query against every
+    entry is one matrix-vector product.
+    """
+
+    def __init__(self, entries: list):
+        self.entries = entries
+        docs = [char_ngrams(e.get("title", "")) for e in entries]
+
+        self.vocab = {}
+        for doc in docs:
+            for gram in doc:
+                self.vocab.setdefault(gram, len(self.vocab))
+
+        n_docs = len(docs)
+        df = np.zeros(len(self.vocab))
+        for doc in docs:
+            df[[self.vocab[g] for g in doc]] += 1
+        self.idf = np.log((1 + n_docs) / (1 + df)) + 1
+        self.unseen_idf = np.log(1 + n_docs) + 1  # idf of an n-gram no entry contains
+
+        self.matrix = np.zeros((n_docs, len(self.vocab)))
+        for row, doc in enumerate(docs):
+            for gram, count in doc.items():
+                j = self.vocab[gram]
+                self.matrix[row, j] = (1 + np.log(count)) * self.idf[j]
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.where(norms == 0, 1, norms)
+
+    def _vectorize(self, text: str):
+        vector = np.zeros(len(self.vocab))
+        unseen_sq = 0.0
+        for gram, count in char_ngrams(text).items():
+            weight = 1 + np.log(count)
+            j = self.vocab.get(gram)
+            if j is None:
+                # Not in the vocabulary, but it still counts towards the query's norm
+                unseen_sq += (weight * self.unseen_idf) ** 2
+            else:
+                vector[j] = weight * self.idf[j]
+        norm = np.sqrt(vector @ vector + unseen_sq)
+        return vector / norm if norm else vector
+
+    def query(self, text: str, k: int = 5) -> list:
+        """Returns up to k (score, entry) pairs, most similar first."""
+        if not self.entries:
+            return []
+        scores = self.matrix @ self._vectorize(text)
+        top = np.argsort(-scores)[:k]
+        return [(float(scores[i]), self.entries[i]) for i in top]
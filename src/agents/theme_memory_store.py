@@ -0,0 +1,147 @@
+# src/agents/theme_memory_store.py
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# --- Paths
+project_root = Path(__file__).resolve().parent.parent.parent
+MEMORY_PATH = project_root / "src/agents/memory/theme_memory.json"
+
+# --- Grouping
+
+def memory_key(event: dict) -> str:
+    theme = (event.get("theme") or "unknown").strip().lower()
+    broad_era = (event.get("broad_era") or "unknown").strip().lower()
+    return f"{theme} | {broad_era}"
+
+def memory_entry(event: dict) -> dict:
+    return {
+        "title": event["title"],
+        "year": event.get("year"),
+        "description": event.get("caption") or event.get("description", ""),
+        "slug": event.get("slug"),
+    }
+
+def group_events(events) -> dict:
+    """Groups catalog events into {"theme | broad_era": [entry, ...]}."""
+    grouped = {}
+    for event in events:
+        grouped.setdefault(memory_key(event), []).append(memory_entry(event))
+    return grouped
+
+# --- Store
+
+class ThemeMemoryStore:
+    """
+    Theme memory loaded on first use and reloaded whenever the file on disk
+    changes, so a long-running server picks up rebuilds and incremental
+    updates without a restart. `version` increases on every reload or write;
+    callers caching derived data (e.g. similarity indexes) compare against it.
+    """
+
+    def __init__(self, path=MEMORY_PATH):
+        self.path = Path(path)
+        self.version = 0
+        self._memory = {}
+        self._mtime_ns = None
+        self._lock = threading.RLock()
+
+    def _refresh(self):
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns:
+            return
+        if mtime_ns is None:
+            self._memory = {}
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._memory = json.load(f)
+        self._mtime_ns = mtime_ns
+        self.version += 1
+
+    def load(self) -> dict:
+        """Returns the current memory, reloading it if the file changed."""
+        with self._lock:
+            self._refresh()
+            return self._memory
+
+    def get(self, key: str) -> list:
+        return self.load().get(key, [])
+
+    def current_version(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self.version
+
+    @contextmanager
+    def _locked_update(self):
+        """
+        Yields the memory under an exclusive file lock and writes it back
+        atomically, so concurrent writers (a rebuild and an insert run)
+        never lose each other's changes.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                memory = {key: list(entries) for key, entries in self._memory.items()}
+                yield memory
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(memory, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._memory = memory
+                self._mtime_ns = self.path.stat().st_mtime_ns
+                self.version += 1
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add_events(self, events) -> int:
+        """
+        Adds or replaces events (matched by slug, falling back to title).
+        An event whose theme or era changed moves to its new group.
+        """
+        events = [e for e in events if e.get("title")]
+        if not events:
+            return 0
+        incoming = {e.get("slug") or e["title"] for e in events}
+
+        with self._locked_update() as memory:
+            for key in list(memory):
+                memory[key] = [e for e in memory[key] if (e.get("slug") or e["title"]) not in incoming]
+                if not memory[key]:
+                    del memory[key]
+            for key, entries in group_events(events).items():
+                memory.setdefault(key, []).extend(entries)
+        return len(events)
+
+    def remove_events(self, slugs) -> int:
+        """Drops events by slug. Returns how many entries were removed."""
+        slugs = set(slugs)
+        removed = 0
+        with self._locked_update() as memory:
+            for key in list(memory):
+                kept = [e for e in memory[key] if e.get("slug") not in slugs]
+                removed += len(memory[key]) - len(kept)
+                if kept:
+                    memory[key] = kept
+                else:
+                    del memory[key]
+        return removed
+
+    def replace_all(self, events) -> dict:
+        """Full rebuild from a complete catalog."""
+        grouped = group_events(events)
+        with self._locked_update() as memory:
+            memory.clear()
+            memory.update(grouped)
+        return grouped
+
+theme_memory_store = ThemeMemoryStore()
@@ -0,0 +1,60 @@
+// EventImage.jsx
+import { useEffect, useState } from "react";
+
+// Variants come from src/scripts/build_image_derivatives.py via event.image_variants
+const FORMAT_TYPES = { avif: "image/avif", webp: "image/webp", jpg: "image/jpeg" };
+
+// The clue image takes half of a 90vw grid on large screens, the full width below
+const DEFAULT_SIZES = "(min-width: 1024px) 45vw, 90vw";
+
+const toSrcSet = (variants) => variants.map((v) => `${v.url} ${v.width}w`).join(", ");
+
+// Warms the browser cache with the variant <EventImage> will pick (WebP is
+// near-universal; <source> negotiation is not available to new Image())
+export function prefetchEventImage(event, sizes = DEFAULT_SIZES) {
+  const variants = event.image_variants?.sources?.webp || event.image_variants?.sources?.jpg;
+  const img = new Image();
+  if (variants?.length) {
+    img.sizes = sizes;
+    img.srcset = toSrcSet(variants);
+  }
+  img.src = event.image_url;
+}
+
+export default function EventImage({ event, sizes = DEFAULT_SIZES, className = "", alt = "event" }) {
+  const [loaded, setLoaded] = useState(false);
+  const image = event.image_variants;
+
+  useEffect(() => {
+    setLoaded(false);
+  }, [event.slug]);
+
+  // Events without derivatives keep the original image
+  if (!image?.sources) {
+    return <img src={event.image_url} alt={alt} className={className} />;
+  }
+
+  // Browsers pick the first <source> type they support, so list the smallest formats first
+  const formats = Object.keys(FORMAT_TYPES).filter((fmt) => image.sources[fmt]?.length);
+
+  return (
+    <picture>
+      {formats.map((fmt) => (
+        <source key={fmt} type={FORMAT_TYPES[fmt]} srcSet={toSrcSet(image.sources[fmt])} sizes={sizes} />
+      ))}
+      <img
+        src={event.image_url}
+        alt={alt}
+        width={image.width}
+        height={image.height}
+        onLoad={() => setLoaded(true)}
+        className={className}
+        style={
+          loaded || !image.placeholder
+            ? undefined
+            : { backgroundImage: `url(${image.placeholder})`, backgroundSize: "cover", backgroundPosition: "center" }
+        }
+      />
+    </picture>
+  );
+}
@@ -161,7 +161,17 @@ export function useSession({
       };
   
       const { error } = await supabase.from('sessions').update(sessionData).eq('id', sessionId);
-      if (error) logSupabaseError('Final session update failed', error);
+      if (error) {
+        logSupabaseError('Final session update failed', error);
+      } else {
+        // Fold the finished session into the player's stats rollup (fire-and-forget)
+        const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+        fetch(`${API_BASE}/api/session-finalized`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ session_id: sessionId }),
+        }).catch(err => console.warn('⚠️ Failed to update player stats rollup:', err));
+      }
   
       localStorage.setItem('sessionId', sessionId);
       sessionStorage.setItem('sessionId', sessionId);
@@ -28,6 +28,7 @@ export default function IdeaModerationPanel() {
   const [acceptedIdeas, setAcceptedIdeas] = useState([]);
   const [rejectedIdeas, setRejectedIdeas] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [verdicts, setVerdicts] = useState({}); // idea index → dedup verdict
 
   const [mode, setMode] = useState("filters"); // "filters" or "curriculum"
   const [curriculumProfiles, setCurriculumProfiles] = useState({});
@@ -36,6 +37,7 @@ export default function IdeaModerationPanel() {
   const handleModeSwitch = (newMode) => {
     setMode(newMode);
     setIdeas([]);
+    setVerdicts({});
     setAcceptedIdeas([]);
     setRejectedIdeas([]);
   };
@@ -82,20 +84,56 @@ export default function IdeaModerationPanel() {
   
     console.log("🔍 Sending payload:", payload);
   
+    setIdeas([]);
+    setVerdicts({});
+    setAcceptedIdeas([]);
+    setRejectedIdeas([]);
+
+    // Stream ideas and dedup verdicts as they arrive (Server-Sent Events over fetch)
+    const handleEvent = (event, data) => {
+      if (event === "idea") {
+        const { index, ...idea } = data;
+        setIdeas(prev => [...prev, idea]);
+      } else if (event === "verdict") {
+        const { index, ...verdict } = data;
+        setVerdicts(prev => ({ ...prev, [index]: verdict }));
+      } else if (event === "summary") {
+        // Later themes may have added levels to ideas already shown; update them in place
+        // so accepted/rejected selections (compared by reference) still match.
+        setIdeas(prev => prev.map((idea, i) => Object.assign(idea, data.ideas[i] || {})));
+      } else if (event === "error") {
+        console.error("❌ Error generating ideas:", data.error);
+        alert("❌ Failed to generate ideas. See console for details.");
+      }
+    };
+
     try {
-      const response = await axios.post(`${API_BASE}/api/generate-ideas`, payload);
-  
-      // ✅ Defensive check: ensure it's an array
-      if (!Array.isArray(response.data)) {
-        console.error("❌ Unexpected response format:", response.data);
-        alert("❌ The server did not return a valid list of ideas.");
-        setIdeas([]);
-        return;
+      const response = await fetch(`${API_BASE}/api/generate-ideas/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(payload),
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`Server responded with ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          const event = block.match(/^event: (.*)$/m)?.[1];
+          const data = block.match(/^data: (.*)$/m)?.[1];
+          if (event && data) handleEvent(event, JSON.parse(data));
+        }
       }
-  
-      setIdeas(response.data);
-      setAcceptedIdeas([]);
-      setRejectedIdeas([]);
     } catch (error) {
       console.error("❌ Error generating ideas:", error);
       alert("❌ Failed to generate ideas. See console for details.");
@@ -186,11 +224,12 @@ export default function IdeaModerationPanel() {
                 className="border px-3 py-2 rounded text-sm"
               >
                 <option value="">—</option>
-                {curriculumProfiles[curriculumCountry]?.map((lvl) => (
-                  <option key={lvl} value={lvl}>
-                    {lvl
+                {curriculumProfiles[curriculumCountry]?.map(({ level, event_count }) => (
+                  <option key={level} value={level}>
+                    {level
                       .replace(/_/g, " ")
                       .replace(/\b\w/g, (l) => l.toUpperCase())}
+                    {` (${event_count} events)`}
                   </option>
                 ))}
               </select>
@@ -317,6 +356,15 @@ export default function IdeaModerationPanel() {
                       Already exists
                     </span>
                   )}
+                  {verdicts[idx] && (
+                    <span
+                      className="text-xs bg-yellow-100 text-yellow-800 px-2 py-0.5 rounded"
+                      title={verdicts[idx].reason || ""}
+                    >
+                      {verdicts[idx].status}
+                      {verdicts[idx].match_title ? ` · ${verdicts[idx].match_title}` : ""}
+                    </span>
+                  )}
                 </div>
               </div>
 
@@ -5,15 +5,16 @@ from pathlib import Path
 from dotenv import load_dotenv
 import json
 import os
-import openai
-import pandas as pd
 import argparse
-from openai import OpenAI
 from datetime import datetime
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.data.curriculum_profiles import curriculum_profiles
 from textwrap import dedent
-from src.agents.deduplication_agent import run_batch_deduplication
+from src.agents.deduplication_agent import run_batch_deduplication, iter_deduplication, save_deduplication_results
+from src.moderation.idea_log import append_batch
+from src.moderation.title_index import title_index
+from src.utils import llm_client
+from src.utils.llm_client import chat_completion
 
 
 # Setup paths and environment
@@ -21,21 +22,19 @@ project_root = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(project_root))
 load_dotenv(dotenv_path=project_root / ".env")
 
-# OpenAI client setup
-client = OpenAI(api_key=os.getenv("VITE_OPENAI_API_KEY"))
+# Model used for curriculum and enrichment calls (requests go through src.utils.llm_client)
 MODEL = "gpt-4o"
-
-INPUT_CSV = project_root / "src/scripts/event_titles.csv"
-OUTPUT_JSON = project_root / "src/moderation/generated_ideas.json"
-ARCHIVE_DIR = project_root / "src/moderation/archive"
+CURRICULUM_WORKERS = int(os.getenv("CURRICULUM_WORKERS", "6"))  # Concurrent theme calls
 
 def normalize_title(title: str) -> str:
     """Basic title normalization for deduplication."""
     return title.strip().lower().replace("’", "'").replace("“", "\"").replace("”", "\"")
 
 # ========== FILTER-BASED MODE ==========
-def generate_ideas_with_filters(filters: dict, count: int = 10):
-    existing_titles = pd.read_csv(INPUT_CSV)["title"].dropna().tolist()
+def request_filter_ideas(filters: dict, count: int = 10) -> list:
+    """One GPT call for filter-based ideas; returns the idea payloads (not yet saved)."""
+    # Existing titles in the requested slice only, capped by a token budget
+    existing_titles = title_index.relevant_titles(filters)
 
     scope_description = "\n".join([
         f"- Theme: {', '.join(filters['themes'])}" if filters.get("themes") else "",
@@ -51,8 +50,8 @@ Each event must be unique and **not redundant** with existing entries.
 Only generate events that match ALL of the following criteria:
 {scope_description}
 
-Here are existing titles to avoid repeating:
-{json.dumps(existing_titles[:200])}
+Here are existing titles in this scope to avoid repeating:
+{json.dumps(existing_titles, ensure_ascii=False)}
 
 Now propose {count} new plausible historical events (real, famous or niche), each formatted as a single string title.
 Only return a raw JSON array like:
@@ -64,14 +63,14 @@ Only return a raw JSON array like:
 
     print("🔍 Generating filter-based ideas with:", filters)
 
-    response = client.chat.completions.create(
+    raw = chat_completion(
         model="gpt-4",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
     )
 
     try:
-        raw = response.choices[0].message.content.strip()
+        raw = raw.strip()
         if raw.startswith("```"):
             raw = raw.split("```")[-2].strip()
         ideas = json.loads(raw)
@@ -83,6 +82,10 @@ Only return a raw JSON array like:
         {"title": title, "mode": "filters", "source": "filtered_generation", "created_at": datetime.utcnow().isoformat()}
         for title in ideas
     ]
+    return ideas_payload
+
+def generate_ideas_with_filters(filters: dict, count: int = 10):
+    ideas_payload = request_filter_ideas(filters, count)
     save_ideas(ideas_payload)
 
     # Run deduplication for just-saved ideas
@@ -94,30 +97,129 @@ Only return a raw JSON array like:
 
 
 # ========== CURRICULUM-BASED MODE ==========
-from openai import OpenAI
-import json
-from src.data.curriculum_profiles import curriculum_profiles
+def generate_theme_ideas(theme: dict, persona: str, label: str, per_theme_count: int) -> list:
+    """One GPT call for a single curriculum theme. Returns [] if it fails."""
+    theme_label = theme["label"]
+    objective = theme["objective"]
+    level = theme["level"]
+
+    prompt = dedent(f"""
+    {persona}
+    You are preparing a history lesson for students in level {level} using the curriculum: "{label}".
+
+    Theme: {theme_label}
+    Objective: {objective}
+
+    Generate up to {per_theme_count} historically significant events that:
+    - Are real (no fictional events)
+    - Are dateable (single integer year)
+    - Match this theme and learning objective
+    - Are useful in an educational game
+
+    Return valid JSON like:
+    [
+      {{
+        "title": "...",
+        "year": ...,
+        "description": "..."
+      }},
+      ...
+    ]
 
-client = OpenAI(api_key=os.getenv("VITE_OPENAI_API_KEY"))
+    ⚠️ Do not include commentary or formatting. Output only the JSON array.
+    """).strip()
 
-def generate_ideas_from_curriculum(country: str, curriculum_key_fragment: str, count: int = 10):
+    print(f"\n🎓 Generating for theme: {theme_label} [{level}]")
+
+    content = ""
     try:
-        key = f"{country.lower()}_{curriculum_key_fragment}"
-        profile = curriculum_profiles.get(key)
+        content = chat_completion(
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.6,
+        ).strip()
+        if content.startswith("```json"):
+            content = content[len("```json"):].strip()
+        if content.endswith("```"):
+            content = content[:-3].strip()
+
+        ideas = json.loads(content)
+        if not isinstance(ideas, list):
+            raise ValueError("GPT returned unexpected format")
+        return ideas
 
-        if not profile:
-            raise ValueError(f"❌ No curriculum found for {key}")
+    except Exception as e:
+        print(f"❌ Failed to parse or generate ideas for theme: {theme_label}")
+        print("GPT raw response:\n", content)
+        return []  # Other themes still go through
+
+def merge_theme_ideas(merged: dict, theme: dict, ideas: list, key: str, language: str) -> list:
+    """
+    Folds one theme's ideas into `merged` ((normalized title, year) → entry).
+    Ideas already proposed by another theme gain this theme's level and id;
+    returns the entries that are new.
+    """
+    theme_id = theme["id"]
+    level = theme["level"]
+    new_entries = []
+
+    for idea in ideas:
+        merge_key = (normalize_title(idea["title"]), idea.get("year"))
+        found = merged.get(merge_key)
+
+        if found:
+            if level not in found["levels"]:
+                found["levels"].append(level)
+            if theme_id not in found["curriculum_theme_ids"]:
+                found["curriculum_theme_ids"].append(theme_id)
+            if key not in found["curriculum_tags"]:
+                found["curriculum_tags"].append(key)
+        else:
+            entry = {
+                "title": idea["title"],
+                "year": idea.get("year"),
+                "description": idea.get("description"),
+                "theme": theme["label"],
+                "objective": theme["objective"],
+                "levels": [level],
+                "curriculum_theme_ids": [theme_id],
+                "curriculum_tags": [key],
+                "language": language,
+                "mode": "curriculum",
+                "source": "curriculum_generation",
+                "created_at": datetime.utcnow().isoformat()
+            }
+            merged[merge_key] = entry
+            new_entries.append(entry)
+    return new_entries
+
+def load_curriculum(country: str, curriculum_key_fragment: str, count: int) -> dict:
+    key = f"{country.lower()}_{curriculum_key_fragment}"
+    profile = curriculum_profiles.get(key)
+
+    if not profile:
+        raise ValueError(f"❌ No curriculum found for {key}")
+
+    themes = profile.get("themes", [])
+    return {
+        "key": key,
+        "persona": profile.get("default_persona", "You are a history teacher."),
+        "label": profile.get("label", f"{country.upper()} {curriculum_key_fragment}"),
+        "themes": themes,
+        "language": profile.get("language", "en"),
+        # Determine per-theme cap
+        "per_theme_count": max(1, count // len(themes)) if themes else 3,
+    }
 
-        persona = profile.get("default_persona", "You are a history teacher.")
-        label = profile.get("label", f"{country.upper()} {curriculum_key_fragment}")
-        themes = profile.get("themes", [])
-        language = profile.get("language", "en")
+def generate_ideas_from_curriculum(country: str, curriculum_key_fragment: str, count: int = 10):
+    try:
+        curriculum = load_curriculum(country, curriculum_key_fragment, count)
+        key, label, themes = curriculum["key"], curriculum["label"], curriculum["themes"]
+        persona, language = curriculum["persona"], curriculum["language"]
+        per_theme_count = curriculum["per_theme_count"]
 
         print(f"📚 Generating ideas for curriculum: {label} ({key})")
 
-        # Determine per-theme cap
-        per_theme_count = max(1, count // len(themes)) if themes else 3
-
         # Load existing events
         events_path = project_root / "public/data/events.json"
         try:
@@ -130,92 +232,15 @@ def generate_ideas_from_curriculum(country: str, curriculum_key_fragment: str, c
         updated_existing_events = False
         all_new_ideas = []
 
-        for theme in themes:
-            theme_id = theme["id"]
-            theme_label = theme["label"]
-            objective = theme["objective"]
-            level = theme["level"]
-
-            prompt = dedent(f"""
-            {persona}
-            You are preparing a history lesson for students in level {level} using the curriculum: "{label}".
-
-            Theme: {theme_label}
-            Objective: {objective}
-
-            Generate up to {per_theme_count} historically significant events that:
-            - Are real (no fictional events)
-            - Are dateable (single integer year)
-            - Match this theme and learning objective
-            - Are useful in an educational game
-
-            Return valid JSON like:
-            [
-              {{
-                "title": "...",
-                "year": ...,
-                "description": "..."
-              }},
-              ...
-            ]
-
-            ⚠️ Do not include commentary or formatting. Output only the JSON array.
-            """).strip()
-
-            print(f"\n🎓 Generating for theme: {theme_label} [{level}]")
-
-            try:
-                response = client.chat.completions.create(
-                    model=MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.6,
-                )
-                content = response.choices[0].message.content.strip()
-                if content.startswith("```json"):
-                    content = content[len("```json"):].strip()
-                if content.endswith("```"):
-                    content = content[:-3].strip()
-
-                ideas = json.loads(content)
-                if not isinstance(ideas, list):
-                    raise ValueError("GPT returned unexpected format")
-
-            except Exception as e:
-                print(f"❌ Failed to parse or generate ideas for theme: {theme_label}")
-                print("GPT raw response:\n", content)
-                continue  # Move on to next theme
-
-            for idea in ideas:
-                norm_title = normalize_title(idea["title"])
-                found = next(
-                    (idea for idea in all_new_ideas
-                    if normalize_title(idea["title"]) == norm_title and idea.get("year") == idea.get("year")),
-                    None
-                )
-
-                if found:
-                    if level not in found["levels"]:
-                        found["levels"].append(level)
-                    if theme_id not in found["curriculum_theme_ids"]:
-                        found["curriculum_theme_ids"].append(theme_id)
-                    if key not in found["curriculum_tags"]:
-                        found["curriculum_tags"].append(key)
-                else:
-                    entry = {
-                        "title": idea["title"],
-                        "year": idea.get("year"),
-                        "description": idea.get("description"),
-                        "theme": theme_label,
-                        "objective": objective,
-                        "levels": [level],
-                        "curriculum_theme_ids": [theme_id],
-                        "curriculum_tags": [key],
-                        "language": language,
-                        "mode": "curriculum",
-                        "source": "curriculum_generation",
-                        "created_at": datetime.utcnow().isoformat()
-                    }
-                    all_new_ideas.append(entry)
+        # One GPT call per theme, run concurrently; map() keeps curriculum order
+        with ThreadPoolExecutor(max_workers=CURRICULUM_WORKERS) as pool:
+            theme_results = list(pool.map(
+                lambda theme: generate_theme_ideas(theme, persona, label, per_theme_count), themes
+            ))
+
+        merged = {}  # (normalized title, year) → entry
+        for theme, ideas in zip(themes, theme_results):
+            all_new_ideas.extend(merge_theme_ideas(merged, theme, ideas, key, language))
 
         if all_new_ideas:
             save_ideas(all_new_ideas)
@@ -233,6 +258,89 @@ def generate_ideas_from_curriculum(country: str, curriculum_key_fragment: str, c
         print("❌ Error during curriculum idea generation:", e)
         return []
 
+# ========== STREAMING MODE ==========
+# Generators of (event, data) pairs for the /api/generate-ideas/stream endpoint:
+# "idea" as soon as it is generated, "verdict" as its dedup check finishes,
+# then one "summary". Every idea carries an index that its verdict refers to.
+# Ideas and verdicts are saved in a finally block, so a client that
+# disconnects mid-stream loses nothing that was already generated.
+
+def deduplicate_stream(ideas: list, offset: int = 0):
+    """(index, verdict) pairs as each dedup bucket completes; indices start at `offset`."""
+    done = set()
+    try:
+        for position, verdict in iter_deduplication(ideas):
+            done.add(position)
+            yield offset + position, verdict
+    except Exception as e:
+        print("❌ Deduplication failed:", e)
+        for position, idea in enumerate(ideas):
+            if position not in done:
+                yield offset + position, {"title": idea.get("title"), "status": "error", "match_title": None, "reason": str(e)}
+
+def ordered_verdicts(ideas: list, verdicts: dict) -> list:
+    unchecked = {"status": "unchecked", "match_title": None, "reason": None}
+    return [verdicts.get(i) or {"title": idea.get("title"), **unchecked} for i, idea in enumerate(ideas)]
+
+def save_stream_results(ideas: list, verdicts: dict):
+    if ideas:
+        save_ideas(ideas)
+        save_deduplication_results(ordered_verdicts(ideas, verdicts))
+
+def summarize_stream(ideas: list, verdicts: dict) -> dict:
+    status_counts = {}
+    for verdict in ordered_verdicts(ideas, verdicts):
+        status = verdict.get("status") or "unknown"
+        status_counts[status] = status_counts.get(status, 0) + 1
+    return {"count": len(ideas), "status_counts": status_counts, "ideas": ideas}
+
+def stream_ideas_with_filters(filters: dict, count: int = 10):
+    ideas = request_filter_ideas(filters, count)
+    verdicts = {}
+    try:
+        for index, idea in enumerate(ideas):
+            yield "idea", {"index": index, **idea}
+
+        for index, verdict in deduplicate_stream(ideas):
+            verdicts[index] = verdict
+            yield "verdict", {"index": index, **verdict}
+
+        yield "summary", summarize_stream(ideas, verdicts)
+    finally:
+        save_stream_results(ideas, verdicts)
+
+def stream_ideas_from_curriculum(country: str, curriculum_key_fragment: str, count: int = 10):
+    curriculum = load_curriculum(country, curriculum_key_fragment, count)
+    key, themes = curriculum["key"], curriculum["themes"]
+    print(f"📚 Streaming ideas for curriculum: {curriculum['label']} ({key})")
+
+    merged = {}
+    all_new_ideas = []
+    verdicts = {}
+
+    try:
+        with ThreadPoolExecutor(max_workers=CURRICULUM_WORKERS) as theme_pool:
+            theme_futures = {
+                theme_pool.submit(generate_theme_ideas, theme, curriculum["persona"], curriculum["label"], curriculum["per_theme_count"]): theme
+                for theme in themes
+            }
+            # Themes in completion order; each theme's dedup buckets report as they finish
+            for future in as_completed(theme_futures):
+                theme = theme_futures[future]
+                # Ideas from later themes that repeat an earlier one only add levels/ids (see summary)
+                new_entries = merge_theme_ideas(merged, theme, future.result(), key, curriculum["language"])
+                offset = len(all_new_ideas)
+                all_new_ideas.extend(new_entries)
+                for index, entry in enumerate(new_entries, offset):
+                    yield "idea", {"index": index, **entry}
+                for index, verdict in deduplicate_stream(new_entries, offset):
+                    verdicts[index] = verdict
+                    yield "verdict", {"index": index, **verdict}
+
+        yield "summary", summarize_stream(all_new_ideas, verdicts)
+    finally:
+        save_stream_results(all_new_ideas, verdicts)
+
 # ========== ENRICH EXISTING TITLES ==========
 def enrich_existing_titles(idea_titles: list):
     prompt = f"""
@@ -268,13 +376,11 @@ Here are the titles:
 
     print("✍️ Enriching manually provided titles...")
 
-    response = client.chat.completions.create(
+    content = chat_completion(
         model=MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.5,
-    )
-
-    content = response.choices[0].message.content.strip()
+    ).strip()
     if content.startswith("```json"):
         content = content[len("```json"):].strip()
     if content.endswith("```"):
@@ -288,24 +394,9 @@ Here are the titles:
 
 # ========== SHARED SAVE LOGIC ==========
 def save_ideas(new_ideas):
-    try:
-        with open(OUTPUT_JSON, "r", encoding="utf-8") as f:
-            existing = json.load(f)
-    except:
-        existing = []
-
-    all_ideas = existing + new_ideas
-
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(all_ideas, f, indent=2, ensure_ascii=False)
-
-    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    archive_path = ARCHIVE_DIR / f"generated_ideas_{timestamp}.json"
-    shutil.copy(OUTPUT_JSON, archive_path)
-
-    print(f"✅ Saved {len(new_ideas)} ideas to {OUTPUT_JSON}")
-    print(f"🗂️ Archived snapshot to {archive_path}")
+    # One delta record per batch in the append-only idea log (see src/moderation/idea_log.py)
+    entry = append_batch("generated", new_ideas)
+    print(f"✅ Logged {entry['count']} ideas as batch {entry['batch_id']} in idea_log/{entry['segment']}")
 
 
 # ========== CLI Entry Point ==========
@@ -322,9 +413,13 @@ if __name__ == "__main__":
     parser.add_argument("--region", nargs="*")
 
     parser.add_argument("--pending_file", type=str, help="Path to JSON file with list of event titles to enrich")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API instead of replaying cached responses")
 
     args = parser.parse_args()
 
+    if args.no_cache:
+        llm_client.CACHE_BYPASS = True
+
     if args.pending_file:
         # Import and use the enrichment function you added
         with open(args.pending_file, "r", encoding="utf-8") as f:
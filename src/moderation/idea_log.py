@@ -0,0 +1,328 @@
+# src/moderation/idea_log.py
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+LOG_DIR = project_root / "src/moderation/idea_log"
+RETENTION_DAYS = int(os.getenv("IDEA_LOG_RETENTION_DAYS", "365"))
+INDEX_NAME = "index.json"   # Per-segment idea counts, see segment_counts()
+
+_lock = threading.Lock()
+
+# --- Writing
+
+def segment_path(when: datetime, log_dir=LOG_DIR) -> Path:
+    """One gzip segment per month, e.g. idea_log/2025-05.jsonl.gz."""
+    return log_dir / f"{when:%Y-%m}.jsonl.gz"
+
+def append_batch(kind: str, ideas: list, log_dir=LOG_DIR, logged_at: datetime = None, **meta) -> dict:
+    """
+    Appends one batch as a delta record (only the ideas in this batch) to
+    the current month's segment (or `logged_at`'s, for imports). Each append
+    is its own gzip member, so it costs O(batch size) no matter how large
+    the log has grown.
+    """
+    now = logged_at or datetime.now()
+    record = {
+        "batch_id": uuid.uuid4().hex,
+        "kind": kind,  # "generated" or "accepted"
+        "logged_at": now.isoformat(),
+        "count": len(ideas),
+        **meta,
+        "ideas": ideas,
+    }
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    path = segment_path(now, log_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        with open(path, "ab") as f:
+            f.write(gzip.compress(line))
+            f.flush()
+            os.fsync(f.fileno())
+    return {"batch_id": record["batch_id"], "segment": path.name, "count": len(ideas)}
+
+def idea_key(idea) -> str:
+    """Identity of an idea across batches: its slug, else its title (case-insensitive)."""
+    if isinstance(idea, str):
+        return idea.strip().lower()
+    return (idea.get("slug") or idea.get("title") or "").strip().lower()
+
+def dedupe_ideas(ideas: list) -> list:
+    """Drops repeated ideas (same slug or title), keeping the first of each."""
+    seen = set()
+    unique = []
+    for idea in ideas:
+        key = idea_key(idea)
+        if key and key in seen:
+            continue
+        seen.add(key)
+        unique.append(idea)
+    return unique
+
+def batch_key(ideas: list) -> str:
+    """Content key of a batch, independent of idea order."""
+    keys = sorted(idea_key(idea) for idea in ideas)
+    return hashlib.sha256(json.dumps(keys, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+# --- Reading
+
+def segment_records(path) -> list:
+    """
+    Batch records of one segment, decoded gzip member by member. A member
+    torn by a crash mid-append is skipped; every complete batch survives.
+    """
+    return _decode_members(Path(path).read_bytes(), Path(path).name)
+
+def _decode_members(data: bytes, name: str) -> list:
+    records = []
+    while data:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            chunk = decompressor.decompress(data)
+        except zlib.error:
+            chunk = b""
+        if not decompressor.eof:
+            # Resync on the next gzip header, if later appends follow the torn one
+            next_member = data.find(b"\x1f\x8b\x08", 1)
+            print(f"⚠️ Skipping a truncated batch in {name}")
+            if next_member < 0:
+                break
+            data = data[next_member:]
+            continue
+        records.extend(json.loads(line) for line in chunk.decode("utf-8").splitlines() if line.strip())
+        data = decompressor.unused_data
+    return records
+
+def _load_index(log_dir) -> dict:
+    try:
+        with open(Path(log_dir) / INDEX_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_index(index, log_dir):
+    path = Path(log_dir) / INDEX_NAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _idea_total(entry: dict, kind=None) -> int:
+    if kind:
+        return entry.get(kind, 0)
+    return sum(count for key, count in entry.items() if key != "size")
+
+def segment_counts(log_dir=LOG_DIR) -> dict:
+    """
+    {segment name: {"size": bytes, kind: ideas logged}} for every segment,
+    cached in idea_log/index.json. Appends only ever add gzip members, so a
+    segment that grew since it was counted has just its new members decoded;
+    compact() drops the entries of the segments it rewrites.
+    """
+    with _lock:
+        index = _load_index(log_dir)
+        counts = {}
+        for path in sorted(Path(log_dir).glob("*.jsonl.gz")):
+            size = path.stat().st_size
+            entry = index.get(path.name)
+            if entry is None or entry["size"] > size:
+                entry, records = {"size": 0}, segment_records(path)
+            elif entry["size"] < size:
+                with open(path, "rb") as f:
+                    f.seek(entry["size"])
+                    records = _decode_members(f.read(), path.name)
+            else:
+                records = None
+            if records is not None:
+                entry = dict(entry, size=size)
+                for record in records:
+                    entry[record["kind"]] = entry.get(record["kind"], 0) + len(record["ideas"])
+            counts[path.name] = entry
+        if counts != index and Path(log_dir).exists():
+            _save_index(counts, log_dir)
+    return counts
+
+def iter_batches(log_dir=LOG_DIR, newest_first=False):
+    """Yields batch records segment by segment (oldest segment first by default)."""
+    for path in sorted(Path(log_dir).glob("*.jsonl.gz"), reverse=newest_first):
+        records = segment_records(path)
+        yield from (reversed(records) if newest_first else records)
+
+def find_batch(kind: str, key: str, log_dir=LOG_DIR, segments=2):
+    """
+    The most recent `kind` batch logged with this batch_key in the last
+    `segments` months, in append_batch's return shape, or None. Lets a
+    retried save skip a batch it already logged.
+    """
+    for path in sorted(Path(log_dir).glob("*.jsonl.gz"), reverse=True)[:segments]:
+        for record in reversed(segment_records(path)):
+            if record["kind"] == kind and record.get("batch_key") == key:
+                return {"batch_id": record["batch_id"], "segment": path.name, "count": record["count"]}
+    return None
+
+def _matches(idea, kind_record, filters):
+    if filters.get("kind") and kind_record["kind"] != filters["kind"]:
+        return False
+    for field in ("theme", "mode", "region", "broad_era", "source"):
+        if filters.get(field) and (idea.get(field) or "").lower() != filters[field].lower():
+            return False
+    if filters.get("search") and filters["search"].lower() not in (idea.get("title") or "").lower():
+        return False
+    if filters.get("since") and kind_record["logged_at"] < filters["since"]:
+        return False
+    return True
+
+# Filters that look inside batches: with any of them, the total is only known by scanning
+IDEA_FILTERS = ("theme", "mode", "region", "broad_era", "source", "search", "since")
+
+def read_ideas(offset=0, limit=50, newest_first=True, log_dir=LOG_DIR, **filters) -> dict:
+    """
+    Paginated, filterable view over every logged idea.
+    Filters: kind, theme, mode, region, broad_era, source (exact, case-
+    insensitive), search (substring of the title), since (ISO timestamp).
+
+    Segments are read in page order and the scan stops once the page is
+    full. Filtered by kind alone, the total comes from segment_counts() and
+    segments entirely before `offset` are skipped unread. With any other
+    filter, `total` is only set when the scan reached the end of the log;
+    otherwise it is None and `has_more` is true.
+    """
+    filters = {key: value for key, value in filters.items() if value}
+    countable = not any(key in filters for key in IDEA_FILTERS)
+    kind = filters.get("kind")
+    counts = segment_counts(log_dir)
+    # One match past the page tells a filtered scan whether there is more
+    wanted = offset + limit if countable else offset + limit + 1
+
+    items = []
+    seen = 0
+    for name in sorted(counts, reverse=newest_first):
+        if seen >= wanted:
+            break
+        if filters.get("since") and name[:7] < filters["since"][:7]:
+            continue  # The whole month is older than `since`
+        if countable and seen + _idea_total(counts[name], kind) <= offset:
+            seen += _idea_total(counts[name], kind)
+            continue
+
+        records = segment_records(Path(log_dir) / name)
+        for record in (reversed(records) if newest_first else records):
+            ideas = reversed(record["ideas"]) if newest_first else record["ideas"]
+            for idea in ideas:
+                if isinstance(idea, str):
+                    idea = {"title": idea}
+                if not _matches(idea, record, filters):
+                    continue
+                if offset <= seen < offset + limit:
+                    items.append({**idea, "batch_id": record["batch_id"], "kind": record["kind"], "logged_at": record["logged_at"]})
+                seen += 1
+                if seen >= wanted:
+                    break
+            if seen >= wanted:
+                break
+
+    if countable:
+        total = sum(_idea_total(entry, kind) for entry in counts.values())
+    else:
+        total = seen if seen < wanted else None
+    has_more = total is None or total > offset + limit
+    return {"total": total, "offset": offset, "limit": limit, "has_more": has_more, "items": items}
+
+# --- Retention / compaction
+
+def compact(retention_days=RETENTION_DAYS, log_dir=LOG_DIR) -> dict:
+    """
+    Drops batches older than the retention window and rewrites each closed
+    month segment as a single gzip stream (one member compresses better
+    than many small ones). The current month keeps taking appends untouched.
+    """
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    current = segment_path(datetime.now(), log_dir).name
+    stats = {"segments_rewritten": 0, "segments_deleted": 0, "batches_dropped": 0}
+
+    with _lock:
+        index = _load_index(log_dir)
+        for path in sorted(Path(log_dir).glob("*.jsonl.gz")):
+            if path.name == current:
+                continue
+            index.pop(path.name, None)  # Recounted on the next read
+            records = segment_records(path)
+            kept = [r for r in records if r["logged_at"] >= cutoff]
+            stats["batches_dropped"] += len(records) - len(kept)
+            if not kept:
+                path.unlink()
+                stats["segments_deleted"] += 1
+                continue
+            tmp_path = path.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=9) as f:
+                for r in kept:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, path)
+            stats["segments_rewritten"] += 1
+        if Path(log_dir).exists():
+            _save_index(index, log_dir)
+    return stats
+
+# --- Migration of the old JSON files
+
+def _legacy_timestamp(path: Path) -> datetime:
+    """When a legacy file was saved: the archive name's timestamp, else its mtime."""
+    try:
+        return datetime.strptime(path.stem[-19:], "%Y-%m-%d_%H-%M-%S")
+    except ValueError:
+        return datetime.fromtimestamp(path.stat().st_mtime)
+
+def import_legacy(generated_path, archive_dir, log_dir=LOG_DIR) -> int:
+    """
+    Imports the current generated_ideas.json as one "generated" batch and
+    each accepted-ideas snapshot in archive/ as one "accepted" batch, logged
+    at the time the file was saved. The full generated_ideas snapshots are
+    redundant with it and are not imported. Files already imported (by
+    legacy_file name) are skipped, so the import can safely be re-run.
+    """
+    already = {record.get("legacy_file") for record in iter_batches(log_dir)} - {None}
+    sources = [("generated", Path(generated_path))]
+    sources += [("accepted", path) for path in sorted(Path(archive_dir).glob("pending_event_ideas_*.json"))]
+
+    imported = 0
+    for kind, path in sources:
+        if not path.exists() or path.name in already:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            append_batch(kind, json.load(f), log_dir=log_dir, logged_at=_legacy_timestamp(path), legacy_file=path.name)
+        imported += 1
+    return imported
+
+# --- Entry point
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the generated ideas log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help="Apply retention and recompress closed segments")
+    sub.add_parser("import-legacy", help="Import generated_ideas.json and accepted-idea archives")
+    show = sub.add_parser("show", help="Print the most recent ideas")
+    show.add_argument("--limit", type=int, default=20)
+    show.add_argument("--kind", choices=["generated", "accepted"])
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        print(f"🧹 {compact()}")
+    elif args.command == "import-legacy":
+        count = import_legacy(project_root / "src/moderation/generated_ideas.json", project_root / "src/moderation/archive")
+        print(f"📦 Imported {count} legacy batches into {LOG_DIR}")
+    elif args.command == "show":
+        page = read_ideas(limit=args.limit, kind=args.kind)
+        for idea in page["items"]:
+            print(f"{idea['logged_at'][:19]}  [{idea['kind']}]  {idea.get('title')} ({idea.get('year', '?')})")
+        print(f"… {page['total']} ideas in total")
@@ -0,0 +1,230 @@
+# src/moderation/job_queue.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+QUEUE_PATH = Path(os.getenv("JOB_QUEUE_PATH", project_root / "src/moderation/jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+LEASE_SECONDS = 120     # A job whose lease lapses (worker died) is picked up again
+POLL_SECONDS = 2.0
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 30    # A failed job waits 30s, 60s, ... before its next attempt
+
+class JobQueue:
+    """
+    Durable job queue in a local SQLite file. Workers lease a job for
+    LEASE_SECONDS and keep renewing it while they run; if a process dies,
+    the lease lapses and another worker (or the restarted server) takes
+    the job over. A failed attempt is retried after an exponential
+    backoff. Results and errors stay in the table for polling.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,          -- queued | running | succeeded | failed
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    not_before REAL,               -- retry backoff: not leased before this time
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "not_before" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")  # Queues created before backoff
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call: safe from any thread or process
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def submit(self, kind: str, payload, max_attempts: int = MAX_ATTEMPTS) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), max_attempts, time.time()),
+            )
+        return job_id
+
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS):
+        """Claims the oldest runnable job (queued and past its backoff, or running with a lapsed lease)."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose worker died once too often are given up on
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Lease expired too many times', finished_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?)) "
+                    "OR (status = 'running' AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                    "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (worker, now + lease_seconds, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        job["attempts"] += 1
+        return job
+
+    def renew(self, job_id: str, worker: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker: str, result):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, lease_until = NULL, finished_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (json.dumps(result, ensure_ascii=False, default=str), time.time(), job_id, worker),
+            )
+
+    def fail(self, job_id: str, worker: str, error: str, backoff_seconds: float = BACKOFF_SECONDS):
+        """
+        Requeues the job if it has attempts left, not to be leased again for
+        backoff_seconds × 2^(attempts - 1); otherwise marks it failed.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET error = ?, lease_until = NULL, "
+                "status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+                "not_before = CASE WHEN attempts < max_attempts THEN ? + ? * (1 << (attempts - 1)) END, "
+                "finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END "
+                "WHERE id = ? AND worker = ?",
+                (error, now, backoff_seconds, now, job_id, worker),
+            )
+
+    def get(self, job_id: str):
+        with self._connect() as conn:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status=None, limit: int = 50) -> list:
+        query = "SELECT id, kind, status, attempts, error, created_at, started_at, not_before, finished_at FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(query, params)]
+
+class JobWorkerPool:
+    """
+    Worker threads that lease jobs and run the handler registered for
+    their kind. One extra thread renews the leases of running jobs.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: dict, workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.name = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.running = {}  # job id → worker name
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{self.name}-{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        keeper = threading.Thread(target=self._renew_leases, name="job-lease-keeper", daemon=True)
+        keeper.start()
+        self.threads.append(keeper)
+        print(f"🧵 Job queue: {self.workers} workers on {self.queue.path}")
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def notify(self):
+        """Wakes idle workers after a submit instead of waiting for the next poll."""
+        self.wakeup.set()
+
+    def _work(self, worker):
+        while not self.stopping.is_set():
+            job = self.queue.lease(worker)
+            if job is None:
+                self.wakeup.wait(POLL_SECONDS)
+                self.wakeup.clear()
+                continue
+
+            with self.lock:
+                self.running[job["id"]] = worker
+            print(f"▶️ Job {job['id']} ({job['kind']}) attempt {job['attempts']}/{job['max_attempts']}")
+            try:
+                handler = self.handlers[job["kind"]]
+                self.queue.complete(job["id"], worker, handler(job["payload"]))
+                print(f"✅ Job {job['id']} done")
+            except Exception as e:
+                traceback.print_exc()
+                self.queue.fail(job["id"], worker, str(e))
+                print(f"❌ Job {job['id']} failed: {e}")
+            finally:
+                with self.lock:
+                    self.running.pop(job["id"], None)
+
+    def _renew_leases(self):
+        while not self.stopping.wait(LEASE_SECONDS / 3):
+            with self.lock:
+                running = list(self.running.items())
+            for job_id, worker in running:
+                self.queue.renew(job_id, worker)
@@ -0,0 +1,86 @@
+# src/moderation/title_index.py
+
+import csv
+import os
+import threading
+from pathlib import Path
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+TITLES_CSV = project_root / "src/scripts/event_titles.csv"
+TITLE_TOKEN_BUDGET = int(os.getenv("TITLE_CONTEXT_TOKENS", "1500"))
+
+# Filter name in the /api/generate-ideas payload → CSV column
+FILTER_COLUMNS = {"themes": "theme", "broad_eras": "broad_era", "regions": "region"}
+
+def estimate_tokens(title: str) -> int:
+    """Rough GPT token count of a title inside a JSON array (~4 chars per token, plus quotes/comma)."""
+    return len(title) // 4 + 2
+
+class TitleIndex:
+    """
+    Existing event titles held in memory and indexed by theme, broad era
+    and region. The CSV is re-read only when its mtime changes.
+    """
+
+    def __init__(self, path=TITLES_CSV):
+        self.path = Path(path)
+        self.titles = []
+        self.postings = {column: {} for column in FILTER_COLUMNS.values()}
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        mtime_ns = self.path.stat().st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return
+        titles = []
+        postings = {column: {} for column in FILTER_COLUMNS.values()}
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                title = (row.get("title") or "").strip()
+                if not title:
+                    continue
+                for column, index in postings.items():
+                    value = (row.get(column) or "").strip().lower()
+                    if value:
+                        index.setdefault(value, []).append(len(titles))
+                titles.append(title)
+        self.titles, self.postings, self._mtime_ns = titles, postings, mtime_ns
+
+    def relevant_titles(self, filters: dict, token_budget: int = TITLE_TOKEN_BUDGET) -> list:
+        """
+        Titles most relevant to the requested slice, within `token_budget`.
+        Titles matching every active filter come first, then titles matching
+        fewer of them; with no filters, every title is a candidate.
+        """
+        with self._lock:
+            self._refresh()
+            titles, postings = self.titles, self.postings
+
+        active = [
+            (column, {v.strip().lower() for v in filters[key]})
+            for key, column in FILTER_COLUMNS.items() if filters.get(key)
+        ]
+
+        if active:
+            scores = {}
+            for column, values in active:
+                for value in values:
+                    for i in postings[column].get(value, []):
+                        scores[i] = scores.get(i, 0) + 1
+            ranked = sorted(scores, key=lambda i: (-scores[i], i))
+        else:
+            ranked = range(len(titles))
+
+        selected = []
+        used = 0
+        for i in ranked:
+            cost = estimate_tokens(titles[i])
+            if used + cost > token_budget:
+                break
+            selected.append(titles[i])
+            used += cost
+        return selected
+
+title_index = TitleIndex()
@@ -47,7 +47,9 @@ const REGIONS = [
   "Oceania"
 ];
 
-export default function PreGameScreen({ events = [] }) {
+const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+
+export default function PreGameScreen() {
   const navigate = useNavigate();
   const [playerName, setPlayerName] = useState(sessionStorage.getItem("playerName") || "");
   const [mode, setMode] = useState(sessionStorage.getItem("mode") || "endless");
@@ -60,6 +62,28 @@ export default function PreGameScreen({ events = [] }) {
   const [curriculumCountry, setCurriculumCountry] = useState("");
   const [curriculumLevel, setCurriculumLevel] = useState("");
   const [curriculumProfiles, setCurriculumProfiles] = useState({});
+  const [counts, setCounts] = useState(null); // /api/facet-counts for the current selection
+
+  // Live counts from the server's facet index, so the catalog stays on the server
+  useEffect(() => {
+    const params = new URLSearchParams();
+    if (filterMode === "manual") {
+      selectedThemes.forEach((t) => params.append("themes", t));
+      selectedEras.forEach((e) => params.append("broad_eras", e));
+      selectedRegions.forEach((r) => params.append("regions", r));
+    } else if (filterMode === "curriculum" && curriculumCountry && curriculumLevel) {
+      params.set("curriculum_key", `${curriculumCountry}_${curriculumLevel}`);
+    }
+
+    const controller = new AbortController();
+    fetch(`${API_BASE}/api/facet-counts?${params}`, { signal: controller.signal })
+      .then((res) => res.json())
+      .then((data) => setCounts(data))
+      .catch((err) => {
+        if (err.name !== "AbortError") console.error("Failed to load facet counts:", err);
+      });
+    return () => controller.abort();
+  }, [filterMode, selectedThemes, selectedEras, selectedRegions, curriculumCountry, curriculumLevel]);
 
   useEffect(() => {
     if (filterMode === "random") {
@@ -67,61 +91,76 @@ export default function PreGameScreen({ events = [] }) {
       return;
     }
 
-    let filtered = events;
-
-    if (selectedThemes.length > 0) {
-      filtered = filtered.filter(e => selectedThemes.includes(e.theme));
-    }
-    if (selectedEras.length > 0) {
-      filtered = filtered.filter(e => selectedEras.includes(e.broad_era));
-    }
-    if (selectedRegions.length > 0) {
-      filtered = filtered.filter(e => selectedRegions.includes(e.region));
-    }
+    if (!counts) return;
+    const matching = counts.total;
 
     if (mode !== "endless") {
       const roundTarget = parseInt(mode);
-      if (filtered.length < roundTarget) {
-        setWarning(`⚠️ Only ${filtered.length} matching events found, but ${roundTarget} rounds selected.`);
+      if (matching < roundTarget) {
+        setWarning(`⚠️ Only ${matching} matching events found, but ${roundTarget} rounds selected.`);
       } else {
         setWarning("");
       }
     } else {
-      if (filtered.length === 0) {
+      if (matching === 0) {
         setWarning("❌ No events match your filters. Please adjust them.");
-      } else if (filtered.length < 10) {
-        setWarning(`⚠️ Low variety: only ${filtered.length} events match your filters.`);
+      } else if (matching < 10) {
+        setWarning(`⚠️ Low variety: only ${matching} events match your filters.`);
       } else {
         setWarning("");
       }
     }
-  }, [mode, selectedThemes, selectedEras, selectedRegions, filterMode, events]);
+  }, [mode, filterMode, counts]);
 
+  // Curriculum counts don't depend on the selection: derive the profiles once
+  const curriculumCounts = counts?.facets.curriculum_tags;
   useEffect(() => {
+    if (!curriculumCounts || Object.keys(curriculumProfiles).length > 0) return;
     const tagMap = {};
-  
-    for (const event of events) {
-      const tags = event.curriculum_tags || [];
-      for (const tag of tags) {
-        const underscoreIndex = tag.indexOf("_");
-        if (underscoreIndex === -1) return;
-        const country = tag.slice(0, underscoreIndex);
-        const level = tag.slice(underscoreIndex + 1);
-        if (!country || !level) continue;
-  
-        if (!tagMap[country]) tagMap[country] = new Set();
-        tagMap[country].add(level);
-      }
+
+    for (const [tag, count] of Object.entries(curriculumCounts)) {
+      const underscoreIndex = tag.indexOf("_");
+      if (underscoreIndex === -1 || count === 0) continue;
+      const country = tag.slice(0, underscoreIndex);
+      const level = tag.slice(underscoreIndex + 1);
+      if (!country || !level) continue;
+
+      if (!tagMap[country]) tagMap[country] = new Set();
+      tagMap[country].add(level);
     }
-  
+
     const structured = {};
     for (const country of Object.keys(tagMap)) {
       structured[country] = Array.from(tagMap[country]).sort();
     }
-  
+
     setCurriculumProfiles(structured);
-  }, [events]);
+  }, [curriculumCounts]);
 
+  // Theme counts are keyed by theme_lookup id
+  const themeIds = Object.fromEntries(Object.entries(counts?.themes || {}).map(([id, label]) => [label, id]));
+  const facetCount = (facet, value) => {
+    if (!counts) return null;
+    const key = facet === "theme" ? themeIds[value] : value;
+    return counts.facets[facet]?.[key] ?? 0;
+  };
+
+  const facetPill = (facet, value, selectedList, setter) => {
+    const count = facetCount(facet, value);
+    const selected = selectedList.includes(value);
+    // Selecting a value with no matches would empty the game, so it is disabled
+    const empty = count === 0 && !selected;
+    return (
+      <button
+        key={value}
+        disabled={empty}
+        className={`${pillClass(selected)} ${empty ? "opacity-40 cursor-not-allowed" : ""}`}
+        onClick={() => toggleSelection(value, selectedList, setter)}
+      >
+        {value}{count !== null && <span className="ml-1 text-xs text-gray-500">({count})</span>}
+      </button>
+    );
+  };
 
   const toggleSelection = (value, list, setter) => {
     setter(list.includes(value) ? list.filter(v => v !== value) : [...list, value]);
@@ -211,45 +250,21 @@ export default function PreGameScreen({ events = [] }) {
           <div>
             <h3 className="font-bold mb-2">Theme</h3>
             <div className="flex flex-wrap gap-2">
-              {THEMES.map((t) => (
-                <button
-                  key={t}
-                  className={pillClass(selectedThemes.includes(t))}
-                  onClick={() => toggleSelection(t, selectedThemes, setSelectedThemes)}
-                >
-                  {t}
-                </button>
-              ))}
+              {THEMES.map((t) => facetPill("theme", t, selectedThemes, setSelectedThemes))}
             </div>
           </div>
 
           <div>
             <h3 className="font-bold mb-2">Broad Era</h3>
             <div className="flex flex-wrap gap-2">
-              {BROAD_ERAS.map((e) => (
-                <button
-                  key={e}
-                  className={pillClass(selectedEras.includes(e))}
-                  onClick={() => toggleSelection(e, selectedEras, setSelectedEras)}
-                >
-                  {e}
-                </button>
-              ))}
+              {BROAD_ERAS.map((e) => facetPill("broad_era", e, selectedEras, setSelectedEras))}
             </div>
           </div>
 
           <div>
             <h3 className="font-bold mb-2">Region</h3>
             <div className="flex flex-wrap gap-2">
-              {REGIONS.map((r) => (
-                <button
-                  key={r}
-                  className={pillClass(selectedRegions.includes(r))}
-                  onClick={() => toggleSelection(r, selectedRegions, setSelectedRegions)}
-                >
-                  {r}
-                </button>
-              ))}
+              {REGIONS.map((r) => facetPill("region", r, selectedRegions, setSelectedRegions))}
             </div>
           </div>
         </div>
@@ -285,6 +300,7 @@ export default function PreGameScreen({ events = [] }) {
                 {curriculumProfiles[curriculumCountry]?.map((lvl) => (
                   <option key={lvl} value={lvl}>
                     {lvl.replace(/_/g, " ").replace(/\b\w/g, (l) => l.toUpperCase())}
+                    {curriculumCounts && ` (${curriculumCounts[`${curriculumCountry}_${lvl}`] ?? 0})`}
                   </option>
                 ))}
               </select>
@@ -1,15 +1,19 @@
 import json
 import re
-import openai
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import os
 
+# ⬇️ Add the project root to Python's import path
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from src.utils.llm_client import chat_completion
+
 # Load environment variables (assumes you have a .env in root)
 load_dotenv()
-openai.api_key = os.getenv("VITE_OPENAI_API_KEY")
 
-if not openai.api_key:
+if not os.getenv("VITE_OPENAI_API_KEY"):
     raise ValueError("❌ Missing OpenAI API Key")
 
 # Load events
@@ -35,20 +39,22 @@ Provide a JSON object with:
 Output strictly in JSON format.
 """
 
+def parse_backfill_json(content: str) -> dict:
+    return json.loads(re.sub(r'^```(?:json)?\n(.+?)\n```$', r'\1', content.strip(), flags=re.DOTALL))
+
 # Call OpenAI and sanitize output
 def call_gpt_backfill(event):
     prompt = build_prompt(event)
-    response = openai.chat.completions.create(
+    content = chat_completion(
         model="gpt-4o",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
-    )
-    content = response.choices[0].message.content.strip()
-    content = re.sub(r'^```(?:json)?\n(.+?)\n```$', r'\1', content, flags=re.DOTALL)
+        cache=True,
+        validate=parse_backfill_json,
+    ).strip()
 
     try:
-        data = json.loads(content)
-        return data
+        return parse_backfill_json(content)
     except json.JSONDecodeError as e:
         print(f"⚠️ GPT JSON error for '{event['title']}': {e}")
         print(content)
@@ -1,7 +1,6 @@
 #!/bin/bash
 # scripts/backup_public.sh
+# Kept for muscle memory: backups are now content-addressed snapshots.
+# Restore with: python src/scripts/snapshot_public.py restore <snapshot_id>
 
-mkdir -p backups
-timestamp=$(date +"%Y%m%d_%H%M%S")
-tar -czf backups/public_backup_$timestamp.tar.gz public
-echo "✅ Backup created at backups/public_backup_$timestamp.tar.gz"
\ No newline at end of file
+python3 src/scripts/snapshot_public.py create "$@"
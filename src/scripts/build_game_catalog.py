@@ -0,0 +1,154 @@
+# src/scripts/build_game_catalog.py
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+# ⬇️ Add the project root to Python's import path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.data.theme_lookup import theme_lookup
+from src.utils.event_catalog import normalize_event, record_versions
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # .br siblings are skipped without the brotli package
+
+# --- Paths
+EVENTS_PATH = project_root / "public/data/events.json"
+CATALOG_DIR = project_root / "public/data/catalog"
+MANIFEST_PATH = CATALOG_DIR / "manifest.json"
+CATALOG_VERSION = 1
+
+# Columns the game reads (TimeGuessrGame.jsx fetchEvents select list, plus the
+# responsive image set from src/utils/event_export.py), in row order.
+# era is not stored per row: it is recovered from era_id through the "era" dictionary.
+COLUMNS = [
+    "id", "title", "slug", "year", "coords", "theme", "region", "broad_era", "era_id",
+    "notable_location", "image_url", "image_variants", "caption", "wiki_url", "country", "city",
+    "difficulty", "curriculum_tags", "curriculum_theme_ids",
+]
+DICTIONARY_COLUMNS = ["region", "broad_era", "curriculum_tags", "curriculum_theme_ids"]
+
+# --- Helper functions
+
+class Dictionary:
+    """Assigns dense integer ids to categorical values, in first-seen order."""
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def encode(self, value):
+        if value in (None, ""):
+            return None
+        if value not in self.ids:
+            self.ids[value] = len(self.values)
+            self.values.append(value)
+        return self.ids[value]
+
+def build_catalog(events, catalog_version=0):
+    """
+    Projects events onto COLUMNS as positional rows. Themes use the
+    theme_lookup ids; region, broad era and curriculum tags/theme ids are
+    dictionary-encoded; default image URLs (/images/<slug>.jpg) are omitted.
+    `catalog_version` lets clients ask /api/events for changes since this build.
+    """
+    dictionaries = {column: Dictionary() for column in DICTIONARY_COLUMNS}
+    themes = {str(theme_id): label for label, theme_id in theme_lookup.items()}
+    eras = {}
+    rows = []
+
+    for event in sorted(events, key=lambda e: e.get("id") or 0):
+        # Same normalization as the /api/events delta rows, so both decode alike
+        event = normalize_event(event)
+        slug = event["slug"]
+        if event["theme_id"] is None:
+            print(f"⚠️ Theme of {slug} is not in theme_lookup and has no theme_id; stored without a theme")
+        elif str(event["theme_id"]) not in themes:
+            themes[str(event["theme_id"])] = event["theme"]
+        if event["era_id"] is not None:
+            eras[str(event["era_id"])] = event["era"]
+
+        row = {
+            **event,
+            "theme": event["theme_id"],
+            "region": dictionaries["region"].encode(event["region"]),
+            "broad_era": dictionaries["broad_era"].encode(event["broad_era"]),
+            "image_url": None if event["image_url"] == f"/images/{slug}.jpg" else event["image_url"],
+            "image_variants": event.get("image_variants"),
+            "curriculum_tags": [dictionaries["curriculum_tags"].encode(t) for t in event["curriculum_tags"]],
+            "curriculum_theme_ids": [dictionaries["curriculum_theme_ids"].encode(t) for t in event["curriculum_theme_ids"]],
+        }
+        rows.append([row[column] for column in COLUMNS])
+
+    return {
+        "version": CATALOG_VERSION,
+        "catalog_version": catalog_version,
+        "columns": COLUMNS,
+        "dictionaries": {
+            "theme": themes,
+            "era": eras,
+            **{column: d.values for column, d in dictionaries.items()},
+        },
+        "rows": rows,
+    }
+
+def write_atomic(path, data: bytes):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_catalog(catalog, catalog_dir=CATALOG_DIR):
+    """
+    Writes events.<hash>.json (minified) plus .gz/.br siblings, then points
+    manifest.json at it. Older catalog files are removed.
+    """
+    catalog_dir.mkdir(parents=True, exist_ok=True)
+    body = json.dumps(catalog, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    content_hash = hashlib.sha256(body).hexdigest()[:12]
+    filename = f"events.{content_hash}.json"
+    path = catalog_dir / filename
+
+    sizes = {"json": len(body)}
+    write_atomic(path, body)
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    write_atomic(path.with_name(filename + ".gz"), compressed)
+    sizes["gzip"] = len(compressed)
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        write_atomic(path.with_name(filename + ".br"), compressed)
+        sizes["br"] = len(compressed)
+
+    manifest = {"file": filename, "hash": content_hash, "catalog_version": catalog["catalog_version"], "count": len(catalog["rows"]), "bytes": sizes}
+    write_atomic(catalog_dir / MANIFEST_PATH.name, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    for old in catalog_dir.glob("events.*.json*"):
+        if not old.name.startswith(filename):
+            old.unlink()
+    return manifest
+
+# --- Main process
+
+def main(events_path=EVENTS_PATH):
+    with open(events_path, "r", encoding="utf-8") as f:
+        events = json.load(f)
+
+    catalog_version = record_versions(events)
+    manifest = write_catalog(build_catalog(events, catalog_version))
+    source_bytes = Path(events_path).stat().st_size
+    sizes = ", ".join(f"{kind} {size / 1024:.1f} KB" for kind, size in manifest["bytes"].items())
+    print(f"✅ Catalog {manifest['file']} (v{catalog_version}): {manifest['count']} events, {sizes} (source {source_bytes / 1024:.1f} KB)")
+    if brotli is None:
+        print("ℹ️ brotli not installed — skipped the .br sibling (pip install brotli)")
+    return manifest
+
+# --- Entry point
+if __name__ == "__main__":
+    main()
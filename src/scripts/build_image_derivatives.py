@@ -0,0 +1,163 @@
+# src/scripts/build_image_derivatives.py
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401 — registers the AVIF plugin on older Pillow
+except ImportError:
+    pass
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+IMAGES_DIR = project_root / "public/images"
+DERIVED_DIR = IMAGES_DIR / "derived"
+MANIFEST_PATH = DERIVED_DIR / "manifest.json"
+PUBLIC_URL_PREFIX = "/images/derived"
+
+WIDTHS = [320, 640, 1024]
+PLACEHOLDER_WIDTH = 16
+Image.init()
+AVIF_SUPPORTED = "AVIF" in Image.SAVE  # Pillow >= 11.2, or the pillow-avif-plugin package
+
+FORMAT_OPTIONS = {
+    "avif": {"format": "AVIF", "quality": 50},
+    "webp": {"format": "WEBP", "quality": 72, "method": 6},
+    "jpg": {"format": "JPEG", "quality": 80, "progressive": True, "optimize": True},
+}
+
+# --- Helper functions
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(manifest):
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def output_formats():
+    return [fmt for fmt in FORMAT_OPTIONS if fmt != "avif" or AVIF_SUPPORTED]
+
+def build_derivatives(slug, source_path, source_hash):
+    """
+    Renders every width/format of one source image plus a tiny blurred
+    placeholder. Runs in a worker process; returns the manifest entry.
+    """
+    with Image.open(source_path) as opened:
+        image = ImageOps.exif_transpose(opened).convert("RGB")
+
+    widths = [w for w in WIDTHS if w < image.width] + [image.width]
+    variants = {fmt: [] for fmt in output_formats()}
+
+    for width in widths:
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in variants:
+            filename = f"{slug}-{width}.{fmt}"
+            resized.save(DERIVED_DIR / filename, **FORMAT_OPTIONS[fmt])
+            variants[fmt].append({"width": width, "url": f"{PUBLIC_URL_PREFIX}/{filename}"})
+
+    placeholder = image.copy()
+    placeholder.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    buffer = io.BytesIO()
+    placeholder.save(buffer, format="WEBP", quality=40)
+
+    return {
+        "source_hash": source_hash,
+        "width": image.width,
+        "height": image.height,
+        "variants": variants,
+        "placeholder": "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    }
+
+def is_up_to_date(entry, source_hash):
+    if not entry or entry.get("source_hash") != source_hash:
+        return False
+    if set(entry.get("variants", {})) != set(output_formats()):
+        return False
+    return all(
+        (DERIVED_DIR / Path(v["url"]).name).exists()
+        for variants in entry["variants"].values() for v in variants
+    )
+
+def remove_derivatives(entry):
+    for variants in entry.get("variants", {}).values():
+        for v in variants:
+            (DERIVED_DIR / Path(v["url"]).name).unlink(missing_ok=True)
+
+# --- Main process
+
+def main(workers=None, force=False):
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    sources = {p.stem: p for p in sorted(IMAGES_DIR.glob("*.jpg"))}
+
+    # Drop derivatives whose source image is gone
+    for slug in set(manifest) - set(sources):
+        remove_derivatives(manifest.pop(slug))
+        print(f"🧹 Removed derivatives for deleted image: {slug}")
+
+    todo = []
+    for slug, path in sources.items():
+        entry = manifest.get(slug)
+        stat = path.stat()
+        # Only re-hash sources whose size or mtime moved since the last build
+        if entry and entry.get("source_size") == stat.st_size and entry.get("source_mtime_ns") == stat.st_mtime_ns:
+            source_hash = entry["source_hash"]
+        else:
+            source_hash = file_hash(path)
+        if force or not is_up_to_date(entry, source_hash):
+            todo.append((slug, path, source_hash))
+        elif entry:
+            entry.update(source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+
+    print(f"🖼️ {len(sources)} source images, {len(todo)} need derivatives "
+          f"({', '.join(output_formats())} × {len(WIDTHS)} widths)")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_derivatives, slug, str(path), h): slug for slug, path, h in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            slug = futures[future]
+            try:
+                stat = sources[slug].stat()
+                manifest[slug] = {**future.result(), "source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+                print(f"✅ [{i}/{len(todo)}] {slug}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ Failed to build derivatives for {slug}: {e}")
+            if i % 25 == 0:
+                save_manifest(manifest)  # Checkpoint long runs
+
+    save_manifest(manifest)
+    print(f"🎯 Done! {len(todo) - failed} rebuilt, {failed} failed → {MANIFEST_PATH}")
+
+# --- Entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build responsive WebP/AVIF/JPEG derivatives for public/images")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Rebuild every slug, even if unchanged")
+    args = parser.parse_args()
+
+    main(workers=args.workers, force=args.force)
@@ -0,0 +1,29 @@
+# src/scripts/build_performance_benchmarks.py
+import sys
+import os
+from pathlib import Path
+
+# ⬇️ Add the project root to Python's import path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from dotenv import load_dotenv
+from supabase import create_client, Client
+from src.utils.performance_benchmarks import rebuild_snapshot
+
+# --- Setup
+load_dotenv(dotenv_path=project_root / ".env")
+
+SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+    raise ValueError("❌ Missing Supabase URL or Service Role Key.")
+
+supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+# --- Entry point
+if __name__ == "__main__":
+    print("🔄 Rebuilding player performance benchmarks...")
+    rebuild_snapshot(supabase)
+    print("🎯 Done!")
@@ -1,13 +1,22 @@
 # src/scripts/finalize_abandoned_sessions.py
 import os
+import sys
 import json
 from datetime import datetime, timezone
 from pathlib import Path
+
+# ⬇️ Add the project root to Python's import path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from src.utils.performance_benchmarks import rebuild_snapshot
+from src.utils.player_rollups import apply_sessions
+from src.utils.supabase_batch import fetch_all_rows, fetch_rows_in, bulk_upsert, IN_CHUNK_SIZE, UPSERT_CHUNK_SIZE
 
 # --- Setup
-load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent.parent / ".env")
+load_dotenv(dotenv_path=project_root / ".env")
 
 SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("VITE_SUPABASE_ANON_KEY")
@@ -19,12 +28,10 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 
 # --- Logic
 
-def summarize_session_results(session_id):
-    print(f"🔎 Checking session_id: {session_id} ({type(session_id)})")
-    response = supabase.table("results").select("slug, score").in_("session_id", [session_id]).execute()
-    print(f"📥 Supabase response: data={response.data} count={getattr(response, 'count', None)}")
+RESULT_COLUMNS = "session_id, slug, score, distance, year_diff, time_to_guess"
 
-    entries = response.data
+def summarize_results(entries):
+    """Best score per slug → session totals. Returns None for sessions without results."""
     if not entries:
         return None  # No results, treat as an abandoned session
 
@@ -46,25 +53,51 @@ def summarize_session_results(session_id):
         "completed": True,
     }
 
-def finalize_abandoned_sessions():
+def write_session_updates(updates, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Writes the per-session totals in chunks with one upsert on `id` per
+    chunk (several chunks in flight). The ids come from the open-session
+    fetch, so every row already exists and nothing is created. Returns the
+    rows that were written.
+    """
+    written, failed = bulk_upsert(supabase, "sessions", updates, on_conflict="id", chunk_size=chunk_size)
+    for row, error in failed:
+        print(f"⚠️ Update failed for session {row['id']}: {error}")
+    return written
+
+def finalize_abandoned_sessions(chunk_size=IN_CHUNK_SIZE):
     print("🔍 Fetching open-ended sessions...")
-    response = supabase.table("sessions").select("id").is_("ended_at", None).execute()
-    session_ids = [s["id"] for s in response.data or []]
-    print(f"📦 Found {len(session_ids)} candidate sessions")
+    sessions = fetch_all_rows(
+        lambda: supabase.table("sessions").select("id, player_name, started_at").is_("ended_at", None).order("id")
+    )
+    print(f"📦 Found {len(sessions)} candidate sessions")
 
-    finalized = 0
-    for sid in session_ids:
-        summary = summarize_session_results(sid)
+    # One chunked pass over results for every candidate instead of one query per session
+    results_by_session = {}
+    for r in fetch_rows_in(supabase, "results", RESULT_COLUMNS, "session_id", [s["id"] for s in sessions], chunk_size):
+        results_by_session.setdefault(r["session_id"], []).append(r)
+
+    ended_at = datetime.now(timezone.utc).isoformat()
+    updates = []
+    for s in sessions:
+        summary = summarize_results(results_by_session.get(s["id"]))
         if summary:
-            update_data = {
-                "ended_at": datetime.now(timezone.utc).isoformat(),
-                **summary,
-            }
-            result = supabase.table("sessions").update(update_data).eq("id", sid).execute()
-            if result.data:
-                finalized += 1
+            updates.append({"id": s["id"], "ended_at": ended_at, **summary})
 
+    written = write_session_updates(updates)
+    finalized = len(written)
     print(f"✅ Finalized {finalized} sessions with results.")
 
+    # Newly completed sessions shift ranks and cohorts, so refresh the benchmark snapshot
+    if finalized:
+        sessions_by_id = {s["id"]: s for s in sessions}
+        finalized_sessions = sorted(
+            ({**sessions_by_id[row["id"]], **row} for row in written),
+            key=lambda s: s.get("started_at") or "",
+        )
+        applied = apply_sessions(finalized_sessions, results_by_session)
+        print(f"📊 Updated player rollups with {applied} sessions.")
+        rebuild_snapshot(supabase)
+
 if __name__ == "__main__":
     finalize_abandoned_sessions()
@@ -1,5 +1,9 @@
-import json
 import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import openai
 import requests
@@ -7,11 +11,16 @@ import subprocess
 import base64
 from dotenv import load_dotenv
 
-# --- Backup public folder before any image generation
+# ⬇️ Add the project root to Python's import path
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from src.utils.jsonl_journal import pending_events_journal, processed_events_journal
+
+# --- Snapshot public folder before any image generation (content-addressed, incremental)
 print("📦 Backing up public folder before image generation...")
 try:
     result = subprocess.run(
-        ["bash", "src/scripts/backup_public.sh"],
+        [sys.executable, "src/scripts/snapshot_public.py", "create", "--label", "pre_images"],
         check=True,
         capture_output=True,
         text=True
@@ -29,14 +38,61 @@ if not openai.api_key:
     raise ValueError("❌ Missing OpenAI API Key.")
 
 # --- Paths
-PENDING_EVENTS_PATH = Path("src/data/pending_events.json")
-PROCESSED_EVENTS_PATH = Path("src/data/processed_events.json")
 IMAGES_DIR = Path("public/images")
 
 IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 
+# --- Rate limiting
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "4"))
+IMAGES_PER_MINUTE = float(os.getenv("IMAGES_PER_MINUTE", "5"))  # Match your gpt-image-1 tier
+MAX_ATTEMPTS = 5
+
+class RateLimitError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all workers. `pause()` lets a
+    Retry-After from any worker hold back every worker.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 6)  # Allow ~10s of burst
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
 # --- Helper functions
 
+def parse_retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
 def generate_timeguessr_image(prompt, slug):
     headers = {
         "Authorization": f"Bearer {openai.api_key}",
@@ -56,9 +112,16 @@ def generate_timeguessr_image(prompt, slug):
     response = requests.post(
         "https://api.openai.com/v1/images/generations",
         headers=headers,
-        json=payload
+        json=payload,
+        timeout=300,
     )
 
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RateLimitError(
+            f"❌ OpenAI API {response.status_code}: {response.text[:200]}",
+            retry_after=parse_retry_after(response),
+        )
+
     if response.status_code != 200:
         raise Exception(f"❌ OpenAI API error: {response.json()}")
 
@@ -70,55 +133,93 @@ def generate_timeguessr_image(prompt, slug):
         reason = data.get("error", {}).get("message", "Unknown - no image generated")
         raise Exception(f"❌ No image generated. Reason: {reason}")
 
-    print(f"✅ Base64 image received (length: {len(image_data['b64_json'])} characters)")
+    print(f"✅ Base64 image received for {slug} (length: {len(image_data['b64_json'])} characters)")
 
-    # Save the image
+    # Save the image (temp file first, so a crash never leaves a truncated JPEG behind)
     b64_content = image_data["b64_json"]
     image_path = IMAGES_DIR / f"{slug}.jpg"
-    with open(image_path, "wb") as f:
+    tmp_path = image_path.with_suffix(".jpg.tmp")
+    with open(tmp_path, "wb") as f:
         f.write(base64.b64decode(b64_content))
+    os.replace(tmp_path, image_path)
 
     print(f"✅ Saved image: {image_path}")
     return str(image_path)
 
-def load_json(file_path):
-    if file_path.exists():
-        with open(file_path, "r") as f:
-            return json.load(f)
-    else:
-        return []
-
-def save_json(data, file_path):
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
-
-# --- Main process
-
-def main():
-    pending_events = load_json(PENDING_EVENTS_PATH)
-    processed_events = load_json(PROCESSED_EVENTS_PATH)
-
-    updated_pending = []
-
-    for event in pending_events:
+def generate_with_retries(event, bucket):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        bucket.acquire()
         try:
-            print(f"🎨 Generating image for: {event['title']}")
-            # FIX: Pass both prompt AND slug
-            generate_timeguessr_image(event["prompt"], event["slug"])
-
-            # ✅ Success → move to processed
-            processed_events.append(event)
+            return generate_timeguessr_image(event["prompt"], event["slug"])
+        except (RateLimitError, requests.RequestException) as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = getattr(e, "retry_after", None) or min(60, 2 ** attempt)
+            print(f"⏳ {event['slug']}: {e} — retrying in {delay:.0f}s (attempt {attempt}/{MAX_ATTEMPTS})")
+            bucket.pause(delay)
+
+class Checkpoint:
+    """
+    Moves each event from pending to processed as soon as its image exists,
+    so an interrupted run resumes where it stopped. Each move is two
+    journal appends, not a rewrite of both queues.
+    """
+
+    def __init__(self, pending=pending_events_journal, processed=processed_events_journal):
+        self.pending = pending
+        self.processed = processed
+        self.lock = threading.Lock()
+
+    def mark_done(self, event):
+        with self.lock:
+            # Processed first: a crash in between leaves a duplicate that the next run skips
+            self.processed.append(event)
+            self.pending.remove(event["slug"])
 
-        except Exception as e:
-            print(f"❌ Error processing {event['title']}: {e}")
-            updated_pending.append(event)  # Keep unprocessed event
-
-    # Save updated files
-    save_json(updated_pending, PENDING_EVENTS_PATH)
-    save_json(processed_events, PROCESSED_EVENTS_PATH)
+# --- Main process
 
-    print("✅ All done!")
+def main(workers=IMAGE_WORKERS, images_per_minute=IMAGES_PER_MINUTE):
+    checkpoint = Checkpoint()
+    processed_slugs = processed_events_journal.keys()
+
+    to_generate = []
+    for event in pending_events_journal:
+        if event["slug"] in processed_slugs:
+            print(f"⏭️ Already processed: {event['slug']}")
+            pending_events_journal.remove(event["slug"])
+        elif (IMAGES_DIR / f"{event['slug']}.jpg").exists():
+            print(f"⏭️ Image already on disk: {event['slug']}")
+            checkpoint.mark_done(event)
+        else:
+            to_generate.append(event)
+
+    print(f"🎨 Generating {len(to_generate)} images with {workers} workers at ≤{images_per_minute:g}/min...")
+    bucket = TokenBucket(images_per_minute)
+
+    def work(event):
+        generate_with_retries(event, bucket)
+        checkpoint.mark_done(event)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(work, event): event for event in to_generate}
+        for future in as_completed(futures):
+            event = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ Error processing {event['title']}: {e}")  # Stays in pending for the next run
+
+    pending_events_journal.compact()
+    processed_events_journal.compact()
+    print(f"✅ All done! {len(to_generate) - failed} generated, {failed} left pending.")
 
 # --- Entry point
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate images for pending events")
+    parser.add_argument("--workers", type=int, default=IMAGE_WORKERS)
+    parser.add_argument("--per-minute", type=float, default=IMAGES_PER_MINUTE, help="Image requests per minute")
+    args = parser.parse_args()
+
+    main(workers=args.workers, images_per_minute=args.per_minute)
@@ -9,19 +9,25 @@ sys.path.append(str(project_root))
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=project_root / ".env")
 
-import pandas as pd
 import json
 import re
-import openai
 import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ✅ Updated import to use the full `src.` prefix
 from src.data.theme_lookup import theme_lookup
+from src.utils.llm_client import chat_completion
+from src.utils.era_index import EraIndex, get_era_index
+from src.utils.jsonl_journal import EventJournal, pending_events_journal
 
-openai.api_key = os.getenv("VITE_OPENAI_API_KEY")
-
-if not openai.api_key:
+if not os.getenv("VITE_OPENAI_API_KEY"):
     raise ValueError("❌ Missing OpenAI API Key. Make sure VITE_OPENAI_API_KEY is set in your environment.")
+
+METADATA_WORKERS = int(os.getenv("METADATA_WORKERS", "8"))
+MAX_ATTEMPTS = 3
+
 # --- Helper Functions ---
 
 def slugify(text: str) -> str:
@@ -39,26 +45,12 @@ def normalize_coords(coords) -> list:
     else:
         raise ValueError(f"Invalid coords format: {coords}")
 
-def match_era(year: int, region: str, eras_df: pd.DataFrame) -> dict:
-    candidates = eras_df[(eras_df["start"] <= year) & (eras_df["end"] >= year)]
-
-    if candidates.empty:
-        return {"era": "Unknown", "era_id": None}
-
-    exact_match = candidates[candidates["region"] == region]
-    fallback_match = candidates[candidates["region"] == "General"]
-
-    if not exact_match.empty:
-        selected = exact_match.iloc[0]
-    elif not fallback_match.empty:
-        selected = fallback_match.iloc[0]
-    else:
-        selected = candidates.iloc[0]
-
-    return {
-        "era": selected["label"],
-        "era_id": int(selected["id"])
-    }
+def match_era(year: int, region: str, era_index: EraIndex) -> dict:
+    """
+    Era covering `year`, preferring the event's region, then "General",
+    then any region. Use era_index.match_many() to match many events at once.
+    """
+    return era_index.match(year, region)
 
 def get_broad_era_label(year: int) -> str:
     if year <= -300000:
@@ -88,9 +80,21 @@ def assign_theme(theme_label: str, theme_lookup: dict) -> dict:
     
     return {"theme": theme_label, "theme_id": theme_lookup[theme_label]}
 
-def call_gpt_generate_metadata(idea: str) -> dict:
+# Fields generate_event_metadata reads; a reply missing one is not worth caching
+REQUIRED_METADATA_FIELDS = ("year", "region", "theme", "coords", "notable_figures", "visuals", "prompt")
+
+def parse_metadata_json(content: str) -> dict:
+    content = re.sub(r'^```(?:json)?\n(.+?)\n```$', r'\1', content.strip(), flags=re.DOTALL)
+    metadata = json.loads(content)
+    missing = [field for field in REQUIRED_METADATA_FIELDS if field not in metadata]
+    if missing:
+        raise json.JSONDecodeError(f"missing fields {missing}", content, 0)
+    return metadata
+
+def call_gpt_generate_metadata(idea: str, bypass_cache=None) -> dict:
     """
     Calls GPT-4o to generate metadata for an event idea.
+    Retries pass bypass_cache=True so they get a fresh answer.
     """
     prompt = f"""
 You are tasked with generating structured metadata for a historical event: "{idea}".
@@ -124,26 +128,25 @@ Captured as if by a high-resolution camera. No text or modern artifacts. Realist
 Respond only with valid JSON. No text around it.
 """
 
-    response = openai.chat.completions.create(
+    content = chat_completion(
         model="gpt-4o",
         messages=[
             {"role": "user", "content": prompt}
         ],
-        temperature=0.2
+        temperature=0.2,
+        cache=True,
+        validate=parse_metadata_json,
+        bypass_cache=bypass_cache,
     )
 
-    content = response.choices[0].message.content
-    content = re.sub(r'^```(?:json)?\n(.+?)\n```$', r'\1', content.strip(), flags=re.DOTALL)
-
     print("🧠 GPT raw response:\n", content)
     try:
-        metadata = json.loads(content)
-        return metadata
+        return parse_metadata_json(content)
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON from GPT: {e}")
 
 # --- Load eras ---
-eras_df = pd.read_csv('src/data/eras_rows.csv')
+era_index = get_era_index()
 
 # --- Main Processing ---
 
@@ -151,20 +154,20 @@ def load_event_ideas():
     return [
 ]
 
-def generate_event_metadata(idea, eras_df: pd.DataFrame) -> dict:
+def generate_event_metadata(idea, era_index: EraIndex, bypass_cache=None) -> dict:
     # Support both raw string and enriched idea object
     if isinstance(idea, str):
         title = idea
-        raw = call_gpt_generate_metadata(title)
+        raw = call_gpt_generate_metadata(title, bypass_cache=bypass_cache)
     elif isinstance(idea, dict):
         title = idea["title"]
-        raw = call_gpt_generate_metadata(title)
+        raw = call_gpt_generate_metadata(title, bypass_cache=bypass_cache)
         raw = {**raw, **idea}  # merge AI result with user-provided fields
     else:
         raise ValueError("Unsupported idea format")
 
     slug = slugify(title)
-    era_match = match_era(raw["year"], raw["region"], eras_df)
+    era_match = match_era(raw["year"], raw["region"], era_index)
     theme_info = assign_theme(raw["theme"], theme_lookup)
     normalized_coords = normalize_coords(raw["coords"])
     broad_era = get_broad_era_label(raw["year"])
@@ -200,23 +203,40 @@ def generate_event_metadata(idea, eras_df: pd.DataFrame) -> dict:
 
     return enriched
 
-def save_event_locally(event: dict, output_file="pending_events.json"):
-    output_path = Path('src/data') / output_file
-    if output_path.exists():
-        with open(output_path, "r") as f:
-            events = json.load(f)
-    else:
-        events = []
-
-    events.append(event)
+def save_event_locally(event: dict, journal=pending_events_journal):
+    # One fsync'd line per event; no read-modify-write of the whole queue
+    journal.append(event)
 
-    with open(output_path, "w") as f:
-        json.dump(events, f, indent=2)
+def idea_key(item: dict) -> str:
+    return json.dumps([
+        item["title"].strip().lower(),
+        item["year"],
+        sorted(item.get("curriculum_tags", [])),
+    ], ensure_ascii=False)
 
-def batch_generate_events_from_pending():
+def generate_with_retries(idea: dict) -> dict:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            # A retry must not replay the response that just failed
+            return generate_event_metadata(idea["title"], era_index, bypass_cache=True if attempt > 1 else None)
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = 2 ** attempt
+            print(f"⏳ {idea['title']}: {e} — retrying in {delay}s (attempt {attempt}/{MAX_ATTEMPTS})")
+            time.sleep(delay)
+
+def save_json(data, path: Path):
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def batch_generate_events_from_pending(workers: int = METADATA_WORKERS):
     pending_path = Path("src/moderation/pending_event_ideas.json")
     archive_path = Path("src/moderation/archived_event_ideas.json")
-    output_path = Path("src/data/pending_events.json")
+    # Ideas finished in a run that was interrupted before the pending list was rewritten
+    progress = EventJournal(pending_path.with_suffix(".progress.jsonl"), key="key")
 
     if not pending_path.exists():
         print("❌ No pending_event_ideas.json found.")
@@ -232,51 +252,59 @@ def batch_generate_events_from_pending():
     else:
         archived_ideas = []
 
-    # Load already saved events to prevent duplicates
-    if output_path.exists():
-        with open(output_path, "r", encoding="utf-8") as f:
-            existing_events = json.load(f)
-    else:
-        existing_events = []
-
-    existing_keys = {
-        (
-            e["title"].strip().lower(),
-            e["year"],
-            tuple(sorted(e.get("curriculum_tags", [])))
-        )
-        for e in existing_events
-    }
-
-    new_events = []
+    # Stream already saved events to prevent duplicates
+    existing_keys = {idea_key(e) for e in pending_events_journal} | progress.keys()
 
+    finished = []   # Generated or duplicate: archived
+    failed = []     # Kept in pending_event_ideas.json for the next run
+    to_generate = []
     for idea in ideas:
-        key = (
-            idea["title"].strip().lower(),
-            idea["year"],
-            tuple(sorted(idea.get("curriculum_tags", [])))
-        )
+        key = idea_key(idea)
         if key in existing_keys:
             print(f"⚠️ Skipping duplicate: {idea['title']} ({idea['year']}) {idea.get('curriculum_tags', [])}")
+            finished.append(idea)
             continue
-        try:
-            event = generate_event_metadata(idea["title"], eras_df)
-            save_event_locally(event)
-            new_events.append(event)
-            existing_keys.add(key)
-            print(f"✅ Success: {event['title']}")
-        except Exception as e:
-            print(f"❌ Error processing {idea['title']}: {str(e)}")
-
-    # Archive processed ideas
-    with open(archive_path, "w", encoding="utf-8") as f:
-        json.dump(archived_ideas + ideas, f, indent=2, ensure_ascii=False)
-        print(f"📦 Archived {len(ideas)} ideas to {archive_path.name}")
-
-    # Clear the pending list
-    pending_path.unlink()
-    print("🧹 Cleared pending_event_ideas.json")
+        existing_keys.add(key)
+        to_generate.append(idea)
+
+    print(f"🧠 Generating metadata for {len(to_generate)} ideas with {workers} workers...")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate_with_retries, idea): idea for idea in to_generate}
+        for future in as_completed(futures):
+            idea = futures[future]
+            try:
+                event = future.result()
+                save_event_locally(event)
+                progress.append({"key": idea_key(idea), "title": idea["title"]})
+                finished.append(idea)
+                print(f"✅ Success: {event['title']}")
+            except Exception as e:
+                failed.append(idea)
+                print(f"❌ Error processing {idea['title']}: {str(e)}")
+
+    # Archive finished ideas only, in their original order
+    order = {id(idea): i for i, idea in enumerate(ideas)}
+    finished.sort(key=lambda idea: order[id(idea)])
+    failed.sort(key=lambda idea: order[id(idea)])
+    save_json(archived_ideas + finished, archive_path)
+    print(f"📦 Archived {len(finished)} ideas to {archive_path.name}")
+
+    # Keep failures pending for the next run
+    if failed:
+        save_json(failed, pending_path)
+        print(f"⚠️ {len(failed)} ideas failed and stay in pending_event_ideas.json")
+    else:
+        pending_path.unlink()
+        print("🧹 Cleared pending_event_ideas.json")
+    progress.path.unlink(missing_ok=True)
 
 # --- Entry Point ---
 if __name__ == "__main__":
-    batch_generate_events_from_pending()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate event metadata for pending ideas")
+    parser.add_argument("--workers", type=int, default=METADATA_WORKERS, help="Concurrent GPT requests")
+    args = parser.parse_args()
+
+    if era_index.problems:
+        print(f"⚠️ Era table has {len(era_index.problems)} gaps/overlaps (python -m src.utils.era_index lists them)")
+    batch_generate_events_from_pending(workers=args.workers)
\ No newline at end of file
@@ -1,16 +1,28 @@
 # src/scripts/insert_processed_events.py
 
 import os
+import sys
 import json
+import argparse
 import subprocess
 from pathlib import Path
+
+# ⬇️ Add the project root to Python's import path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
 # --- Setup
-project_root = Path(__file__).resolve().parent.parent.parent
 load_dotenv(dotenv_path=project_root / ".env")
 
+from src.utils.event_export import iter_events, write_events_json, attach_image_variants
+from src.scripts.build_game_catalog import main as build_game_catalog
+from src.utils.supabase_batch import bulk_upsert, UPSERT_CHUNK_SIZE, UPSERT_WORKERS
+from src.agents.theme_memory_store import theme_memory_store
+from src.utils.jsonl_journal import processed_events_journal
+
 SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
@@ -20,7 +32,6 @@ if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 # --- Paths
-PROCESSED_EVENTS_PATH = project_root / "src/data/processed_events.json"
 ARCHIVED_EVENTS_PATH = project_root / "src/data/archived_events.json"
 ERROR_LOG_PATH = project_root / "src/data/error_log.json"
 FRONTEND_EVENTS_PATH = project_root / "public/data/events.json"
@@ -59,7 +70,8 @@ def normalize_coords_field(event):
         event["coords"] = json.dumps([0.0, 0.0])
     return event
 
-def insert_event(event):
+def prepare_event(event):
+    """Coerces curriculum fields into the types the events table expects."""
 
     # ✅ Ensure curriculum fields are of the correct type
     if "curriculum_tags" in event:
@@ -80,13 +92,7 @@ def insert_event(event):
     if "created_at" in event and event["created_at"] is None:
         del event["created_at"]
 
-    # ⬇️ Use UPSERT to update existing rows based on 'slug'
-    response = supabase.table("events").upsert(event, on_conflict="slug").execute()
-
-    if not response.data:
-        raise Exception(f"❌ Supabase upsert failed or no data returned.")
-
-    print(f"✅ Upserted: {event['title']}")
+    return event
 
 def archive_events(events):
     archived = load_json(ARCHIVED_EVENTS_PATH)
@@ -100,62 +106,49 @@ def log_errors(errors):
 
 def fetch_all_events_and_save():
     print("🔄 Fetching all events from Supabase...")
-    response = supabase.table("events").select("*").execute()
-
-    if not response.data:
-        raise Exception("❌ No events fetched from Supabase!")
-
-    # Normalize coords for frontend
-    events = response.data
-    for event in events:
-        try:
-            if isinstance(event.get("coords"), str):
-                coords = json.loads(event["coords"])
-                event["coords"] = [float(coords[0]), float(coords[1])]
-        except Exception as e:
-            print(f"⚠️ Warning: Bad coords for event {event.get('title', 'Unknown')} - {e}")
-            event["coords"] = [0.0, 0.0]
-
-    save_json(events, FRONTEND_EVENTS_PATH)
-    print(f"✅ Saved {len(events)} events to {FRONTEND_EVENTS_PATH}")
+    count = write_events_json(attach_image_variants(iter_events(supabase)), FRONTEND_EVENTS_PATH)
+    print(f"✅ Saved {count} events to {FRONTEND_EVENTS_PATH}")
+    build_game_catalog(FRONTEND_EVENTS_PATH)
 
 # --- Main process
 
-def main():
-    events = load_json(PROCESSED_EVENTS_PATH)
+def upsert_events_in_bulk(events, chunk_size=UPSERT_CHUNK_SIZE, max_workers=UPSERT_WORKERS):
+    rows = [prepare_event(normalize_coords_field(event)) for event in events]
+    successful, failures = bulk_upsert(
+        supabase, "events", rows, on_conflict="slug", chunk_size=chunk_size, max_workers=max_workers
+    )
+    for event, error in failures:
+        print(f"❌ Error inserting {event.get('title', 'Unknown')}: {error}")
+    return successful, [event for event, _ in failures]
+
+def main(chunk_size=UPSERT_CHUNK_SIZE, max_workers=UPSERT_WORKERS):
+    events = list(processed_events_journal)
 
     if not events:
-        print("⚠️ No events found in processed_events.json.")
+        print("⚠️ No events found in processed_events.jsonl.")
         return
 
-    print(f"🚀 Attempting to insert {len(events)} events...")
+    print(f"🚀 Attempting to insert {len(events)} events in chunks of {chunk_size} ({max_workers} workers)...")
 
-    successful = []
-    failed = []
+    successful, failed = upsert_events_in_bulk(events, chunk_size=chunk_size, max_workers=max_workers)
 
-    for event in events:
-        try:
-            clean_event = normalize_coords_field(event)
-            insert_event(clean_event)
-            successful.append(clean_event)
-        except Exception as e:
-            print(f"❌ Error inserting {event.get('title', 'Unknown')}: {e}")
-            failed.append(event)
-
-    # Archive successes
+    # Archive successes and make them visible to deduplication right away
     if successful:
         archive_events(successful)
-
-    # Save back only failed events
-    # save_json(failed, PROCESSED_EVENTS_PATH)
+        added = theme_memory_store.add_events(successful)
+        print(f"🧠 Theme memory updated with {added} events.")
 
     # Log errors if any
     log_errors(failed)
 
     print(f"🎯 Process finished: {len(successful)} succeeded, {len(failed)} failed.")
-    print(f"📘 Curriculum tags: {event.get('curriculum_tags')}")
 
 
 # --- Entry point
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Upsert processed events into Supabase")
+    parser.add_argument("--chunk-size", type=int, default=UPSERT_CHUNK_SIZE, help="Rows per upsert request (1 = row by row)")
+    parser.add_argument("--workers", type=int, default=UPSERT_WORKERS, help="Chunks sent concurrently")
+    args = parser.parse_args()
+
+    main(chunk_size=args.chunk_size, max_workers=args.workers)
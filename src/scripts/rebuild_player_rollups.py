@@ -0,0 +1,34 @@
+# src/scripts/rebuild_player_rollups.py
+import sys
+import os
+import argparse
+from pathlib import Path
+
+# ⬇️ Add the project root to Python's import path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
+from dotenv import load_dotenv
+from supabase import create_client, Client
+from src.utils.player_rollups import rebuild_rollups, ROLLUPS_DIR
+
+# --- Setup
+load_dotenv(dotenv_path=project_root / ".env")
+
+SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+    raise ValueError("❌ Missing Supabase URL or Service Role Key.")
+
+supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+# --- Entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill per-player stats rollups from session history")
+    parser.add_argument("--player", type=str, help="Only rebuild this player's rollup")
+    args = parser.parse_args()
+
+    print("🔄 Rebuilding player rollups from history...")
+    rebuilt = rebuild_rollups(supabase, player_name=args.player)
+    print(f"✅ Rebuilt {len(rebuilt)} player rollups → {ROLLUPS_DIR}")
@@ -0,0 +1,182 @@
+# src/scripts/snapshot_public.py
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+# --- Paths
+project_root = Path(__file__).resolve().parent.parent.parent
+SOURCE_DIR = project_root / "public"
+STORE_DIR = project_root / "backups/store"
+OBJECTS_DIR = STORE_DIR / "objects"
+SNAPSHOTS_DIR = STORE_DIR / "snapshots"
+HASH_CACHE_PATH = STORE_DIR / "hash_cache.json"
+
+# --- Helper functions
+
+def load_json(path, default):
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return default
+
+def save_json(data, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def object_path(content_hash):
+    return OBJECTS_DIR / content_hash[:2] / content_hash[2:]
+
+def store_object(source_path, content_hash):
+    """Copies a file into the store once; identical content is never stored twice."""
+    target = object_path(content_hash)
+    if target.exists():
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(".tmp")
+    shutil.copy2(source_path, tmp_path)
+    os.replace(tmp_path, target)
+    return True
+
+# --- Commands
+
+def create_snapshot(source_dir=SOURCE_DIR, label=None):
+    """
+    Records every file under `source_dir` as a manifest of content hashes.
+    Files whose size and mtime match the hash cache are not re-read, so a
+    snapshot costs time proportional to what changed.
+    """
+    hash_cache = load_json(HASH_CACHE_PATH, {})
+    files = {}
+    new_objects = 0
+    rehashed = 0
+
+    for path in sorted(p for p in source_dir.rglob("*") if p.is_file()):
+        rel = path.relative_to(source_dir).as_posix()
+        stat = path.stat()
+        cached = hash_cache.get(rel)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            content_hash = cached["hash"]
+        else:
+            content_hash = file_hash(path)
+            hash_cache[rel] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash}
+            rehashed += 1
+
+        if store_object(path, content_hash):
+            new_objects += 1
+        files[rel] = {"hash": content_hash, "size": stat.st_size, "mode": stat.st_mode & 0o777}
+
+    # Forget cache entries for files that no longer exist
+    for rel in set(hash_cache) - set(files):
+        del hash_cache[rel]
+    save_json(hash_cache, HASH_CACHE_PATH)
+
+    snapshot_id = datetime.now().strftime("%Y%m%d_%H%M%S") + (f"_{label}" if label else "")
+    manifest = {
+        "id": snapshot_id,
+        "created_at": datetime.now().isoformat(),
+        "source": source_dir.relative_to(project_root).as_posix() if source_dir.is_relative_to(project_root) else str(source_dir),
+        "files": files,
+    }
+    save_json(manifest, SNAPSHOTS_DIR / f"{snapshot_id}.json")
+
+    print(f"✅ Snapshot {snapshot_id}: {len(files)} files, {rehashed} re-hashed, {new_objects} new objects stored")
+    return snapshot_id
+
+def list_snapshots():
+    snapshots = sorted(SNAPSHOTS_DIR.glob("*.json"))
+    for path in snapshots:
+        manifest = load_json(path, {})
+        total = sum(f["size"] for f in manifest.get("files", {}).values())
+        print(f"📸 {manifest.get('id', path.stem)}  {len(manifest.get('files', {}))} files  {total / 1e6:.1f} MB")
+    if not snapshots:
+        print("📂 No snapshots yet.")
+    return [p.stem for p in snapshots]
+
+def restore_snapshot(snapshot_id, target_dir=None, prune=False):
+    """
+    Rebuilds a snapshot's files into `target_dir` (defaults to the source it
+    was taken from). Only files whose content differs are rewritten; with
+    `prune`, files not in the snapshot are deleted.
+    """
+    manifest_path = SNAPSHOTS_DIR / f"{snapshot_id}.json"
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"❌ Unknown snapshot: {snapshot_id}")
+    manifest = load_json(manifest_path, {})
+    target_dir = Path(target_dir) if target_dir else project_root / manifest["source"]
+
+    restored = 0
+    for rel, meta in manifest["files"].items():
+        target = target_dir / rel
+        if target.exists() and target.stat().st_size == meta["size"] and file_hash(target) == meta["hash"]:
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + ".restore")
+        shutil.copy2(object_path(meta["hash"]), tmp_path)
+        os.chmod(tmp_path, meta["mode"])
+        os.replace(tmp_path, target)
+        restored += 1
+
+    pruned = 0
+    if prune:
+        for path in [p for p in target_dir.rglob("*") if p.is_file()]:
+            if path.relative_to(target_dir).as_posix() not in manifest["files"]:
+                path.unlink()
+                pruned += 1
+
+    print(f"✅ Restored {snapshot_id} into {target_dir}: {restored} files written, {pruned} pruned")
+
+def garbage_collect():
+    """Deletes stored objects no snapshot references any more."""
+    referenced = set()
+    for path in SNAPSHOTS_DIR.glob("*.json"):
+        referenced.update(f["hash"] for f in load_json(path, {}).get("files", {}).values())
+
+    removed = 0
+    for path in OBJECTS_DIR.glob("*/*"):
+        if path.parent.name + path.name not in referenced:
+            path.unlink()
+            removed += 1
+    print(f"🧹 Removed {removed} unreferenced objects")
+
+# --- Entry point
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-addressed snapshots of the public folder")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    create = sub.add_parser("create", help="Take a snapshot of public/")
+    create.add_argument("--label", type=str, help="Suffix for the snapshot id")
+
+    sub.add_parser("list", help="List snapshots")
+
+    restore = sub.add_parser("restore", help="Rebuild a snapshot")
+    restore.add_argument("snapshot_id")
+    restore.add_argument("--target", type=str, help="Directory to restore into (default: original source)")
+    restore.add_argument("--prune", action="store_true", help="Delete files that are not in the snapshot")
+
+    sub.add_parser("gc", help="Delete objects no snapshot references")
+
+    args = parser.parse_args()
+
+    if args.command == "create":
+        create_snapshot(label=args.label)
+    elif args.command == "list":
+        list_snapshots()
+    elif args.command == "restore":
+        restore_snapshot(args.snapshot_id, target_dir=args.target, prune=args.prune)
+    elif args.command == "gc":
+        garbage_collect()
@@ -1,24 +1,15 @@
 # src/test/test_generate_one_image.py
 
-import json
-from pathlib import Path
 from src.scripts.generate_images_for_pending import generate_timeguessr_image
+from src.utils.jsonl_journal import pending_events_journal
 
-# Load the first event from pending_events.json
-pending_path = Path("src/data/pending_events.json")
+# Load the first event from the pending events journal
+event = next(iter(pending_events_journal), None)
 
-if not pending_path.exists():
-    print("❌ No pending_events.json found.")
+if event is None:
+    print("❌ No events found in pending_events.jsonl.")
     exit(1)
 
-with open(pending_path, "r", encoding="utf-8") as f:
-    events = json.load(f)
-
-if not events:
-    print("❌ No events found in pending_events.json.")
-    exit(1)
-
-event = events[0]
 print(f"🎯 Generating image for: {event['title']}")
 
 try:
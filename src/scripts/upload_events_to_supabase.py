@@ -1,8 +1,15 @@
 import json
 import os
+import sys
 from pathlib import Path
+
+# ⬇️ Add the project root to Python's import path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(project_root))
+
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from src.utils.supabase_batch import bulk_upsert
 
 print("🔧 Script started...")
 
@@ -28,22 +35,17 @@ events_path = Path("src/data/events.json")
 with open(events_path, "r") as f:
     events = json.load(f)
 
-# Insert or upsert each event (by slug)
-inserted = 0
+# Skip rows without a slug, then upsert the rest in chunks (by slug)
+rows = []
 for event in events:
-    slug = event.get("slug")
-    if not slug:
+    if not event.get("slug"):
         print("⚠️ Missing slug, skipping:", event.get("title"))
         continue
+    rows.append(event)
 
-    # Upsert by slug to avoid duplicates
-    response = supabase.table("events").upsert(event, on_conflict="slug").execute()
-
-    print(f"📦 Response for {slug}: {response}")
-    if hasattr(response, "error") and response.error:
-        print(f"❌ Error inserting {slug}: {response.error}")
-    else:
-        inserted += 1
+uploaded, failed = bulk_upsert(supabase, "events", rows, on_conflict="slug")
+for event, error in failed:
+    print(f"❌ Error inserting {event.get('slug')}: {error}")
 
 print(f"📄 Loaded {len(events)} events from file.")
-print(f"✅ Uploaded {inserted} events to Supabase.")
\ No newline at end of file
+print(f"✅ Uploaded {len(uploaded)} events to Supabase ({len(failed)} failed).")
\ No newline at end of file
@@ -0,0 +1,161 @@
+# src/utils/era_index.py
+
+import math
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# --- Paths
+project_root = Path(__file__).resolve().parent.parent.parent
+ERAS_CSV_PATH = project_root / "src/data/eras_rows.csv"
+
+UNKNOWN_ERA = {"era": "Unknown", "era_id": None}
+FALLBACK_REGION = "General"
+
+def to_year(value) -> float:
+    """
+    A year as a float, or NaN when it is missing or not numeric. Numeric
+    strings ("1500", " -44 ") count as years. match() and match_many() both
+    go through this, so they agree on every input.
+    """
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    try:
+        return float(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        return math.nan
+
+# --- Validation
+
+def check_gaps_and_overlaps(df: pd.DataFrame) -> list:
+    """Returns a message per gap or overlap between eras of the same region and country."""
+    problems = []
+    for (region, country), group in df.groupby(["region", "country"]):
+        previous_end = None
+        for start, end in group.sort_values("start")[["start", "end"]].itertuples(index=False):
+            if previous_end is not None:
+                if start > previous_end + 1:
+                    problems.append(f"⛔ Gap in {region} - {country}: {previous_end+1} to {start-1}")
+                elif start <= previous_end:
+                    problems.append(f"⚠️ Overlap in {region} - {country}: {previous_end} to {start}")
+            previous_end = end
+    return problems
+
+# --- Index
+
+class EraIndex:
+    """
+    Compiled era lookup. The timeline is cut into elementary segments at
+    every era boundary; for each segment and region the matching era
+    (first CSV row covering it, as the old DataFrame filter picked) is
+    precomputed. A lookup is one bisect plus up to three array reads:
+    the event's region, then "General", then any region.
+    """
+
+    def __init__(self, eras_df: pd.DataFrame, validate: bool = True):
+        df = eras_df.reset_index(drop=True).copy()
+        df["start"] = df["start"].astype(int)
+        df["end"] = df["end"].astype(int)
+
+        # Reported by the entry points that care (see __main__ below), never on import
+        self.problems = check_gaps_and_overlaps(df) if validate else []
+
+        self.labels = df["label"].tolist()
+        self.ids = [int(i) for i in df["id"]]
+
+        # Segment i covers [boundaries[i], boundaries[i + 1])
+        self.boundaries = np.unique(np.concatenate([df["start"].to_numpy(), df["end"].to_numpy() + 1]))
+        self._boundary_list = self.boundaries.tolist()
+        seg_starts = self.boundaries[:-1]
+
+        starts = df["start"].to_numpy()
+        ends = df["end"].to_numpy()
+        # covers[row, seg]: era row spans the whole segment (segments never straddle a boundary)
+        covers = (starts[:, None] <= seg_starts[None, :]) & (ends[:, None] >= seg_starts[None, :])
+
+        self.any_table = self._first_rows(covers)
+        self.tables = {
+            region: self._first_rows(covers, rows)
+            for region, rows in df.groupby("region").indices.items()
+        }
+
+    @staticmethod
+    def _first_rows(covers, rows=None):
+        """Per segment, the lowest row index (CSV order) that covers it, or -1."""
+        if rows is None:
+            rows = np.arange(covers.shape[0])
+        subset = covers[rows]
+        if subset.shape[0] == 0:
+            return np.full(covers.shape[1], -1)
+        return np.where(subset.any(axis=0), rows[subset.argmax(axis=0)], -1)
+
+    @classmethod
+    def from_csv(cls, path=ERAS_CSV_PATH, validate: bool = True):
+        return cls(pd.read_csv(path), validate=validate)
+
+    def _tables_for(self, region) -> list:
+        """Lookup order for a region: its own eras, then "General", then any."""
+        tables = [self.tables.get(region), self.tables.get(FALLBACK_REGION), self.any_table]
+        return [t for t in tables if t is not None]
+
+    def _row_for(self, segment: int, region) -> int:
+        for table in self._tables_for(region):
+            if table[segment] >= 0:
+                return int(table[segment])
+        return -1
+
+    def _as_match(self, row: int) -> dict:
+        if row < 0:
+            return dict(UNKNOWN_ERA)
+        return {"era": self.labels[row], "era_id": self.ids[row]}
+
+    def match(self, year, region) -> dict:
+        """Era for one event: {"era": label, "era_id": id}."""
+        year = to_year(year)
+        if not math.isfinite(year):
+            return dict(UNKNOWN_ERA)
+        segment = bisect_right(self._boundary_list, year) - 1
+        if segment < 0 or segment >= len(self._boundary_list) - 1:
+            return dict(UNKNOWN_ERA)
+        return self._as_match(self._row_for(segment, region))
+
+    def match_many(self, years, regions) -> list:
+        """
+        Vectorised match for many events at once; returns one dict per
+        event, identical to calling match() on each.
+        """
+        years = np.array([to_year(year) for year in years], dtype=float)
+        regions = pd.Series(regions, dtype="object")
+
+        valid = np.isfinite(years)
+        segments = np.searchsorted(self.boundaries, np.where(valid, years, 0), side="right") - 1
+        valid &= (segments >= 0) & (segments < len(self.boundaries) - 1)
+        segments = np.clip(segments, 0, max(len(self.boundaries) - 2, 0))
+
+        rows = np.full(len(years), -1)
+        codes, uniques = pd.factorize(regions, use_na_sentinel=False)
+        for code, region in enumerate(uniques):
+            mask = valid & (codes == code)
+            for table in self._tables_for(region):
+                pending = mask & (rows < 0)
+                if not pending.any():
+                    break
+                rows[pending] = table[segments[pending]]
+
+        return [self._as_match(int(row)) for row in rows]
+
+_default_index = None
+
+def get_era_index() -> EraIndex:
+    """Index over src/data/eras_rows.csv, compiled on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = EraIndex.from_csv()
+    return _default_index
+
+# --- Entry point
+if __name__ == "__main__":
+    index = EraIndex.from_csv()
+    print("\n".join(index.problems) if index.problems else "✅ No gaps or overlaps detected!")
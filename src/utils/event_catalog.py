@@ -0,0 +1,209 @@
+# src/utils/event_catalog.py
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from src.data.theme_lookup import theme_lookup
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+EVENTS_PATH = project_root / "public/data/events.json"
+# Row versions are build output: written only by src/scripts/build_game_catalog.py
+VERSIONS_PATH = project_root / "public/data/catalog/versions.json"
+
+# --- The game's view of an event
+
+def parse_list(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return []
+    return value if isinstance(value, list) else []
+
+def parse_coords(value):
+    if isinstance(value, str):
+        value = json.loads(value) if value.strip().startswith("[") else value.split(",")
+    try:
+        return [round(float(value[0]), 4), round(float(value[1]), 4)]
+    except (TypeError, ValueError, IndexError):
+        return [0, 0]
+
+def normalize_event(event: dict) -> dict:
+    """
+    The fields the game reads (TimeGuessrGame.jsx), in the exact shape the
+    static catalog decodes to (src/utils/gameCatalog.js): parsed lists,
+    rounded coords, theme label + theme_lookup id, empty strings as null
+    and the default image URL filled in. Delta rows use the same shape.
+    Idempotent, so normalized events can be normalized again.
+    """
+    slug = event.get("slug")
+    theme = (event.get("theme") or "").strip().lower()
+    theme_id = theme_lookup.get(theme, event.get("theme_id"))
+    era_id = event.get("era_id")
+
+    normalized = {
+        "id": event.get("id"),
+        "title": event.get("title"),
+        "slug": slug,
+        "year": event.get("year"),
+        "coords": parse_coords(event.get("coords")),
+        "theme": (theme or None) if theme_id is not None else None,
+        "theme_id": theme_id,
+        "era": (event.get("era") or None) if era_id is not None else None,
+        "era_id": era_id,
+        "region": event.get("region") or None,
+        "broad_era": event.get("broad_era") or None,
+        "notable_location": event.get("notable_location") or None,
+        "image_url": event.get("image_url") or f"/images/{slug}.jpg",
+        "caption": event.get("caption") or None,
+        "wiki_url": event.get("wiki_url") or None,
+        "country": event.get("country") or None,
+        "city": event.get("city") or None,
+        "difficulty": event.get("difficulty"),
+        "curriculum_tags": parse_list(event.get("curriculum_tags")),
+        "curriculum_theme_ids": parse_list(event.get("curriculum_theme_ids")),
+    }
+    if event.get("image_variants"):
+        normalized["image_variants"] = event["image_variants"]
+    return normalized
+
+def row_hash(event: dict) -> str:
+    body = json.dumps(normalize_event(event), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+
+# --- Version bookkeeping (written by the catalog build only)
+
+def unbuilt_rows(events, versions: dict) -> list:
+    """Slugs whose content is not what the last catalog build stamped (new or changed since)."""
+    rows = versions["rows"]
+    return [e["slug"] for e in events if rows.get(e["slug"], {}).get("hash") != row_hash(e)]
+
+def load_versions(path=VERSIONS_PATH) -> dict:
+    if not Path(path).exists():
+        return {"version": 0, "rows": {}, "removed": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def record_versions(events, path=VERSIONS_PATH) -> int:
+    """
+    Compares each event's content hash with the last build and stamps the
+    added or changed rows (and removed slugs) with a new catalog version.
+    The version only moves when something changed, so rebuilding an
+    unchanged export keeps every client's `since` valid.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # fetch_all_events and insert_processed_events may both build: one at a time
+    with open(path.with_suffix(".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            return _record_versions(events, path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _record_versions(events, path) -> int:
+    state = load_versions(path)
+    next_version = state["version"] + 1
+    rows, removed = state["rows"], state["removed"]
+    changed = 0
+
+    seen = set()
+    for event in events:
+        slug = event["slug"]
+        seen.add(slug)
+        digest = row_hash(event)
+        if rows.get(slug, {}).get("hash") != digest:
+            rows[slug] = {"hash": digest, "version": next_version}
+            removed.pop(slug, None)
+            changed += 1
+
+    for slug in set(rows) - seen:
+        del rows[slug]
+        removed[slug] = next_version  # Tombstones are kept so old clients can catch up
+        changed += 1
+
+    if changed:
+        state["version"] = next_version
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+        print(f"🔢 Catalog version {next_version}: {changed} rows added, changed or removed")
+    return state["version"]
+
+# --- Delta reads (served by /api/events)
+
+class EventCatalog:
+    """
+    In-memory view of events.json plus the row versions, reloaded only when
+    either file's mtime changes. delta(since) returns what a client holding
+    version `since` needs to catch up. The catalog never writes: versions
+    come from the last build, and rows that build has not stamped yet are
+    left out until build_game_catalog.py runs again.
+    """
+
+    def __init__(self, events_path=EVENTS_PATH, versions_path=VERSIONS_PATH):
+        self.events_path = Path(events_path)
+        self.versions_path = Path(versions_path)
+        self._mtimes = None
+        self._state = None
+        self._lock = threading.Lock()
+
+    def _mtimes_now(self):
+        versions_mtime = self.versions_path.stat().st_mtime_ns if self.versions_path.exists() else None
+        return (self.events_path.stat().st_mtime_ns, versions_mtime)
+
+    def _refresh(self):
+        mtimes = self._mtimes_now()
+        if mtimes == self._mtimes:
+            return self._state
+        with open(self.events_path, "r", encoding="utf-8") as f:
+            events = [normalize_event(e) for e in json.load(f)]
+        versions = load_versions(self.versions_path)
+        rows = versions["rows"]
+
+        unbuilt = unbuilt_rows(events, versions)
+        if unbuilt:
+            unversioned = sum(1 for slug in unbuilt if slug not in rows)
+            print(f"⚠️ {len(unbuilt)} events changed since the last catalog build "
+                  f"({unversioned} without a version are not served); run src/scripts/build_game_catalog.py")
+
+        # Newest first, so a delta is a prefix of this list
+        stamped = sorted(
+            ((rows[e["slug"]]["version"], e) for e in events if e["slug"] in rows),
+            key=lambda pair: -pair[0],
+        )
+        self._state = {"version": versions["version"], "events": stamped, "removed": versions["removed"]}
+        self._mtimes = mtimes
+        return self._state
+
+    def snapshot(self) -> dict:
+        """The current {version, events: [(row_version, event)], removed}; replaced, never mutated."""
+        with self._lock:
+            return self._refresh()
+
+    def delta(self, since=None) -> dict:
+        state = self.snapshot()
+
+        version = state["version"]
+        # No version, or one from a catalog that has since been reset: send everything
+        full = since is None or since <= 0 or since > version
+        if full:
+            events = [event for _, event in state["events"]]
+            removed = []
+        else:
+            events = []
+            for row_version, event in state["events"]:
+                if row_version <= since:
+                    break
+                events.append(event)
+            removed = [slug for slug, v in state["removed"].items() if v > since]
+
+        return {"version": version, "since": None if full else since, "full": full, "events": events, "removed": removed}
+
+event_catalog = EventCatalog()
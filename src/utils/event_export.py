@@ -0,0 +1,120 @@
+# src/utils/event_export.py
+
+import json
+import os
+from pathlib import Path
+
+# Shared by src/scripts/fetch_all_events.py and insert_processed_events.py.
+# Importing this module has no side effects: callers pass their own client.
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+PAGE_SIZE = 1000  # Must not exceed the PostgREST max-rows setting
+
+# Written by src/scripts/build_image_derivatives.py
+IMAGE_MANIFEST_PATH = project_root / "public/images/derived/manifest.json"
+
+# --- Reading events
+
+def normalize_coords(events):
+    """
+    Ensures coords field is parsed as [lat, lng] array of floats.
+    Handles both JSON-style and CSV-style strings.
+    Validates that both values are real numbers.
+    """
+    for event in events:
+        raw = event.get("coords")
+        coords = [0.0, 0.0]
+
+        try:
+            if isinstance(raw, str):
+                if raw.strip().startswith("["):
+                    coords = json.loads(raw)
+                else:
+                    parts = raw.split(",")
+                    coords = [float(parts[0].strip()), float(parts[1].strip())]
+            elif isinstance(raw, list):
+                coords = [float(raw[0]), float(raw[1])]
+        except Exception as e:
+            print(f"⚠️ Failed to parse coords for event: {event.get('title', 'Unknown')} → {e}")
+            coords = [0.0, 0.0]
+
+        # Final validation step
+        if len(coords) != 2 or any(not isinstance(x, (float, int)) or x != x for x in coords):
+            print(f"⚠️ Invalid coord values for {event.get('title', 'Unknown')}: {coords}")
+            coords = [0.0, 0.0]
+
+        event["coords"] = coords
+
+    return events
+
+def iter_events(client, page_size=PAGE_SIZE):
+    """
+    Yields every event, keyset-paginated by id so the export never hits the
+    PostgREST row cap and only one page is held in memory at a time.
+    """
+    last_id = None
+
+    while True:
+        query = client.table("events").select("*").order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.execute().data or []
+
+        yield from normalize_coords(page)
+
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+# --- Responsive image sets
+
+def load_image_manifest(path=IMAGE_MANIFEST_PATH):
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def attach_image_variants(events, manifest=None):
+    """
+    Adds the responsive image set (widths × formats + blur placeholder) from
+    the derivative manifest to each exported event that has one.
+    """
+    manifest = load_image_manifest() if manifest is None else manifest
+    for event in events:
+        entry = manifest.get(event.get("slug"))
+        if entry:
+            event["image_variants"] = {
+                "width": entry["width"],
+                "height": entry["height"],
+                "sources": entry["variants"],
+                "placeholder": entry["placeholder"],
+            }
+        yield event
+
+# --- Writing the export
+
+def write_events_json(events, path):
+    """
+    Streams events into a JSON array, one compact row per line, then swaps the
+    file into place so readers never see a half-written export.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    count = 0
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for event in events:
+            f.write(",\n" if count else "\n")
+            json.dump(event, f, ensure_ascii=False)
+            count += 1
+        f.write("\n]\n")
+
+    if count == 0:
+        tmp_path.unlink()
+        raise Exception("❌ No events fetched from Supabase — keeping the previous export.")
+
+    os.replace(tmp_path, path)
+    return count
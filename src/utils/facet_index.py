@@ -0,0 +1,124 @@
+# src/utils/facet_index.py
+
+import threading
+
+from src.data.theme_lookup import theme_lookup
+from src.utils.event_catalog import event_catalog
+
+# Filter name in API payloads → indexed facet
+FILTER_FACETS = {"themes": "theme", "broad_eras": "broad_era", "regions": "region"}
+CURRICULUM_FACET = "curriculum_tags"
+
+def iter_bits(mask: int):
+    """Positions of the set bits of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def theme_id(value):
+    """theme_lookup id for a theme label or id (as int or numeric string)."""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    return int(value) if value.isdigit() else theme_lookup.get(value.lower())
+
+class FacetIndex:
+    """
+    Inverted index over the catalog: one bitset (a Python int, bit i =
+    catalog position i) per theme id, broad era, region and curriculum
+    tag. A filter is an OR of bitsets within a facet and an AND across
+    facets, and a count is a popcount, so neither touches the events.
+    """
+
+    def __init__(self, events: list, version: int = 0):
+        self.events = events
+        self.version = version
+        self.all = (1 << len(events)) - 1
+        self.positions = {e["slug"]: i for i, e in enumerate(events)}
+        self.facets = {facet: {} for facet in [*FILTER_FACETS.values(), CURRICULUM_FACET]}
+
+        for i, event in enumerate(events):
+            bit = 1 << i
+            values = {
+                "theme": [theme_id(event["theme"]) if event.get("theme") else event.get("theme_id")],
+                "broad_era": [event.get("broad_era")],
+                "region": [event.get("region")],
+                CURRICULUM_FACET: event.get("curriculum_tags") or [],
+            }
+            for facet, facet_values in values.items():
+                index = self.facets[facet]
+                for value in facet_values:
+                    if value is not None and value != "":
+                        index[value] = index.get(value, 0) | bit
+
+    def facet_mask(self, facet: str, values) -> int:
+        if facet == "theme":
+            values = [theme_id(v) for v in values]
+        mask = 0
+        for value in values:
+            mask |= self.facets[facet].get(value, 0)
+        return mask
+
+    def match(self, filters: dict = None, curriculum_key: str = None) -> int:
+        # A curriculum key takes precedence over the manual filters, as in the game
+        if curriculum_key:
+            return self.facets[CURRICULUM_FACET].get(curriculum_key, 0)
+        mask = self.all
+        for key, facet in FILTER_FACETS.items():
+            values = (filters or {}).get(key)
+            if values:
+                mask &= self.facet_mask(facet, values)
+        return mask
+
+    def mask_of(self, slugs) -> int:
+        mask = 0
+        for slug in slugs:
+            i = self.positions.get(slug)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def counts(self, filters: dict = None, curriculum_key: str = None) -> dict:
+        """
+        Events matching the selection, plus for every facet value how many
+        would match with that value selected, given the other facets'
+        selections (so values leading to an empty game can be disabled).
+        Curriculum counts ignore the manual filters, as curriculum mode does.
+        """
+        filters = filters or {}
+        selected = {
+            facet: self.facet_mask(facet, filters[key]) if filters.get(key) else self.all
+            for key, facet in FILTER_FACETS.items()
+        }
+
+        facets = {}
+        for facet in FILTER_FACETS.values():
+            others = self.all
+            for other, mask in selected.items():
+                if other != facet:
+                    others &= mask
+            facets[facet] = {str(value) if facet == "theme" else value: (others & bits).bit_count()
+                             for value, bits in self.facets[facet].items()}
+        facets[CURRICULUM_FACET] = {tag: bits.bit_count() for tag, bits in self.facets[CURRICULUM_FACET].items()}
+
+        return {
+            "version": self.version,
+            "total": self.match(filters, curriculum_key).bit_count(),
+            "facets": facets,
+            "themes": {str(i): label for label, i in theme_lookup.items()},
+        }
+
+# --- Shared index over the served catalog
+
+_lock = threading.Lock()
+_cached = {"source": None, "index": None}
+
+def get_facet_index(catalog=event_catalog) -> FacetIndex:
+    """The facet index of the catalog's current snapshot, rebuilt when the catalog reloads."""
+    snapshot = catalog.snapshot()
+    with _lock:
+        if snapshot is not _cached["source"]:
+            _cached["index"] = FacetIndex([event for _, event in snapshot["events"]], snapshot["version"])
+            _cached["source"] = snapshot
+        return _cached["index"]
@@ -0,0 +1,120 @@
+// src/utils/gameCatalog.js
+// Loads the slim catalog written by src/scripts/build_game_catalog.py and
+// rebuilds the event objects the game expects. Falls back to events.json
+// when no catalog has been built.
+//
+// The decoded events are kept in localStorage with their catalog version;
+// repeat visits only ask /api/events for what changed since then.
+
+const CATALOG_DIR = "/data/catalog";
+const CACHE_KEY = "eventCatalog";
+const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+
+function decodeCatalog({ columns, dictionaries, rows }) {
+  const lookup = (column, id) => (id == null ? null : dictionaries[column][id]);
+
+  return rows.map((row) => {
+    const event = {};
+    columns.forEach((column, i) => {
+      event[column] = row[i];
+    });
+
+    event.theme_id = event.theme;
+    event.theme = dictionaries.theme[event.theme] ?? null;
+    event.era = event.era_id != null ? dictionaries.era[event.era_id] ?? null : null;
+    event.region = lookup("region", event.region);
+    event.broad_era = lookup("broad_era", event.broad_era);
+    event.curriculum_tags = event.curriculum_tags.map((id) => lookup("curriculum_tags", id));
+    event.curriculum_theme_ids = event.curriculum_theme_ids.map((id) => lookup("curriculum_theme_ids", id));
+    event.image_url = event.image_url ?? `/images/${event.slug}.jpg`;
+    if (event.image_variants == null) delete event.image_variants;
+    return event;
+  });
+}
+
+function readCache() {
+  try {
+    const cached = JSON.parse(localStorage.getItem(CACHE_KEY));
+    return cached && Array.isArray(cached.events) ? cached : null;
+  } catch {
+    return null;
+  }
+}
+
+function writeCache(cache) {
+  try {
+    localStorage.setItem(CACHE_KEY, JSON.stringify(cache));
+  } catch (err) {
+    console.warn("Could not cache the event catalog:", err);
+  }
+}
+
+function applyDelta(cache, delta) {
+  if (delta.full) {
+    return { version: delta.version, etag: cache.etag, events: delta.events };
+  }
+  const bySlug = new Map(cache.events.map((e) => [e.slug, e]));
+  delta.removed.forEach((slug) => bySlug.delete(slug));
+  delta.events.forEach((e) => bySlug.set(e.slug, e));
+  return { version: delta.version, etag: cache.etag, events: [...bySlug.values()] };
+}
+
+async function refreshFromApi(cache) {
+  const res = await fetch(`${API_BASE}/api/events?since=${cache.version}`, {
+    headers: cache.etag ? { "If-None-Match": cache.etag } : {},
+  });
+  if (res.status === 304) return cache;
+  if (!res.ok) throw new Error(`events ${res.status}`);
+  const updated = applyDelta(cache, await res.json());
+  updated.etag = res.headers.get("ETag");
+  writeCache(updated);
+  return updated;
+}
+
+async function loadFullCatalog() {
+  try {
+    // The manifest is tiny and always revalidated; the hashed file it names can be cached forever
+    const manifest = await fetch(`${CATALOG_DIR}/manifest.json`, { cache: "no-cache" }).then((res) => {
+      if (!res.ok) throw new Error(`manifest ${res.status}`);
+      return res.json();
+    });
+    const res = await fetch(`${CATALOG_DIR}/${manifest.file}`);
+    if (!res.ok) throw new Error(`catalog ${res.status}`);
+    const catalog = await res.json();
+    const cache = { version: catalog.catalog_version, etag: null, events: decodeCatalog(catalog) };
+    if (cache.version) writeCache(cache);
+    return cache;
+  } catch (err) {
+    console.warn("Game catalog unavailable, loading events.json:", err);
+    const res = await fetch("/data/events.json");
+    return { version: null, etag: null, events: await res.json() };
+  }
+}
+
+let pending = null;
+
+async function loadEvents() {
+  const cached = readCache();
+  if (cached?.version) {
+    try {
+      return (await refreshFromApi(cached)).events;
+    } catch (err) {
+      console.warn("Event catalog delta unavailable, using the cached catalog:", err);
+      return cached.events;
+    }
+  }
+  const cache = await loadFullCatalog();
+  if (cache.version) {
+    // The static catalog may lag the server by a build; catch up in the background
+    refreshFromApi(cache).catch(() => {});
+  }
+  return cache.events;
+}
+
+// Concurrent callers (e.g. a remount during the first load) share one request
+export function loadGameEvents() {
+  pending ??= loadEvents().finally(() => {
+    pending = null;
+  });
+  return pending;
+}
@@ -0,0 +1,164 @@
+# src/utils/jsonl_journal.py
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+class EventJournal:
+    """
+    Append-only JSONL queue of events keyed by slug. Every change is one
+    fsync'd line ({"op": "put", "event": {...}} or {"op": "del", "key": ...}),
+    so adding an event costs O(1) I/O and a crash can at worst tear the last
+    line, which readers skip. compact() rewrites the journal down to the
+    live events. Writers (append, compact, migration) hold an fcntl lock on
+    a *.lock file next to the journal, so separate processes (the generator
+    and the image/insert scripts) never interleave with a rewrite.
+
+    If the journal does not exist yet but the old JSON list (`legacy_path`)
+    does, it is imported once and the JSON file renamed to *.migrated.
+    """
+
+    def __init__(self, path, legacy_path=None, key="slug"):
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.key = key
+        self.lock = threading.Lock()
+        self.lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access for writers, across threads and processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock, open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Reading
+
+    def _records(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ Skipping unreadable line {line_number} in {self.path.name} (interrupted write?)")
+
+    def load(self) -> dict:
+        """Replays the journal into {key: event}, in insertion order."""
+        self._migrate_legacy()
+        return self._replay()
+
+    def _replay(self) -> dict:
+        events = {}
+        for record in self._records():
+            if record.get("op") == "del":
+                events.pop(record.get("key"), None)
+            elif record.get("op") == "put":
+                event = record["event"]
+                events.pop(event[self.key], None)  # A re-put moves the event to the end
+                events[event[self.key]] = event
+        return events
+
+    def __iter__(self):
+        return iter(self.load().values())
+
+    def keys(self) -> set:
+        return set(self.load())
+
+    # --- Writing
+
+    def _append(self, records):
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with self._locked():
+            with open(self.path, "ab") as f:
+                # Start on a fresh line if a previous write was cut short
+                if f.tell() > 0 and not self._ends_with_newline():
+                    f.write(b"\n")
+                f.write(payload.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def append(self, event: dict):
+        self._migrate_legacy()
+        self._append([{"op": "put", "event": event}])
+
+    def extend(self, events):
+        """Appends many events with a single fsync."""
+        self._migrate_legacy()
+        records = [{"op": "put", "event": e} for e in events]
+        if records:
+            self._append(records)
+
+    def remove(self, *keys):
+        self._migrate_legacy()
+        if keys:
+            self._append([{"op": "del", "key": k} for k in keys])
+
+    def compact(self) -> int:
+        """Rewrites the journal with only the live events. Returns how many remain."""
+        self._migrate_legacy()
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._locked():
+            # Replayed under the lock, so no append can land between read and rewrite
+            events = list(self._replay().values())
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps({"op": "put", "event": event}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        return len(events)
+
+    def _migrate_legacy(self):
+        if self.path.exists() or not self.legacy_path or not self.legacy_path.exists():
+            return
+        with self._locked():
+            if not self.path.exists() and self.legacy_path.exists():
+                self._import_legacy()
+
+    def _import_legacy(self):
+        with open(self.legacy_path, "r", encoding="utf-8") as f:
+            legacy_events = json.load(f)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for event in legacy_events:
+                f.write(json.dumps({"op": "put", "event": event}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.legacy_path.rename(self.legacy_path.with_suffix(self.legacy_path.suffix + ".migrated"))
+        print(f"📦 Migrated {len(legacy_events)} events from {self.legacy_path.name} to {self.path.name}")
+
+# --- Event queues used by the generation pipeline
+
+project_root = Path(__file__).resolve().parent.parent.parent
+
+pending_events_journal = EventJournal(
+    project_root / "src/data/pending_events.jsonl",
+    legacy_path=project_root / "src/data/pending_events.json",
+)
+processed_events_journal = EventJournal(
+    project_root / "src/data/processed_events.jsonl",
+    legacy_path=project_root / "src/data/processed_events.json",
+)
+
+# --- Entry point
+if __name__ == "__main__":
+    for journal in (pending_events_journal, processed_events_journal):
+        print(f"🧹 Compacted {journal.path.name}: {journal.compact()} live events")
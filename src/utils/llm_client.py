@@ -0,0 +1,208 @@
+# src/utils/llm_client.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+# --- Setup
+project_root = Path(__file__).resolve().parent.parent.parent
+load_dotenv(dotenv_path=project_root / ".env")
+
+CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", project_root / ".cache/llm_cache.sqlite3"))
+CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> OpenAI:
+    """One shared OpenAI client (and connection pool) for every agent and script."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.getenv("VITE_OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("❌ Missing OpenAI API Key. Make sure VITE_OPENAI_API_KEY is set in your environment.")
+            _client = OpenAI(api_key=api_key)
+        return _client
+
+# --- Response cache
+
+class ResponseCache:
+    """
+    Content-addressed SQLite cache of chat completions with size-bounded LRU
+    eviction. Keys hash model + messages + temperature (+ any extra params).
+    Hit/miss counters live in the same file, so they add up across runs.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(model, messages, temperature, **params):
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, **params},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            conn = self._connection()
+            row = conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+            self._count(conn, "hits" if row is not None else "misses")
+            conn.commit()
+            return row[0] if row is not None else None
+
+    @staticmethod
+    def _count(conn, name):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def delete(self, key):
+        with self.lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+
+    def put(self, key, model, content):
+        size = len(content.encode("utf-8"))
+        now = time.time()
+        with self.lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we're back under 90% of the budget
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used_at"):
+            stale.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self):
+        with self.lock:
+            conn = self._connection()
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        with self.lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM counters")
+            conn.commit()
+
+response_cache = ResponseCache()
+
+def _is_valid(content, validate) -> bool:
+    if validate is None:
+        return True
+    try:
+        return validate(content) is not False
+    except Exception:
+        return False
+
+def chat_completion(messages, model="gpt-4o", temperature=0.2, bypass_cache=None, cache=None, validate=None, **params) -> str:
+    """
+    Returns the assistant message content for a chat completion, replaying
+    it from the on-disk cache when the same request was made before.
+
+    cache: whether the request may be replayed at all. Defaults to
+        temperature == 0, since sampled generations (ideas, themes) are
+        meant to differ between requests; analysis calls pass cache=True.
+    validate: called with the content (e.g. the caller's JSON parser). A
+        response it rejects (raises or returns False) is never cached, and
+        a cached one it rejects is evicted and requested again.
+    bypass_cache: skip the cached copy (default: LLM_CACHE_BYPASS=1);
+        fresh responses still refresh the cache.
+    """
+    cacheable = temperature == 0 if cache is None else cache
+    bypass = CACHE_BYPASS if bypass_cache is None else bypass_cache
+    key = ResponseCache.make_key(model, messages, temperature, **params)
+
+    if cacheable and not bypass:
+        cached = response_cache.get(key)
+        if cached is not None:
+            if _is_valid(cached, validate):
+                return cached
+            response_cache.delete(key)
+
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        **params,
+    )
+    content = response.choices[0].message.content
+    if content and cacheable and _is_valid(content, validate):
+        response_cache.put(key, model, content)
+    return content or ""
+
+# --- Entry point
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the shared LLM response cache")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached response")
+    args = parser.parse_args()
+
+    if args.clear:
+        response_cache.clear()
+        print(f"🧹 Cleared {CACHE_PATH}")
+    print(json.dumps(response_cache.stats(), indent=2))
@@ -0,0 +1,259 @@
+# src/utils/performance_benchmarks.py
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.utils.supabase_batch import fetch_all_rows, fetch_rows_in
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+SNAPSHOT_PATH = project_root / "src/data/performance_benchmarks.json"
+SNAPSHOT_MAX_AGE_SECONDS = 300
+
+BENCHMARK_PERCENTILES = {
+    "top_10_percent": 10,
+    "top_25_percent": 25,
+    "average": 100,
+}
+
+RESULT_COLUMNS = "session_id, slug, distance, year_diff, time_to_guess"
+
+# --- Aggregation
+
+def is_perfect_guess(result):
+    return (
+        result.get("distance") is not None and result.get("year_diff") is not None
+        and result["distance"] <= 10 and abs(result["year_diff"]) <= 5
+    )
+
+class StatsAccumulator:
+    """Running sums for one player (or a merged cohort of players)."""
+
+    def __init__(self):
+        self.total_points = 0
+        self.total_events = 0
+        self.best_score = 0
+        self.result_count = 0
+        self.perfect_count = 0
+        self.distance_sum = 0
+        self.distance_count = 0
+        self.year_diff_sum = 0
+        self.year_diff_count = 0
+        self.time_sum = 0
+        self.time_count = 0
+        self.slug_attempts = Counter()
+
+    def add_session(self, session):
+        if session.get("total_points") is not None:
+            self.total_points += session["total_points"]
+            self.best_score = max(self.best_score, session["total_points"])
+        if session.get("total_events"):
+            self.total_events += session["total_events"]
+
+    def add_result(self, result):
+        self.result_count += 1
+        if is_perfect_guess(result):
+            self.perfect_count += 1
+        if result.get("distance") is not None:
+            self.distance_sum += result["distance"]
+            self.distance_count += 1
+        if result.get("year_diff") is not None:
+            self.year_diff_sum += abs(result["year_diff"])
+            self.year_diff_count += 1
+        if result.get("time_to_guess") is not None:
+            self.time_sum += result["time_to_guess"]
+            self.time_count += 1
+        if result.get("slug"):
+            self.slug_attempts[result["slug"]] += 1
+
+    def merge(self, other):
+        self.total_points += other.total_points
+        self.total_events += other.total_events
+        self.best_score = max(self.best_score, other.best_score)
+        self.result_count += other.result_count
+        self.perfect_count += other.perfect_count
+        self.distance_sum += other.distance_sum
+        self.distance_count += other.distance_count
+        self.year_diff_sum += other.year_diff_sum
+        self.year_diff_count += other.year_diff_count
+        self.time_sum += other.time_sum
+        self.time_count += other.time_count
+        self.slug_attempts.update(other.slug_attempts)
+
+    def to_metrics(self):
+        attempts = list(self.slug_attempts.values())
+        return {
+            "average_score": round(self.total_points / self.total_events) if self.total_events else 0,
+            "best_score": self.best_score,
+            "perfect_guess_pct": round(self.perfect_count / self.result_count * 100, 1) if self.result_count else 0,
+            "average_distance": round(self.distance_sum / self.distance_count, 1) if self.distance_count else None,
+            "average_year_diff": round(self.year_diff_sum / self.year_diff_count, 1) if self.year_diff_count else None,
+            "average_time_per_guess": round(self.time_sum / self.time_count, 1) if self.time_count else None,
+            "average_attempts": round(sum(attempts) / len(attempts), 2) if attempts else 0,
+        }
+
+def accumulate(sessions, results):
+    """Builds one StatsAccumulator per player from completed sessions and their results."""
+    session_owner = {s["id"]: s["player_name"] for s in sessions}
+    per_player = {}
+    for s in sessions:
+        per_player.setdefault(s["player_name"], StatsAccumulator()).add_session(s)
+    for r in results:
+        name = session_owner.get(r.get("session_id"))
+        if name is not None:
+            per_player[name].add_result(r)
+    return per_player
+
+def rank_players(sessions):
+    """Sorts players by their mean per-session average score, best first."""
+    session_averages = {}
+    for s in sessions:
+        if s.get("total_points") is not None and s.get("total_events"):
+            session_averages.setdefault(s["player_name"], []).append(s["total_points"] / s["total_events"])
+
+    ranking = [(name, sum(avgs) / len(avgs)) for name, avgs in session_averages.items()]
+    ranking.sort(key=lambda x: x[1], reverse=True)
+    return ranking
+
+# --- Snapshot build
+
+def fetch_completed_sessions(client, player_name=None):
+    def build_query():
+        query = client.table("sessions").select("id, player_name, total_points, total_events").eq("completed", True)
+        if player_name is not None:
+            query = query.eq("player_name", player_name)
+        return query.order("id")
+    return fetch_all_rows(build_query)
+
+def build_snapshot(client):
+    """
+    Computes every benchmark cohort, cutoff and per-player metric in one pass
+    over completed sessions and their results.
+    """
+    sessions = fetch_completed_sessions(client)
+    results = fetch_rows_in(client, "results", RESULT_COLUMNS, "session_id", [s["id"] for s in sessions])
+
+    per_player = accumulate(sessions, results)
+    ranking = rank_players(sessions)
+    player_count = len(ranking)
+
+    benchmarks = {}
+    cutoffs = {}
+    for key, percentile in BENCHMARK_PERCENTILES.items():
+        top_count = max(int(player_count * (percentile / 100.0)), 1)
+        cohort = ranking[:top_count]
+        if not cohort:
+            benchmarks[key] = None
+            cutoffs[key] = None
+            continue
+        merged = StatsAccumulator()
+        for name, _ in cohort:
+            merged.merge(per_player[name])
+        benchmarks[key] = merged.to_metrics()
+        cutoffs[key] = round(cohort[-1][1], 1)
+
+    ranks = {name: i + 1 for i, (name, _) in enumerate(ranking)}
+    players = {}
+    for name, acc in per_player.items():
+        rank = ranks.get(name)
+        players[name] = {
+            **acc.to_metrics(),
+            "rank": rank,
+            "top_percent": round(rank / player_count * 100, 1) if rank else None,
+        }
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "player_count": player_count,
+        "cutoffs": cutoffs,
+        "benchmarks": benchmarks,
+        "players": players,
+    }
+
+def compute_player_metrics(client, player_name):
+    """Live fallback for players who finished their first game after the last snapshot."""
+    sessions = fetch_completed_sessions(client, player_name=player_name)
+    results = fetch_rows_in(client, "results", RESULT_COLUMNS, "session_id", [s["id"] for s in sessions])
+    acc = accumulate(sessions, results).get(player_name, StatsAccumulator())
+    return {**acc.to_metrics(), "rank": None, "top_percent": None}
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def rebuild_snapshot(client, path=SNAPSHOT_PATH):
+    snapshot = build_snapshot(client)
+    save_snapshot(snapshot, path)
+    print(f"✅ Benchmark snapshot rebuilt for {snapshot['player_count']} ranked players → {path}")
+    return snapshot
+
+# --- Cached access (server side)
+
+_cache = {"snapshot": None, "mtime": None, "loaded_at": 0.0, "attempted_at": 0.0, "error": None}
+_cache_lock = threading.Lock()
+_rebuild_lock = threading.Lock()
+
+def _load_from_disk(path):
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return
+    if mtime == _cache["mtime"]:
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    with _cache_lock:
+        _cache.update(snapshot=snapshot, mtime=mtime, loaded_at=mtime)
+
+def _attempt_rebuild(client, path):
+    """One rebuild attempt, with _rebuild_lock held. Failures are kept in _cache["error"]."""
+    _cache["attempted_at"] = time.time()
+    try:
+        rebuild_snapshot(client, path)
+        _load_from_disk(path)
+        _cache["error"] = None
+    except Exception as e:
+        _cache["error"] = e
+        print(f"❌ Benchmark snapshot rebuild failed: {e}")
+
+def _rebuild_in_background(client, path):
+    if not _rebuild_lock.acquire(blocking=False):
+        return  # Another rebuild is already running
+    try:
+        _attempt_rebuild(client, path)
+    finally:
+        _rebuild_lock.release()
+
+def get_snapshot(client, path=SNAPSHOT_PATH, max_age=SNAPSHOT_MAX_AGE_SECONDS):
+    """
+    Returns the cached snapshot, picking up rebuilds written by other processes.
+    A stale snapshot is served as-is while a background thread refreshes it;
+    only a cold start with no snapshot on disk builds synchronously. Rebuilds
+    are attempted at most once per `max_age`, even when they fail, so an
+    outage does not turn every request into another full-table rebuild.
+    """
+    _load_from_disk(path)
+    now = time.time()
+    retry_due = now - _cache["attempted_at"] > max_age
+
+    if _cache["snapshot"] is None:
+        with _rebuild_lock:
+            _load_from_disk(path)
+            if _cache["snapshot"] is None:
+                if retry_due or _cache["error"] is None:
+                    _attempt_rebuild(client, path)
+                if _cache["snapshot"] is None:
+                    raise RuntimeError(f"Benchmark snapshot unavailable: {_cache['error']}")
+    elif now - _cache["loaded_at"] > max_age and retry_due and not _rebuild_lock.locked():
+        _cache["attempted_at"] = now  # Claimed before the thread starts, so concurrent requests skip it
+        threading.Thread(target=_rebuild_in_background, args=(client, path), daemon=True).start()
+
+    return _cache["snapshot"]
@@ -0,0 +1,228 @@
+# src/utils/player_rollups.py
+
+import copy
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.utils.supabase_batch import fetch_all_rows, fetch_rows_in
+
+# --- Paths / settings
+project_root = Path(__file__).resolve().parent.parent.parent
+ROLLUPS_DIR = project_root / "src/data/player_rollups"
+RECENT_SCORES_LIMIT = 10
+APPLIED_LIMIT = 100         # Sessions remembered by id per player for replay checks
+
+SESSION_COLUMNS = "id, player_name, total_points, total_events, completed, started_at, ended_at"
+RESULT_COLUMNS = "session_id, slug, distance, year_diff, time_to_guess"
+
+# --- Rollup records
+
+def empty_rollup():
+    return {
+        "applied": [],             # [session id, ended_at] of the latest applied sessions, oldest first
+        "applied_through": None,   # Latest ended_at among sessions dropped from `applied`
+        "total_games": 0,
+        "total_events": 0,
+        "total_points": 0,
+        "best_score": 0,
+        "result_count": 0,
+        "total_time": 0,
+        "perfect_count": 0,
+        "distance_sum": 0,
+        "year_diff_sum": 0,
+        "slugs": [],
+        "recent_scores": [],  # Ring buffer, oldest first
+    }
+
+def apply_session(rollup, session, results):
+    """
+    Folds one completed session and its results into a player's running sums.
+    Sessions already applied are ignored, so replays from the hook and the
+    nightly job are safe: recent ones by id, older ones because they ended
+    no later than `applied_through`. A session's ended_at is stamped when it
+    is finalized, so a late (nightly) finalization is always newer than that.
+    """
+    ended_at = session.get("ended_at")
+    if any(session_id == session["id"] for session_id, _ in rollup["applied"]) or (
+        ended_at and rollup["applied_through"] and ended_at <= rollup["applied_through"]
+    ):
+        return False
+
+    rollup["applied"].append([session["id"], ended_at])
+    for _, dropped_ended_at in rollup["applied"][:-APPLIED_LIMIT]:
+        if dropped_ended_at and dropped_ended_at > (rollup["applied_through"] or ""):
+            rollup["applied_through"] = dropped_ended_at
+    del rollup["applied"][:-APPLIED_LIMIT]
+
+    rollup["total_games"] += 1
+    rollup["total_events"] += session.get("total_events") or 0
+    rollup["total_points"] += session.get("total_points") or 0
+    rollup["best_score"] = max(rollup["best_score"], session.get("total_points") or 0)
+
+    if session.get("total_points") and session.get("total_events"):
+        rollup["recent_scores"].append(round(session["total_points"] / session["total_events"]))
+        del rollup["recent_scores"][:-RECENT_SCORES_LIMIT]
+
+    slugs = set(rollup["slugs"])
+    for r in results:
+        rollup["result_count"] += 1
+        rollup["total_time"] += r.get("time_to_guess") or 0
+        rollup["distance_sum"] += r.get("distance") or 0
+        rollup["year_diff_sum"] += abs(r.get("year_diff") or 0)
+        if (
+            r.get("distance") is not None and r.get("year_diff") is not None
+            and r["distance"] <= 10 and abs(r["year_diff"]) <= 5
+        ):
+            rollup["perfect_count"] += 1
+        if r.get("slug"):
+            slugs.add(r["slug"])
+    rollup["slugs"] = sorted(slugs)
+    return True
+
+def to_summary(player_name, rollup):
+    """Shapes a rollup into the /api/player-summary response."""
+    results = rollup["result_count"]
+    return {
+        "player_name": player_name,
+        "total_games": rollup["total_games"],
+        "total_events": rollup["total_events"],
+        "average_score": round(rollup["total_points"] / rollup["total_events"]) if rollup["total_events"] else 0,
+        "best_score": rollup["best_score"],
+        "total_play_time": rollup["total_time"],
+        "average_time_per_guess": round(rollup["total_time"] / results, 1) if results else 0,
+        "perfect_guess_rate": round(rollup["perfect_count"] / results * 100, 1) if results else 0,
+        "average_distance": round(rollup["distance_sum"] / results, 1) if results else 0,
+        "average_year_diff": round(rollup["year_diff_sum"] / results, 1) if results else 0,
+        "average_attempts": round(results / len(rollup["slugs"]), 2) if rollup["slugs"] else 0,
+        "recent_scores": list(rollup["recent_scores"]),
+    }
+
+# --- Store (one file per player, so an update only rewrites the players it touches)
+
+_cache = {}  # path → (mtime, rollup)
+
+def rollup_path(player_name, root=ROLLUPS_DIR):
+    digest = hashlib.sha256(player_name.encode("utf-8")).hexdigest()[:24]
+    return Path(root) / f"{digest}.json"
+
+def _write_rollup(path, player_name, rollup):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"player_name": player_name, **rollup}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+@contextmanager
+def locked_rollups(player_names, root=ROLLUPS_DIR):
+    """
+    Yields {player: rollup} for the players that already have one, under an
+    exclusive lock on the store, and writes back atomically only the given
+    players. Players added to the dict get a file; named players removed
+    from it lose theirs. The server hook and the nightly job never lose
+    updates.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    player_names = set(player_names)
+    with open(root / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            rollups = {}
+            for name in player_names:
+                rollup = load_rollup(name, root)
+                if rollup is not None:
+                    rollups[name] = rollup
+            yield rollups
+            for name in player_names:
+                path = rollup_path(name, root)
+                if name in rollups:
+                    _write_rollup(path, name, rollups[name])
+                else:
+                    path.unlink(missing_ok=True)
+                _cache.pop(path, None)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def load_rollup(player_name, root=ROLLUPS_DIR):
+    """A copy of the player's stored rollup, or None if there is none yet."""
+    path = rollup_path(player_name, root)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        record.pop("player_name", None)
+        cached = _cache[path] = (mtime, record)
+    return copy.deepcopy(cached[1])
+
+def get_rollup(player_name, root=ROLLUPS_DIR):
+    return load_rollup(player_name, root)
+
+# --- Updates from Supabase
+
+def _fetch_results(client, session_ids):
+    results_by_session = {}
+    for r in fetch_rows_in(client, "results", RESULT_COLUMNS, "session_id", session_ids):
+        results_by_session.setdefault(r["session_id"], []).append(r)
+    return results_by_session
+
+def apply_sessions(sessions, results_by_session, root=ROLLUPS_DIR):
+    """Applies already-fetched completed sessions to the store. Returns how many were new."""
+    sessions = [s for s in sessions if s.get("completed") and s.get("player_name")]
+    if not sessions:
+        return 0
+    applied = 0
+    with locked_rollups({s["player_name"] for s in sessions}, root) as rollups:
+        for s in sessions:
+            rollup = rollups.setdefault(s["player_name"], empty_rollup())
+            if apply_session(rollup, s, results_by_session.get(s["id"], [])):
+                applied += 1
+    return applied
+
+def record_finalized_sessions(client, session_ids, root=ROLLUPS_DIR):
+    """Finalize hook: folds the given sessions into their players' rollups."""
+    if not session_ids:
+        return 0
+    sessions = fetch_rows_in(client, "sessions", SESSION_COLUMNS, "id", session_ids)
+    sessions.sort(key=lambda s: s.get("started_at") or "")
+    return apply_sessions(sessions, _fetch_results(client, [s["id"] for s in sessions]), root)
+
+def rebuild_rollups(client, player_name=None, root=ROLLUPS_DIR):
+    """
+    Backfills rollups from history, for everyone or for a single player.
+    Existing records for the rebuilt players are replaced, not merged. A
+    single player without completed sessions gets an empty rollup, so the
+    backfill is not repeated on every visit.
+    """
+    def build_query():
+        query = client.table("sessions").select(SESSION_COLUMNS).eq("completed", True)
+        if player_name is not None:
+            query = query.eq("player_name", player_name)
+        return query.order("started_at").order("id")
+
+    sessions = fetch_all_rows(build_query)
+    results_by_session = _fetch_results(client, [s["id"] for s in sessions])
+
+    rebuilt = {}
+    for s in sessions:
+        if s.get("player_name"):
+            apply_session(rebuilt.setdefault(s["player_name"], empty_rollup()), s, results_by_session.get(s["id"], []))
+
+    if player_name is not None:
+        rebuilt.setdefault(player_name, empty_rollup())
+
+    with locked_rollups(rebuilt, root) as rollups:
+        rollups.update(rebuilt)
+        if player_name is None:
+            # Everyone was rebuilt: drop the records of players with no history left
+            keep = {rollup_path(name, root) for name in rebuilt}
+            for path in Path(root).glob("*.json"):
+                if path not in keep:
+                    path.unlink()
+    return rebuilt
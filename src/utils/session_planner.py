@@ -0,0 +1,114 @@
+# src/utils/session_planner.py
+
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.event_catalog import event_catalog
+from src.utils.facet_index import get_facet_index, iter_bits
+
+# --- Settings
+RECENT_LIMIT = 50           # Same window the game used to query per round
+RECENT_TTL_SECONDS = 600    # Re-read a player's recent results after this long
+RECENT_MAX_PLAYERS = 5000   # Least recently planned players are dropped past this
+MAX_PLAN_SIZE = 100
+
+class RecentSlugs:
+    """
+    Per-player set of recently played slugs. It is seeded from `results`
+    once per TTL and then kept current in memory: every planned event is
+    added as soon as it is handed out, so planning never re-queries
+    between rounds. At most `max_players` players are kept (least recently
+    used dropped first); a dropped player is simply re-seeded.
+    """
+
+    def __init__(self, limit=RECENT_LIMIT, ttl=RECENT_TTL_SECONDS, max_players=RECENT_MAX_PLAYERS):
+        self.limit = limit
+        self.ttl = ttl
+        self.max_players = max_players
+        self._players = OrderedDict()  # player → (loaded_at, [slug, ...] oldest first), LRU order
+        self._lock = threading.Lock()
+
+    def _store(self, player_name, entry):
+        self._players[player_name] = entry
+        self._players.move_to_end(player_name)
+        while len(self._players) > self.max_players:
+            self._players.popitem(last=False)
+
+    def get(self, client, player_name: str) -> list:
+        with self._lock:
+            cached = self._players.get(player_name)
+        if cached and time.time() - cached[0] < self.ttl:
+            return cached[1]
+
+        response = (
+            client.table("results").select("slug").eq("player_name", player_name)
+            .order("created_at", desc=True).limit(self.limit).execute()
+        )
+        slugs = [r["slug"] for r in reversed(response.data or [])]
+        with self._lock:
+            # Keep anything planned while the query was in flight
+            pending = self._players.get(player_name, (0, []))[1]
+            merged = list(dict.fromkeys([*slugs, *pending]))[-self.limit:]
+            self._store(player_name, (time.time(), merged))
+        return merged
+
+    def add(self, player_name: str, slugs):
+        with self._lock:
+            loaded_at, recent = self._players.get(player_name, (0, []))
+            slugs = list(slugs)
+            added = set(slugs)
+            recent = [s for s in recent if s not in added] + slugs
+            self._store(player_name, (loaded_at, recent[-self.limit:]))
+
+class SessionPlanner:
+    """Samples deduplicated session plans from the catalog's facet index (src/utils/facet_index.py)."""
+
+    def __init__(self, catalog=event_catalog):
+        self.catalog = catalog
+        self.recent = RecentSlugs()
+
+    @staticmethod
+    def _sample(mask: int, k: int) -> list:
+        positions = list(iter_bits(mask))
+        random.shuffle(positions)
+        return positions[:max(k, 0)]
+
+    def plan(self, client, player_name: str, count: int, filters: dict = None,
+             curriculum_key: str = None, exclude=()) -> dict:
+        """
+        Up to `count` events matching the filters (or curriculum key), leaving
+        out the player's recent slugs and `exclude`. When too few remain,
+        recently played events fill the rest and `repeats` is set. A plan is
+        only empty when nothing matches at all.
+        """
+        index = get_facet_index(self.catalog)
+        count = max(1, min(count, MAX_PLAN_SIZE))
+        matching = index.match(filters, curriculum_key)
+        seen = index.mask_of([*self.recent.get(client, player_name), *exclude])
+        fresh = matching & ~seen
+
+        picks = self._sample(fresh, count)
+        if len(picks) < count:
+            # Fall back to recently played events, then (when `exclude` has
+            # used up the whole selection) to this session's own events, as
+            # the game always did; never twice in one plan
+            picked = sum(1 << i for i in picks)
+            picks += self._sample(matching & ~index.mask_of(exclude) & ~picked, count - len(picks))
+            picked = sum(1 << i for i in picks)
+            picks += self._sample(matching & ~picked, count - len(picks))
+
+        events = [index.events[i] for i in picks]
+        self.recent.add(player_name, [e["slug"] for e in events])
+        return {
+            "version": index.version,
+            "matching": matching.bit_count(),
+            "available": fresh.bit_count(),
+            # Some events were played recently, or the selection is smaller than the plan
+            "repeats": len(events) < count or fresh.bit_count() < len(events),
+            "events": events,
+            "images": [e.get("image_url") or f"/images/{e['slug']}.jpg" for e in events],
+        }
+
+session_planner = SessionPlanner()
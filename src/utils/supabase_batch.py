@@ -0,0 +1,99 @@
+# src/utils/supabase_batch.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 1000      # PostgREST default max-rows
+IN_CHUNK_SIZE = 200   # Keeps `in_` filters well under URL length limits
+UPSERT_CHUNK_SIZE = 500
+UPSERT_WORKERS = 4
+
+def chunked(items, size):
+    """Yields successive lists of at most `size` items."""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def fetch_all_rows(build_query, page_size=PAGE_SIZE):
+    """
+    Pages through a PostgREST query with .range() until a short page comes back.
+    `build_query` must return a fresh, ordered query builder on every call.
+    """
+    rows = []
+    start = 0
+    while True:
+        response = build_query().range(start, start + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+def fetch_rows_in(client, table, columns, column, values, chunk_size=IN_CHUNK_SIZE, order="id"):
+    """
+    Fetches every row of `table` whose `column` is in `values`, splitting the
+    `in_` filter into chunks and paging each chunk past the row cap.
+    """
+    rows = []
+    for chunk in chunked(values, chunk_size):
+        rows.extend(fetch_all_rows(
+            lambda: client.table(table).select(columns).in_(column, chunk).order(order)
+        ))
+    return rows
+
+def bulk_upsert(client, table, rows, on_conflict="slug", chunk_size=UPSERT_CHUNK_SIZE, max_workers=UPSERT_WORKERS, **upsert_options):
+    """
+    Upserts `rows` in chunks, several chunks at a time. A chunk that fails is
+    bisected recursively until the offending rows are isolated, so one bad
+    row costs log2(chunk_size) extra requests instead of failing the chunk.
+    Extra keyword arguments are passed through to .upsert(); only raised
+    errors count as failures, so returning="minimal" (no rows echoed back)
+    works too.
+    Returns (succeeded_rows, [(failed_row, error_message), ...]).
+    """
+    def upsert_chunk(chunk):
+        try:
+            client.table(table).upsert(chunk, on_conflict=on_conflict, **upsert_options).execute()
+            return chunk, []
+        except Exception as e:
+            if len(chunk) == 1:
+                return [], [(chunk[0], str(e))]
+            mid = len(chunk) // 2
+            left_ok, left_failed = upsert_chunk(chunk[:mid])
+            right_ok, right_failed = upsert_chunk(chunk[mid:])
+            return left_ok + right_ok, left_failed + right_failed
+
+    # PostgREST bulk writes require every object in a request to share the same keys
+    by_shape = {}
+    for row in rows:
+        by_shape.setdefault(tuple(sorted(row.keys())), []).append(row)
+    chunks = [chunk for group in by_shape.values() for chunk in chunked(group, chunk_size)]
+
+    succeeded, failed = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for ok, bad in pool.map(upsert_chunk, chunks):
+            succeeded.extend(ok)
+            failed.extend(bad)
+    return succeeded, failed
+
+# --- Async variants (supabase AsyncClient)
+
+async def afetch_all_rows(build_query, page_size=PAGE_SIZE):
+    """Async counterpart of fetch_all_rows."""
+    rows = []
+    start = 0
+    while True:
+        response = await build_query().range(start, start + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+async def afetch_rows_in(client, table, columns, column, values, chunk_size=IN_CHUNK_SIZE, order="id"):
+    """Async counterpart of fetch_rows_in: all `in_` chunks are requested concurrently."""
+    def query_for(chunk):
+        return lambda: client.table(table).select(columns).in_(column, chunk).order(order)
+
+    pages = await asyncio.gather(*(afetch_all_rows(query_for(chunk)) for chunk in chunked(values, chunk_size)))
+    return [row for page in pages for row in page]
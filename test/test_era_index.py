@@ -0,0 +1,66 @@
+# Compiled era lookup (src/utils/era_index.py) against the DataFrame filter it replaced
+
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.era_index import ERAS_CSV_PATH, EraIndex
+
+def match_era(year, region, eras_df):
+    """The original per-event lookup from generate_pending_events.py."""
+    candidates = eras_df[(eras_df["start"] <= year) & (eras_df["end"] >= year)]
+    if candidates.empty:
+        return {"era": "Unknown", "era_id": None}
+    exact_match = candidates[candidates["region"] == region]
+    fallback_match = candidates[candidates["region"] == "General"]
+    if not exact_match.empty:
+        selected = exact_match.iloc[0]
+    elif not fallback_match.empty:
+        selected = fallback_match.iloc[0]
+    else:
+        selected = candidates.iloc[0]
+    return {"era": selected["label"], "era_id": int(selected["id"])}
+
+def test_matches_the_dataframe_filter_on_the_era_table():
+    eras_df = pd.read_csv(ERAS_CSV_PATH)
+    index = EraIndex(eras_df, validate=False)
+
+    # Every boundary and its neighbours, plus random years over the whole span
+    years = set()
+    for year in pd.concat([eras_df["start"], eras_df["end"]]).astype(int):
+        years.update((year - 1, year, year + 1))
+    rng = random.Random(0)
+    low, high = int(eras_df["start"].min()), int(eras_df["end"].max())
+    years.update(rng.randint(low - 100, high + 100) for _ in range(300))
+
+    regions = [*eras_df["region"].dropna().unique(), "Atlantis", None]
+    cases = [(year, rng.choice(regions)) for year in sorted(years)]
+
+    expected = [match_era(year, region, eras_df) for year, region in cases]
+    assert [index.match(year, region) for year, region in cases] == expected
+    assert index.match_many([y for y, _ in cases], [r for _, r in cases]) == expected
+
+def test_unparseable_years_are_unknown():
+    index = EraIndex(pd.read_csv(ERAS_CSV_PATH), validate=False)
+    assert index.match(None, "Europe") == {"era": "Unknown", "era_id": None}
+    assert index.match_many(["not a year", None], ["Europe", "Europe"]) == [{"era": "Unknown", "era_id": None}] * 2
+
+def test_building_the_index_prints_nothing(capsys):
+    index = EraIndex.from_csv()
+    assert index.problems  # The shipped table has known overlaps
+    assert capsys.readouterr().out == ""
+
+def test_single_and_bulk_lookups_agree_on_any_year_type():
+    index = EraIndex(pd.read_csv(ERAS_CSV_PATH), validate=False)
+    years = [1500, 1500.0, 1500.7, "1500", " 1500 ", "-44", "circa 1500", "", None, float("nan"), float("inf"), True]
+    regions = ["Europe"] * len(years)
+
+    single = [index.match(year, region) for year, region in zip(years, regions)]
+    assert index.match_many(years, regions) == single
+    assert single[0] == single[1] == single[3] == single[4] == index.match(1500, "Europe")
+    assert single[0]["era_id"] is not None
+    assert all(match == {"era": "Unknown", "era_id": None} for match in single[6:])
@@ -1,7 +1,14 @@
 # Simple Python script to check for gaps and overlaps in an "eras" table
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.era_index import check_gaps_and_overlaps
+
 def check_eras_gaps(csv_path):
     # Load CSV
     df = pd.read_csv(csv_path)
@@ -10,20 +17,8 @@ def check_eras_gaps(csv_path):
     df['start'] = df['start'].astype(int)
     df['end'] = df['end'].astype(int)
 
-    problems = []
-
-    # Group by Region and Country for independent checking
-    for (region, country), group in df.groupby(['region', 'country']):
-        group = group.sort_values('start')
-
-        previous_end = None
-        for _, row in group.iterrows():
-            if previous_end is not None:
-                if row['start'] > previous_end + 1:
-                    problems.append(f"⛔ Gap in {region} - {country}: {previous_end+1} to {row['start']-1}")
-                elif row['start'] <= previous_end:
-                    problems.append(f"⚠️ Overlap in {region} - {country}: {previous_end} to {row['start']}")
-            previous_end = row['end']
+    # Gaps/overlaps per Region and Country (same check EraIndex runs when it is built)
+    problems = check_gaps_and_overlaps(df)
 
     if problems:
         print("\n".join(problems))
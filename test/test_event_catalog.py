@@ -0,0 +1,84 @@
+# Catalog versions and /api/events deltas (src/utils/event_catalog.py)
+
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.event_catalog import EventCatalog, normalize_event, record_versions
+
+def make_event(i, **fields):
+    return {"id": i, "slug": f"event-{i}", "title": f"Event {i}", "year": 1000 + i, "coords": "48.85661, 2.35222",
+            "theme": "Wars & Battles", "region": "Europe", "curriculum_tags": '["gb_key_stage_3"]', **fields}
+
+def write_events(path, events):
+    path.write_text(json.dumps(events), encoding="utf-8")
+    # Make sure the mtime moves even on coarse-grained filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+def test_normalize_event_matches_catalog_shape():
+    event = normalize_event(make_event(1, caption="", image_url=None))
+    assert event["coords"] == [48.8566, 2.3522]
+    assert event["theme"] == "wars & battles" and event["theme_id"] == 1
+    assert event["curriculum_tags"] == ["gb_key_stage_3"]
+    assert event["caption"] is None
+    assert event["image_url"] == "/images/event-1.jpg"
+    assert "image_variants" not in event
+    assert normalize_event(event) == event
+
+def test_version_moves_only_on_change(tmp_path):
+    versions = tmp_path / "versions.json"
+    events = [make_event(i) for i in range(3)]
+    assert record_versions(events, versions) == 1
+    assert record_versions(events, versions) == 1
+    events[0]["title"] = "Renamed"
+    assert record_versions(events, versions) == 2
+
+def test_delta_since_version_with_tombstones(tmp_path):
+    events_path, versions = tmp_path / "events.json", tmp_path / "versions.json"
+    events = [make_event(i) for i in range(5)]
+    write_events(events_path, events)
+    record_versions(events, versions)
+    catalog = EventCatalog(events_path, versions)
+    assert catalog.delta(1)["events"] == []
+
+    events[1]["title"] = "Changed"
+    removed = events.pop(3)
+    events.append(make_event(9))
+    write_events(events_path, events)
+    record_versions(events, versions)
+
+    delta = catalog.delta(1)
+    assert delta["version"] == 2 and delta["full"] is False
+    assert sorted(e["slug"] for e in delta["events"]) == ["event-1", "event-9"]
+    assert delta["removed"] == [removed["slug"]]
+    assert catalog.delta(2)["events"] == [] and catalog.delta(2)["removed"] == []
+
+    full = catalog.delta(None)
+    assert full["full"] is True and len(full["events"]) == 5
+    # A version from a reset catalog gets everything again
+    assert catalog.delta(99)["full"] is True
+
+def test_reads_never_stamp_rows_the_build_has_not_seen(tmp_path):
+    events_path, versions = tmp_path / "events.json", tmp_path / "versions.json"
+    events = [make_event(i) for i in range(3)]
+    write_events(events_path, events)
+    record_versions(events, versions)
+    stamped = versions.read_bytes()
+    catalog = EventCatalog(events_path, versions)
+
+    events[0]["title"] = "Edited"
+    events.append(make_event(7))
+    write_events(events_path, events)  # No build: events.json changed on its own
+    delta = catalog.delta(None)
+    assert delta["version"] == 1
+    # The new row has no version and is held back; the edited one keeps its version
+    assert sorted(e["slug"] for e in delta["events"]) == ["event-0", "event-1", "event-2"]
+    assert catalog.delta(1)["events"] == []
+    assert versions.read_bytes() == stamped
+
+    record_versions(events, versions)  # The build catches up
+    assert sorted(e["slug"] for e in catalog.delta(1)["events"]) == ["event-0", "event-7"]
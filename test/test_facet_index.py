@@ -0,0 +1,83 @@
+# Facet bitsets (src/utils/facet_index.py) against a brute-force filter over the events
+
+import random
+import sys
+from itertools import combinations
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.data.theme_lookup import theme_lookup
+from src.utils.facet_index import FILTER_FACETS, FacetIndex
+
+THEMES = list(theme_lookup)[:4]
+ERAS = ["4. Ancient World", "5. Middle Ages", "6. Early Modern"]
+REGIONS = ["Europe", "Asia", "Africa", None]
+TAGS = ["gb_key_stage_3", "fr_cycle_4", "us_grade_8"]
+
+def make_events(count=300, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "slug": f"event-{i}",
+            "theme": rng.choice(THEMES),
+            "broad_era": rng.choice(ERAS),
+            "region": rng.choice(REGIONS),
+            "curriculum_tags": rng.sample(TAGS, rng.randint(0, 2)),
+        }
+        for i in range(count)
+    ]
+
+def value_of(event, facet):
+    return theme_lookup[event["theme"]] if facet == "theme" else event[facet]
+
+def brute_match(events, filters, curriculum_key=None):
+    if curriculum_key:
+        return [e for e in events if curriculum_key in e["curriculum_tags"]]
+    matching = []
+    for event in events:
+        selected = True
+        for key, facet in FILTER_FACETS.items():
+            values = filters.get(key)
+            if facet == "theme" and values:
+                values = [int(v) if str(v).isdigit() else theme_lookup[v] for v in values]
+            if values and value_of(event, facet) not in values:
+                selected = False
+        if selected:
+            matching.append(event)
+    return matching
+
+def selections():
+    yield {}
+    yield {"themes": [THEMES[0]]}
+    yield {"themes": [theme_lookup[THEMES[1]], THEMES[2]], "regions": ["Europe"]}
+    for eras in combinations(ERAS, 2):
+        yield {"broad_eras": list(eras), "regions": ["Asia", "Africa"], "themes": [str(theme_lookup[THEMES[3]])]}
+    yield {"regions": ["Atlantis"]}
+
+def test_match_equals_brute_force():
+    events = make_events()
+    index = FacetIndex(events)
+    for filters in selections():
+        expected = {e["slug"] for e in brute_match(events, filters)}
+        assert {events[i]["slug"] for i in range(len(events)) if index.match(filters) >> i & 1} == expected
+    for tag in TAGS:
+        mask = index.match({"regions": ["Europe"]}, curriculum_key=tag)
+        assert mask.bit_count() == len(brute_match(events, {}, curriculum_key=tag))
+
+def test_counts_equal_brute_force():
+    events = make_events()
+    index = FacetIndex(events)
+    for filters in selections():
+        counts = index.counts(filters)
+        assert counts["total"] == len(brute_match(events, filters))
+
+        for key, facet in FILTER_FACETS.items():
+            # A value's count: what would match with the other facets' selections and only that value here
+            others = {k: v for k, v in filters.items() if k != key}
+            for value in {value_of(e, facet) for e in events} - {None}:
+                expected = sum(1 for e in brute_match(events, others) if value_of(e, facet) == value)
+                assert counts["facets"][facet][str(value) if facet == "theme" else value] == expected
+
+        for tag in TAGS:
+            assert counts["facets"]["curriculum_tags"][tag] == len(brute_match(events, {}, curriculum_key=tag))
@@ -0,0 +1,87 @@
+# Append-only idea log (src/moderation/idea_log.py)
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.moderation import idea_log
+from src.moderation.idea_log import append_batch, import_legacy, read_ideas, segment_counts
+
+def log_batches(log_dir):
+    # Two months, oldest first: ideas 0-5 generated, 6-7 accepted
+    append_batch("generated", [{"title": f"Idea {i}", "theme": "Science"} for i in range(3)],
+                 log_dir=log_dir, logged_at=datetime(2025, 4, 2))
+    append_batch("generated", [{"title": f"Idea {i}", "theme": "Art"} for i in range(3, 6)],
+                 log_dir=log_dir, logged_at=datetime(2025, 5, 3))
+    append_batch("accepted", [{"title": "Idea 6"}, "Idea 7"], log_dir=log_dir, logged_at=datetime(2025, 5, 4))
+
+def titles(page):
+    return [idea["title"] for idea in page["items"]]
+
+def test_pages_newest_first_with_totals(tmp_path):
+    log_batches(tmp_path)
+
+    page = read_ideas(offset=0, limit=3, log_dir=tmp_path)
+    assert titles(page) == ["Idea 7", "Idea 6", "Idea 5"]
+    assert page["total"] == 8 and page["has_more"]
+
+    page = read_ideas(offset=6, limit=3, log_dir=tmp_path)
+    assert titles(page) == ["Idea 1", "Idea 0"]
+    assert not page["has_more"]
+
+    page = read_ideas(offset=0, limit=10, newest_first=False, kind="generated", log_dir=tmp_path)
+    assert titles(page) == [f"Idea {i}" for i in range(6)] and page["total"] == 6
+
+def test_skips_segments_before_the_offset(tmp_path, monkeypatch):
+    log_batches(tmp_path)
+    read = []
+    original = idea_log.segment_records
+    monkeypatch.setattr(idea_log, "segment_records", lambda path: read.append(Path(path).name) or original(path))
+
+    segment_counts(tmp_path)  # Index built
+    read.clear()
+    assert titles(read_ideas(offset=5, limit=2, log_dir=tmp_path)) == ["Idea 2", "Idea 1"]
+    assert read == ["2025-04.jsonl.gz"]
+
+def test_filtered_reads_stop_at_the_page(tmp_path):
+    log_batches(tmp_path)
+
+    page = read_ideas(offset=0, limit=2, theme="art", log_dir=tmp_path)
+    assert titles(page) == ["Idea 5", "Idea 4"]
+    assert page["total"] is None and page["has_more"]
+
+    page = read_ideas(offset=0, limit=5, theme="art", log_dir=tmp_path)
+    assert page["total"] == 3 and not page["has_more"]
+
+    page = read_ideas(since="2025-05-01", log_dir=tmp_path)
+    assert page["total"] == 5
+
+def test_counts_follow_appends_and_compaction(tmp_path):
+    log_batches(tmp_path)
+    assert segment_counts(tmp_path)["2025-05.jsonl.gz"]["generated"] == 3
+
+    append_batch("generated", [{"title": "Late"}], log_dir=tmp_path, logged_at=datetime(2025, 5, 9))
+    assert segment_counts(tmp_path)["2025-05.jsonl.gz"]["generated"] == 4
+
+    idea_log.compact(retention_days=100000, log_dir=tmp_path)
+    counts = segment_counts(tmp_path)
+    assert counts["2025-05.jsonl.gz"] == {"size": counts["2025-05.jsonl.gz"]["size"], "generated": 4, "accepted": 2}
+    assert read_ideas(log_dir=tmp_path)["total"] == 9
+
+def test_legacy_import_is_idempotent_and_keeps_timestamps(tmp_path):
+    log_dir = tmp_path / "idea_log"
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    generated = tmp_path / "generated_ideas.json"
+    generated.write_text(json.dumps([{"title": "Old idea"}]), encoding="utf-8")
+    (archive / "pending_event_ideas_2025-03-04_10-20-30.json").write_text(json.dumps([{"title": "Kept"}]), encoding="utf-8")
+
+    assert import_legacy(generated, archive, log_dir) == 2
+    assert import_legacy(generated, archive, log_dir) == 0
+
+    accepted = read_ideas(kind="accepted", log_dir=log_dir)["items"]
+    assert accepted[0]["logged_at"] == "2025-03-04T10:20:30"
+    assert (log_dir / "2025-03.jsonl.gz").exists()
@@ -0,0 +1,88 @@
+# Durable job queue (src/moderation/job_queue.py)
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.moderation.job_queue import JobQueue
+
+def test_lease_claims_each_job_once(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    first = queue.submit("generate_ideas", {"count": 1})
+    second = queue.submit("generate_ideas", {"count": 2})
+
+    a = queue.lease("worker-a")
+    b = queue.lease("worker-b")
+    assert (a["id"], b["id"]) == (first, second)
+    assert a["payload"] == {"count": 1} and a["attempts"] == 1
+    assert queue.lease("worker-c") is None
+
+    queue.complete(a["id"], "worker-a", {"ok": True})
+    job = queue.get(first)
+    assert job["status"] == "succeeded" and job["result"] == {"ok": True}
+
+def test_lapsed_lease_is_taken_over(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    job_id = queue.submit("generate_ideas", {}, max_attempts=2)
+
+    queue.lease("dead-worker", lease_seconds=0.01)
+    time.sleep(0.05)
+    job = queue.lease("worker-b")
+    assert job["id"] == job_id and job["attempts"] == 2
+
+    # The first worker lost the job: its late result is ignored
+    assert not queue.renew(job_id, "dead-worker")
+    queue.complete(job_id, "dead-worker", "stale")
+    assert queue.get(job_id)["status"] == "running"
+
+    # Out of attempts once this lease lapses too
+    queue.renew(job_id, "worker-b", lease_seconds=0.01)
+    time.sleep(0.05)
+    assert queue.lease("worker-c") is None
+    assert queue.get(job_id)["status"] == "failed"
+
+def test_fail_requeues_after_backoff_then_gives_up(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    job_id = queue.submit("save_accepted_ideas", [], max_attempts=2)
+
+    queue.lease("worker-a")
+    queue.fail(job_id, "worker-a", "boom", backoff_seconds=0.1)
+    job = queue.get(job_id)
+    assert job["status"] == "queued" and job["error"] == "boom"
+    assert queue.lease("worker-a") is None  # Still backing off
+
+    time.sleep(0.15)
+    assert queue.lease("worker-a")["attempts"] == 2
+    queue.fail(job_id, "worker-a", "boom again", backoff_seconds=0.1)
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and job["finished_at"] is not None
+    assert queue.lease("worker-a") is None
+
+def test_backoff_doubles_with_attempts(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3")
+    job_id = queue.submit("generate_ideas", {}, max_attempts=5)
+    delays = []
+    for _ in range(3):
+        with sqlite3.connect(queue.path) as conn:
+            conn.execute("UPDATE jobs SET not_before = NULL WHERE id = ?", (job_id,))
+        queue.lease("worker")
+        before = time.time()
+        queue.fail(job_id, "worker", "boom", backoff_seconds=10)
+        delays.append(round(queue.get(job_id)["not_before"] - before))
+    assert delays == [10, 20, 40]
+
+def test_existing_queue_gains_backoff_column(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, worker TEXT, lease_until REAL, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        conn.execute("INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at) VALUES ('old', 'k', '{}', 'queued', 3, 0)")
+
+    queue = JobQueue(path)
+    assert queue.lease("worker")["id"] == "old"
@@ -0,0 +1,76 @@
+# Append-only event queues (src/utils/jsonl_journal.py)
+
+import json
+import multiprocessing
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.jsonl_journal import EventJournal
+
+def event(slug, **fields):
+    return {"slug": slug, "title": slug.title(), **fields}
+
+def test_append_remove_and_replay(tmp_path):
+    journal = EventJournal(tmp_path / "events.jsonl")
+    journal.append(event("a"))
+    journal.extend([event("b"), event("c")])
+    journal.remove("b")
+    journal.append(event("a", title="Updated"))
+
+    # A re-put moves the event to the end, a delete drops it
+    assert [e["slug"] for e in journal] == ["c", "a"]
+    assert journal.load()["a"]["title"] == "Updated"
+    assert EventJournal(tmp_path / "events.jsonl").keys() == {"a", "c"}
+
+def test_compact_keeps_only_live_events(tmp_path):
+    journal = EventJournal(tmp_path / "events.jsonl")
+    journal.extend([event(s) for s in "abcd"])
+    journal.remove("a", "c")
+    before = journal.load()
+
+    assert journal.compact() == 2
+    assert journal.load() == before
+    lines = journal.path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["put", "put"]
+
+def test_torn_last_line_is_skipped_and_repaired(tmp_path):
+    journal = EventJournal(tmp_path / "events.jsonl")
+    journal.append(event("a"))
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "event": {"slu')  # Interrupted write
+
+    assert journal.keys() == {"a"}
+    journal.append(event("b"))
+    assert journal.keys() == {"a", "b"}
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    legacy = tmp_path / "events.json"
+    legacy.write_text(json.dumps([event("a"), event("b")]), encoding="utf-8")
+    journal = EventJournal(tmp_path / "events.jsonl", legacy_path=legacy)
+
+    journal.append(event("c"))
+    assert [e["slug"] for e in journal] == ["a", "b", "c"]
+    assert not legacy.exists()
+    assert (tmp_path / "events.json.migrated").exists()
+
+def _append_many(path, prefix, count):
+    journal = EventJournal(path)
+    for i in range(count):
+        journal.append(event(f"{prefix}-{i}"))
+
+def test_compact_does_not_lose_concurrent_appends(tmp_path):
+    path = tmp_path / "events.jsonl"
+    journal = EventJournal(path)
+    journal.append(event("seed"))
+
+    writers = [multiprocessing.Process(target=_append_many, args=(path, p, 50)) for p in ("x", "y")]
+    for w in writers:
+        w.start()
+    for _ in range(20):
+        journal.compact()
+    for w in writers:
+        w.join()
+
+    assert len(journal.keys()) == 101
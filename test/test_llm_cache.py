@@ -0,0 +1,77 @@
+# Response cache behaviour of src/utils/llm_client.py (no network: the OpenAI client is faked)
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils import llm_client
+from src.utils.llm_client import ResponseCache, chat_completion
+
+class FakeClient:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    def install(*replies):
+        client = FakeClient(replies)
+        monkeypatch.setattr(llm_client, "get_client", lambda: client)
+        return client
+    monkeypatch.setattr(llm_client, "response_cache", ResponseCache(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(llm_client, "CACHE_BYPASS", False)
+    return install
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+def test_cacheable_request_is_replayed(fake):
+    client = fake('{"a": 1}', '{"a": 2}')
+    assert chat_completion(MESSAGES, temperature=0.2, cache=True) == '{"a": 1}'
+    assert chat_completion(MESSAGES, temperature=0.2, cache=True) == '{"a": 1}'
+    assert client.calls == 1
+    stats = llm_client.response_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+def test_counters_persist_across_instances(fake, tmp_path):
+    fake("x")
+    chat_completion(MESSAGES, temperature=0, cache=True)
+    chat_completion(MESSAGES, temperature=0, cache=True)
+    assert ResponseCache(tmp_path / "cache.sqlite3").stats()["hits"] == 1
+
+def test_sampled_requests_bypass_cache_by_default(fake):
+    client = fake("first idea", "second idea")
+    assert chat_completion(MESSAGES, temperature=0.7) == "first idea"
+    assert chat_completion(MESSAGES, temperature=0.7) == "second idea"
+    assert client.calls == 2
+    assert llm_client.response_cache.stats()["entries"] == 0
+
+def test_bypass_refreshes_cached_copy(fake):
+    client = fake("old", "new")
+    chat_completion(MESSAGES, temperature=0, cache=True)
+    assert chat_completion(MESSAGES, temperature=0, cache=True, bypass_cache=True) == "new"
+    assert chat_completion(MESSAGES, temperature=0, cache=True) == "new"
+    assert client.calls == 2
+
+def test_invalid_response_is_not_cached(fake):
+    client = fake("not json", '{"ok": true}')
+    assert chat_completion(MESSAGES, cache=True, validate=json.loads) == "not json"
+    assert chat_completion(MESSAGES, cache=True, validate=json.loads) == '{"ok": true}'
+    assert chat_completion(MESSAGES, cache=True, validate=json.loads) == '{"ok": true}'
+    assert client.calls == 2
+
+def test_cached_response_failing_validation_is_evicted(fake):
+    client = fake("not json", '{"ok": true}')
+    chat_completion(MESSAGES, cache=True)  # Cached without a validator
+    assert chat_completion(MESSAGES, cache=True, validate=json.loads) == '{"ok": true}'
+    assert client.calls == 2
@@ -0,0 +1,86 @@
+# Session plans from src/utils/session_planner.py over a small in-memory catalog
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.session_planner import SessionPlanner
+
+def make_event(i, region):
+    return {"id": i, "slug": f"event-{i}", "title": f"Event {i}", "theme": "wars & battles", "region": region,
+            "broad_era": "5. Middle Ages", "curriculum_tags": []}
+
+class FakeCatalog:
+    def __init__(self, events):
+        self._snapshot = {"version": 1, "events": [(1, e) for e in events], "removed": {}}
+
+    def snapshot(self):
+        return self._snapshot
+
+class FakeSupabase:
+    """Answers the recent-results query with `recent` and counts queries."""
+
+    def __init__(self, recent=()):
+        self.recent = list(recent)
+        self.queries = 0
+
+    def table(self, name):
+        client = self
+
+        class Query:
+            def __getattr__(self, attr):
+                return lambda *args, **kwargs: self
+
+            def execute(self):
+                client.queries += 1
+                return SimpleNamespace(data=[{"slug": s} for s in client.recent])
+        return Query()
+
+EVENTS = [make_event(i, "Oceania" if i < 3 else "Europe") for i in range(20)]
+
+def test_plan_matches_filters_without_duplicates():
+    planner = SessionPlanner(FakeCatalog(EVENTS))
+    plan = planner.plan(FakeSupabase(), "ada", 10, filters={"regions": ["Europe"]})
+    slugs = [e["slug"] for e in plan["events"]]
+    assert len(slugs) == len(set(slugs)) == 10
+    assert all(e["region"] == "Europe" for e in plan["events"])
+    assert plan["repeats"] is False
+
+def test_recent_slugs_are_skipped_and_cached():
+    client = FakeSupabase(recent=["event-3", "event-4"])
+    planner = SessionPlanner(FakeCatalog(EVENTS))
+    first = planner.plan(client, "ada", 5, filters={"regions": ["Europe"]})
+    second = planner.plan(client, "ada", 5, filters={"regions": ["Europe"]})
+    planned = [e["slug"] for e in first["events"] + second["events"]]
+    assert "event-3" not in planned and "event-4" not in planned
+    assert len(set(planned)) == 10
+    assert client.queries == 1
+
+def test_small_selection_repeats_instead_of_running_dry():
+    planner = SessionPlanner(FakeCatalog(EVENTS))
+    client = FakeSupabase()
+    plan = planner.plan(client, "ada", 10, filters={"regions": ["Oceania"]})
+    assert len(plan["events"]) == 3
+    assert plan["repeats"] is True
+
+    # The game asks again with every event of the session excluded
+    played = [e["slug"] for e in plan["events"]]
+    refill = planner.plan(client, "ada", 7, filters={"regions": ["Oceania"]}, exclude=played)
+    assert sorted(e["slug"] for e in refill["events"]) == sorted(played)
+    assert refill["repeats"] is True
+
+def test_empty_selection_gives_empty_plan():
+    planner = SessionPlanner(FakeCatalog(EVENTS))
+    plan = planner.plan(FakeSupabase(), "ada", 5, filters={"regions": ["Antarctica"]})
+    assert plan["events"] == [] and plan["matching"] == 0
+
+def test_recent_slugs_keep_a_bounded_number_of_players():
+    planner = SessionPlanner(FakeCatalog(EVENTS))
+    planner.recent.max_players = 3
+    client = FakeSupabase()
+    for name in ["ada", "bo", "cy", "ada", "di"]:
+        planner.plan(client, name, 1)
+    # "bo" was least recently planned when "di" arrived
+    assert list(planner.recent._players) == ["cy", "ada", "di"]
@@ -0,0 +1,69 @@
+# Local dedup prefilter: SimilarityIndex scores and the thresholds in deduplication_agent.classify_locally
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.agents import deduplication_agent
+from src.agents.deduplication_agent import DUPLICATE_SIMILARITY, NEW_SIMILARITY, TOP_K_NEIGHBOURS, classify_locally
+from src.agents.similarity_index import SimilarityIndex
+
+MEMORY = [{"title": title, "year": year} for title, year in [
+    ("Battle of Hastings", 1066),
+    ("Battle of Agincourt", 1415),
+    ("Siege of Orléans", 1429),
+    ("Battle of Bosworth Field", 1485),
+    ("Fall of Constantinople", 1453),
+    ("Battle of Crécy", 1346),
+    ("Signing of the Magna Carta", 1215),
+    ("Norman Conquest of England", 1066),
+]]
+INDEX = SimilarityIndex(MEMORY)
+
+def verdict(title, year):
+    return classify_locally({"title": title, "year": year}, INDEX.query(title, k=TOP_K_NEIGHBOURS))
+
+def test_exact_and_near_identical_titles_are_duplicates():
+    for title in ["Battle of Hastings", "battle of hastings!", "The Battle of Hastings", "Battle at Agincourt"]:
+        result = verdict(title, 1066 if "astings" in title else 1415)
+        assert result["status"] == "duplicate", title
+    assert verdict("Battle of Hastings", 1067)["match_title"] == "Battle of Hastings"  # ±1 year still matches
+
+def test_unrelated_titles_are_new():
+    for title in ["Invention of the printing press", "Black Death reaches Europe", "Battle of Tewkesbury"]:
+        assert INDEX.query(title, k=1)[0][0] < NEW_SIMILARITY
+        assert verdict(title, 1450)["status"] == "new", title
+    assert classify_locally({"title": "Anything", "year": 1}, [])["status"] == "new"
+
+def test_borderline_titles_are_left_to_the_llm():
+    score, best = INDEX.query("Siege of Constantinople", k=1)[0]
+    assert best["title"] == "Fall of Constantinople"
+    assert NEW_SIMILARITY <= score < DUPLICATE_SIMILARITY
+    assert verdict("Siege of Constantinople", 1453) is None
+    # Same title, different year: a different event as far as the local check knows
+    assert verdict("Battle of Hastings", 1200) is None
+
+def test_borderline_ideas_reach_the_llm_with_their_neighbours(monkeypatch):
+    monkeypatch.setattr(deduplication_agent, "get_similarity_index", lambda key: INDEX)
+    sent = []
+
+    def fake_bucket(key, bucket):
+        sent.extend(bucket)
+        return {position: {"status": "variant", "match_title": "Fall of Constantinople", "reason": "LLM"}
+                for position, _, _ in bucket}
+    monkeypatch.setattr(deduplication_agent, "deduplicate_bucket", fake_bucket)
+
+    ideas = [
+        {"title": "Battle of Hastings", "year": 1066, "theme": "wars & battles"},
+        {"title": "Siege of Constantinople", "year": 1453, "theme": "wars & battles"},
+        {"title": "Invention of the printing press", "year": 1440, "theme": "wars & battles"},
+    ]
+    results = deduplication_agent.run_batch_deduplication(ideas)
+
+    assert [r["status"] for r in results] == ["duplicate", "variant", "new"]
+    assert len(sent) == 1
+    position, idea, neighbours = sent[0]
+    assert position == 1 and idea["title"] == "Siege of Constantinople"
+    assert len(neighbours) == TOP_K_NEIGHBOURS
+    assert neighbours[0][1]["title"] == "Fall of Constantinople"
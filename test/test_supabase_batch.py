@@ -0,0 +1,49 @@
+# Chunked Supabase writes (src/utils/supabase_batch.py) against a fake client
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.supabase_batch import bulk_upsert
+
+class FakeClient:
+    """Upserts fail when a chunk holds a row with "bad" set; returns no rows for returning="minimal"."""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        client = self
+
+        class Table:
+            def upsert(self, rows, on_conflict=None, returning="representation"):
+                def execute():
+                    with client.lock:
+                        client.requests.append(len(rows))
+                    if any(row.get("bad") for row in rows):
+                        raise Exception("violates check constraint")
+                    return SimpleNamespace(data=[] if returning == "minimal" else rows)
+                return SimpleNamespace(execute=execute)
+        return Table()
+
+def rows(count, bad=()):
+    return [{"slug": f"event-{i}", "bad": i in bad} for i in range(count)]
+
+def test_minimal_returning_is_not_a_failure():
+    client = FakeClient()
+    ok, failed = bulk_upsert(client, "events", rows(10), chunk_size=5, returning="minimal")
+    assert len(ok) == 10 and failed == []
+    assert client.requests == [5, 5]
+
+def test_failing_rows_are_isolated_by_bisection():
+    client = FakeClient()
+    ok, failed = bulk_upsert(client, "events", rows(16, bad={3}), chunk_size=8, max_workers=1)
+    assert [row["slug"] for row, _ in failed] == ["event-3"]
+    assert "check constraint" in failed[0][1]
+    assert len(ok) == 15
+    # One bad row in a chunk of 8 costs 2 * log2(8) extra requests
+    assert len(client.requests) == 2 + 6